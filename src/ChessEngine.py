@@ -4,6 +4,57 @@ Također će biti zadužena za određivanje validnih poteza u datom trenutku.
 Čuva i evidenciju svih odigranih poteza (move log).
 """
 
+import random
+
+import psqt
+
+# Kodovi figura kao mali cijeli brojevi (0 = prazno polje) — koriste se u undo stacku i Zobrist ključevima
+PIECE_NAMES = ["--",
+               "white pawn", "white knight", "white bishop", "white rook", "white queen", "white king",
+               "black pawn", "black knight", "black bishop", "black rook", "black queen", "black king"]
+PIECE_CODES = {name: code for code, name in enumerate(PIECE_NAMES)}
+
+# Prava rošade kao bitovi jednog cijelog broja
+CASTLE_WKS = 1  # Bijela rokada desno (king side)
+CASTLE_WQS = 2  # Bijela rokada lijevo (queen side)
+CASTLE_BKS = 4  # Crna rokada desno
+CASTLE_BQS = 8  # Crna rokada lijevo
+CASTLE_ALL = CASTLE_WKS | CASTLE_WQS | CASTLE_BKS | CASTLE_BQS
+
+# Maska prava rošade po polju (r * 8 + c): potez sa ili na polje kralja/topa briše odgovarajuća prava
+CASTLE_MASK = [CASTLE_ALL] * 64
+CASTLE_MASK[7 * 8 + 4] &= ~(CASTLE_WKS | CASTLE_WQS)  # bijeli kralj e1
+CASTLE_MASK[7 * 8 + 0] &= ~CASTLE_WQS                  # bijeli top a1
+CASTLE_MASK[7 * 8 + 7] &= ~CASTLE_WKS                  # bijeli top h1
+CASTLE_MASK[0 * 8 + 4] &= ~(CASTLE_BKS | CASTLE_BQS)  # crni kralj e8
+CASTLE_MASK[0 * 8 + 0] &= ~CASTLE_BQS                  # crni top a8
+CASTLE_MASK[0 * 8 + 7] &= ~CASTLE_BKS                  # crni top h8
+
+# Zobrist ključevi (fiksni seed da bi hash bio isti u svim procesima i sesijama)
+_zobristRandom = random.Random(20240611)
+ZOBRIST_PIECES = [[0] * 64] + [[_zobristRandom.getrandbits(64) for _ in range(64)] for _ in PIECE_NAMES[1:]]
+ZOBRIST_CASTLE = [_zobristRandom.getrandbits(64) for _ in range(16)]
+ZOBRIST_EN_PASSANT = [_zobristRandom.getrandbits(64) for _ in range(8)]  # po koloni
+ZOBRIST_BLACK_TO_MOVE = _zobristRandom.getrandbits(64)
+PAWN_CODES = (PIECE_CODES["white pawn"], PIECE_CODES["black pawn"])
+
+# Pozicione tabele po kodu figure i polju (vrijednost figure + bonus, negativno za crne) i težine faze igre
+PSQT_MG = psqt.buildPsqt(PIECE_NAMES, psqt.PIECE_VALUE_MG, psqt.TABLES_MG)
+PSQT_EG = psqt.buildPsqt(PIECE_NAMES, psqt.PIECE_VALUE_EG, psqt.TABLES_EG)
+PHASE = psqt.buildPhase(PIECE_NAMES)
+
+# En passant polje po kodu iz undo stacka (0 = nema, inače r * 8 + c + 1)
+EN_PASSANT_SQUARES = [()] + [divmod(sq, 8) for sq in range(64)]
+
+# Početna veličina undo stacka (broj poteza); stack se udvostručuje ako se napuni
+UNDO_STACK_SIZE = 256
+
+# FEN oznake figura
+FEN_TO_PIECE = {'P': "white pawn", 'N': "white knight", 'B': "white bishop", 'R': "white rook", 'Q': "white queen", 'K': "white king",
+                'p': "black pawn", 'n': "black knight", 'b': "black bishop", 'r': "black rook", 'q': "black queen", 'k': "black king"}
+PIECE_TO_FEN = {v: k for k, v in FEN_TO_PIECE.items()}
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
 class GameState():
     
     def __init__(self):
@@ -30,10 +81,8 @@ class GameState():
         self.whiteKingLocation = (7, 4)
         self.blackKingLocation = (0, 4)
 
-        # Informacije o rošadi (prava rošade za obje strane)
-        self.currentCastlingRights = CastleRights(True, True, True, True)
-        self.castleRightsLog = [CastleRights(self.currentCastlingRights.wks, self.currentCastlingRights.wqs,
-                                     self.currentCastlingRights.bks, self.currentCastlingRights.bqs)]
+        # Informacije o rošadi (prava rošade za obje strane kao bitovi CASTLE_*)
+        self.castlingRights = CASTLE_ALL
 
         self.inCheck = False  # Zastavica da li je trenutni igrač pod šahom
         self.checkmate = False  # Zastavica da li je igra završena matom
@@ -44,25 +93,212 @@ class GameState():
         # Polje na kojem je trenutno moguć en passant
         self.enPassantPossible = ()
 
+        # Broj polupoteza od zadnjeg poteza pješakom ili uzimanja (pravilo 50 poteza)
+        self.halfmoveClock = 0
+
         # Lista u koju će se spremati svi odigrani potezi (za praćenje igre i eventualno vraćanje poteza)
         self.moveLog = []
+        self.startPly = 0  # Broj polupoteza prije početne pozicije (kod pozicije učitane iz FEN-a)
+        self.startFen = START_FEN  # Početna pozicija partije; zajedno sa moveLog opisuje cijelu partiju
+
+        # Undo stack: za svaki potez jedan cijeli broj sa nepovratnim stanjem prije poteza
+        # (pojedena figura, prava rošade, en passant polje, halfmove clock) i hash pozicije u paralelnoj listi
+        self.undoStack = [0] * UNDO_STACK_SIZE
+        self.hashStack = [0] * UNDO_STACK_SIZE
+        self.pawnHashStack = [0] * UNDO_STACK_SIZE
+        self.evalStack = [None] * UNDO_STACK_SIZE
+        self.accumulatorStack = [None] * UNDO_STACK_SIZE
+        self.undoPly = 0
+
+        # Zobrist hash trenutne pozicije, ažurira se inkrementalno u makeMove
+        self.zobristHash = self.computeHash()
+
+        # Zobrist ključ samo od pješaka (za keš procjene pješačke strukture), takođe inkrementalan
+        self.pawnHash = self.computePawnHash()
+
+        # Zbir pozicionih tabela za sredinu partije i završnicu i faza igre (psqt.py), takođe inkrementalni
+        self.mgScore, self.egScore, self.phase = self.computeEval()
+
+        # Broj figura na tabli (sa kraljevima); mijenja se samo uzimanjem, pa je provjera bitbaza (bitbase.py)
+        # u pretrazi samo jedno poređenje
+        self.pieceCount = 32
+
+        # Neuronska evaluacija (nnue.Network) i akumulator njenog prvog sloja; akumulator se održava
+        # inkrementalno samo dok je mreža priključena (attachNnue)
+        self.nnue = None
+        self.accumulator = None
+
+        # Koliko puta se svaka pozicija (po hashu) pojavila u partiji — za provjeru ponavljanja u O(1)
+        self.positionCounts = {self.zobristHash: 1}
+
+    # Računa Zobrist hash pozicije od nule (inicijalizacija ili provjera inkrementalnog hasha)
+    def computeHash(self):
+        h = 0
+        for r in range(8):
+            for c in range(8):
+                piece = self.board[r][c]
+                if piece != "--":
+                    h ^= ZOBRIST_PIECES[PIECE_CODES[piece]][r * 8 + c]
+        h ^= ZOBRIST_CASTLE[self.castlingRights]
+        if self.enPassantPossible:
+            h ^= ZOBRIST_EN_PASSANT[self.enPassantPossible[1]]
+        if not self.whiteToMove:
+            h ^= ZOBRIST_BLACK_TO_MOVE
+        return h
+
+    def computePawnHash(self):
+        h = 0
+        for r in range(8):
+            for c in range(8):
+                code = PIECE_CODES[self.board[r][c]]
+                if code in PAWN_CODES:
+                    h ^= ZOBRIST_PIECES[code][r * 8 + c]
+        return h
+
+    def computeEval(self):
+        mg = eg = phase = 0
+        for r in range(8):
+            for c in range(8):
+                code = PIECE_CODES[self.board[r][c]]
+                mg += PSQT_MG[code][r * 8 + c]
+                eg += PSQT_EG[code][r * 8 + c]
+                phase += PHASE[code]
+        return mg, eg, phase
+
+    # Priključuje neuronsku evaluaciju (ili je isključuje sa None) i računa akumulator od nule. Akumulatori na
+    # steku pripadaju prethodnoj mreži (ili su zastarjeli nakon isključivanja), pa se brišu i undoMove ih
+    # ponovo računa od nule
+    def attachNnue(self, network):
+        self.nnue = network
+        self.accumulatorStack = [None] * len(self.accumulatorStack)
+        self.accumulator = network.refresh(self) if network is not None else None
+
+    # Postavlja poziciju iz FEN zapisa (brišu se move log i undo stack)
+    def loadFen(self, fen):
+        fields = fen.split()
+        self.board = []
+        for rankText in fields[0].split("/"):
+            row = []
+            for ch in rankText:
+                if ch.isdigit():
+                    row.extend(["--"] * int(ch))
+                else:
+                    row.append(FEN_TO_PIECE[ch])
+            self.board.append(row)
+        for r in range(8):
+            for c in range(8):
+                if self.board[r][c] == "white king":
+                    self.whiteKingLocation = (r, c)
+                elif self.board[r][c] == "black king":
+                    self.blackKingLocation = (r, c)
+        self.whiteToMove = len(fields) < 2 or fields[1] == "w"
+        castling = fields[2] if len(fields) > 2 else "-"
+        self.castlingRights = ((CASTLE_WKS if "K" in castling else 0) | (CASTLE_WQS if "Q" in castling else 0) |
+                               (CASTLE_BKS if "k" in castling else 0) | (CASTLE_BQS if "q" in castling else 0))
+        ep = fields[3] if len(fields) > 3 else "-"
+        self.enPassantPossible = () if ep == "-" else (Move.ranksToRows[ep[1]], Move.filesToCols[ep[0]])
+        self.halfmoveClock = int(fields[4]) if len(fields) > 4 else 0
+        self.startPly = (int(fields[5]) - 1) * 2 + (0 if self.whiteToMove else 1) if len(fields) > 5 else 0
+        self.startFen = fen
+        self.inCheck = self.checkmate = self.stalemate = False
+        self.pins, self.checks = [], []
+        self.moveLog = []
+        self.undoPly = 0
+        self.zobristHash = self.computeHash()
+        self.pawnHash = self.computePawnHash()
+        self.mgScore, self.egScore, self.phase = self.computeEval()
+        self.pieceCount = sum(piece != "--" for row in self.board for piece in row)
+        if self.nnue is not None:
+            self.accumulator = self.nnue.refresh(self)
+        self.positionCounts = {self.zobristHash: 1}
+        return self
+
+    # Vraća FEN zapis trenutne pozicije
+    def getFen(self):
+        ranks = []
+        for row in self.board:
+            text, empty = "", 0
+            for piece in row:
+                if piece == "--":
+                    empty += 1
+                else:
+                    if empty:
+                        text += str(empty)
+                        empty = 0
+                    text += PIECE_TO_FEN[piece]
+            ranks.append(text + (str(empty) if empty else ""))
+        castling = "".join(flag for bit, flag in ((CASTLE_WKS, "K"), (CASTLE_WQS, "Q"), (CASTLE_BKS, "k"), (CASTLE_BQS, "q"))
+                           if self.castlingRights & bit) or "-"
+        ep = Move.colsToFiles[self.enPassantPossible[1]] + Move.rowsToRanks[self.enPassantPossible[0]] if self.enPassantPossible else "-"
+        return "/".join(ranks) + " " + ("w" if self.whiteToMove else "b") + " " + castling + " " + ep + \
+               " " + str(self.halfmoveClock) + " " + str((self.startPly + len(self.moveLog)) // 2 + 1)
 
     def makeMove(self, move):
         # Osiguraj da je argument zaista objekat klase Move
         assert isinstance(move, Move), "Expected a Move object"
-        
+        board = self.board
+        startRow, startCol, endRow, endCol = move.startRow, move.startCol, move.endRow, move.endCol
+        pieceMoved, pieceCaptured = move.pieceMoved, move.pieceCaptured
+        capturedCode = PIECE_CODES[pieceCaptured]
+
+        # Zapamti nepovratno stanje (prije poteza) na undo stacku; stack se udvostručuje kad se napuni
+        ply = self.undoPly
+        if ply == len(self.undoStack):
+            self.undoStack.extend([0] * ply)
+            self.hashStack.extend([0] * ply)
+            self.pawnHashStack.extend([0] * ply)
+            self.evalStack.extend([None] * ply)
+            self.accumulatorStack.extend([None] * ply)
+        ep = self.enPassantPossible
+        self.undoStack[ply] = (capturedCode | (self.castlingRights << 4) |
+                               ((ep[0] * 8 + ep[1] + 1 if ep else 0) << 8) | (self.halfmoveClock << 15))
+        self.hashStack[ply] = h = self.zobristHash
+        self.pawnHashStack[ply] = self.pawnHash
+        self.evalStack[ply] = (self.mgScore, self.egScore, self.phase, self.pieceCount)
+        self.undoPly = ply + 1
+        startSq = startRow * 8 + startCol
+        endSq = endRow * 8 + endCol
+        movedCode = PIECE_CODES[pieceMoved]
+        mg = self.mgScore - PSQT_MG[movedCode][startSq]
+        eg = self.egScore - PSQT_EG[movedCode][startSq]
+
         # Postavi početno polje na prazno
-        self.board[move.startRow][move.startCol] = "--"
-        
-        # Postavi krajnje polje na figuru koja se pomjera
-        self.board[move.endRow][move.endCol] = move.pieceMoved
+        board[startRow][startCol] = "--"
+        h ^= ZOBRIST_PIECES[movedCode][startSq] ^ ZOBRIST_BLACK_TO_MOVE
+
+        # Ukloni pojedenu figuru iz hasha (kod en passant-a ona nije na krajnjem polju)
+        if capturedCode:
+            capturedSq = startRow * 8 + endCol if move.isEnpassantMove else endSq
+            capturedKey = ZOBRIST_PIECES[capturedCode][capturedSq]
+            h ^= capturedKey
+            mg -= PSQT_MG[capturedCode][capturedSq]
+            eg -= PSQT_EG[capturedCode][capturedSq]
+            self.phase -= PHASE[capturedCode]
+            self.pieceCount -= 1
+            if capturedCode in PAWN_CODES:
+                self.pawnHash ^= capturedKey
+
+        # Pješački ključ: pješak napušta početno polje i dolazi na krajnje (osim kod promocije)
+        if movedCode in PAWN_CODES:
+            pawnKeys = ZOBRIST_PIECES[movedCode]
+            self.pawnHash ^= pawnKeys[startSq]
+            if not move.isPawnPromotion:
+                self.pawnHash ^= pawnKeys[endSq]
 
         # Ako je potez promocija pješaka
         if move.isPawnPromotion:
             promotedColor = "white" if self.whiteToMove else "black"
-            self.board[move.endRow][move.endCol] = promotedColor + " " + move.promotionPiece
+            placed = promotedColor + " " + move.promotionPiece
         else:
-            self.board[move.endRow][move.endCol] = move.pieceMoved
+            # Postavi krajnje polje na figuru koja se pomjera
+            placed = pieceMoved
+        board[endRow][endCol] = placed
+        placedCode = PIECE_CODES[placed]
+        h ^= ZOBRIST_PIECES[placedCode][endSq]
+        mg += PSQT_MG[placedCode][endSq]
+        eg += PSQT_EG[placedCode][endSq]
+        if placedCode != movedCode:
+            self.phase += PHASE[placedCode] - PHASE[movedCode]
 
         # Dodaj ovaj potez u listu odigranih poteza
         self.moveLog.append(move)
@@ -71,47 +307,99 @@ class GameState():
         self.whiteToMove = not self.whiteToMove
 
         # Ažuriraj poziciju kralja ako se on pomjera
-        if move.pieceMoved == "white king":
-            self.whiteKingLocation = (move.endRow, move.endCol)
-        elif move.pieceMoved == "black king":
-            self.blackKingLocation = (move.endRow, move.endCol)
+        if pieceMoved == "white king":
+            self.whiteKingLocation = (endRow, endCol)
+        elif pieceMoved == "black king":
+            self.blackKingLocation = (endRow, endCol)
 
         # En passant potez — uklanja pješaka koji je pojedene en passant
         if move.isEnpassantMove:
-            self.board[move.startRow][move.endCol] = "--"
+            board[startRow][endCol] = "--"
 
         # Ako je pješak pomjeren za dva polja unaprijed, postavi mogućnost en passant
-        if move.pieceMoved.split()[1] == 'pawn' and abs(move.startRow - move.endRow) == 2:
-            self.enPassantPossible = ((move.startRow + move.endRow) // 2, move.startCol)
+        if ep:
+            h ^= ZOBRIST_EN_PASSANT[ep[1]]
+        isPawnMove = pieceMoved.endswith("pawn")
+        if isPawnMove and abs(startRow - endRow) == 2:
+            self.enPassantPossible = ((startRow + endRow) // 2, startCol)
+            h ^= ZOBRIST_EN_PASSANT[startCol]
         else:
             self.enPassantPossible = ()
 
         # Ako je potez rošada
         if move.isCastleMove:
-            if move.endCol - move.startCol == 2:  # kingside rošada
-                self.board[move.endRow][move.endCol - 1] = self.board[move.endRow][7]  # premještanje topa
-                self.board[move.endRow][7] = "--"
+            if endCol - startCol == 2:  # kingside rošada
+                rookFrom, rookTo = 7, endCol - 1
             else:  # queenside rošada
-                self.board[move.endRow][move.endCol + 1] = self.board[move.endRow][0]
-                self.board[move.endRow][0] = "--"
+                rookFrom, rookTo = 0, endCol + 1
+            rook = board[endRow][rookFrom]
+            board[endRow][rookTo] = rook  # premještanje topa
+            board[endRow][rookFrom] = "--"
+            rookCode = PIECE_CODES[rook]
+            rookKeys = ZOBRIST_PIECES[rookCode]
+            h ^= rookKeys[endRow * 8 + rookFrom] ^ rookKeys[endRow * 8 + rookTo]
+            mg += PSQT_MG[rookCode][endRow * 8 + rookTo] - PSQT_MG[rookCode][endRow * 8 + rookFrom]
+            eg += PSQT_EG[rookCode][endRow * 8 + rookTo] - PSQT_EG[rookCode][endRow * 8 + rookFrom]
 
         # Ažuriraj prava na rošadu
+        oldRights = self.castlingRights
         self.updateCastleRights(move)
-        self.castleRightsLog.append(CastleRights(self.currentCastlingRights.wks, self.currentCastlingRights.wqs,
-                                         self.currentCastlingRights.bks, self.currentCastlingRights.bqs))
+        if self.castlingRights != oldRights:
+            h ^= ZOBRIST_CASTLE[oldRights] ^ ZOBRIST_CASTLE[self.castlingRights]
 
+        # Pravilo 50 poteza: brojač se resetuje na potez pješakom ili uzimanje
+        if isPawnMove or capturedCode:
+            self.halfmoveClock = 0
+        else:
+            self.halfmoveClock += 1
+
+        self.zobristHash = h
+        self.mgScore, self.egScore = mg, eg
+        self.positionCounts[h] = self.positionCounts.get(h, 0) + 1
+
+        # Akumulator neuronske evaluacije: samo polja koja su se promijenila
+        if self.nnue is not None:
+            self.accumulatorStack[ply] = self.accumulator
+            removed = [(movedCode, startSq)]
+            added = [(placedCode, endSq)]
+            if capturedCode:
+                removed.append((capturedCode, capturedSq))
+            if move.isCastleMove:
+                removed.append((rookCode, endRow * 8 + rookFrom))
+                added.append((rookCode, endRow * 8 + rookTo))
+            self.accumulator = self.nnue.update(self.accumulator, removed, added)
 
     def undoMove(self):
         # Vraća zadnji potez ako postoji i poništava ga
         if len(self.moveLog) != 0:
             move = self.moveLog.pop()
             assert isinstance(move, Move), f"Očekivan Move objekat, dobio: {type(move)}"
+            board = self.board
+
+            # Pozicija nakon poteza se briše iz historije ponavljanja
+            count = self.positionCounts[self.zobristHash] - 1
+            if count:
+                self.positionCounts[self.zobristHash] = count
+            else:
+                del self.positionCounts[self.zobristHash]
+
+            # Vrati nepovratno stanje (prava rošade, en passant, halfmove clock, hash) sa undo stacka
+            ply = self.undoPly - 1
+            self.undoPly = ply
+            record = self.undoStack[ply]
+            self.zobristHash = self.hashStack[ply]
+            self.pawnHash = self.pawnHashStack[ply]
+            self.mgScore, self.egScore, self.phase, self.pieceCount = self.evalStack[ply]
+            self.castlingRights = (record >> 4) & 15
+            self.enPassantPossible = EN_PASSANT_SQUARES[(record >> 8) & 127]
+            self.halfmoveClock = record >> 15
+            captured = PIECE_NAMES[record & 15]
 
             # Vrati figuru na početnu poziciju
-            self.board[move.startRow][move.startCol] = move.pieceMoved
+            board[move.startRow][move.startCol] = move.pieceMoved
 
             # Vrati figuru koja je bila pojedena (ili "--" ako nije bilo uzimanja)
-            self.board[move.endRow][move.endCol] = move.pieceCaptured
+            board[move.endRow][move.endCol] = captured
 
             # Promijeni čiji je red na potez
             self.whiteToMove = not self.whiteToMove
@@ -124,42 +412,140 @@ class GameState():
 
             # Ako je potez bio en passant
             if move.isEnpassantMove:
-                self.board[move.endRow][move.endCol] = "--"  # ukloni "lažnu" figuru
-                self.board[move.startRow][move.endCol] = move.pieceCaptured  # vrati pješaka koji je bio pojeden en passant
-
-            # Poništi zadnja prava na rošadu (vrati na stanje prije tog poteza)
-            self.castleRightsLog.pop()
-            self.currentCastlingRights = self.castleRightsLog[-1]
+                board[move.endRow][move.endCol] = "--"  # ukloni "lažnu" figuru
+                board[move.startRow][move.endCol] = captured  # vrati pješaka koji je bio pojeden en passant
 
             # Ako je potez bio rošada, vrati topa na originalnu poziciju
             if move.isCastleMove:
                 if move.endCol - move.startCol == 2:  # kingside rošada
-                    self.board[move.endRow][move.endCol + 1] = self.board[move.endRow][move.endCol - 1]
-                    self.board[move.endRow][move.endCol - 1] = "--"
+                    board[move.endRow][move.endCol + 1] = board[move.endRow][move.endCol - 1]
+                    board[move.endRow][move.endCol - 1] = "--"
                 else:  # queenside rošada
-                    self.board[move.endRow][move.endCol - 2] = self.board[move.endRow][move.endCol + 1]
-                    self.board[move.endRow][move.endCol + 1] = "--"
+                    board[move.endRow][move.endCol - 2] = board[move.endRow][move.endCol + 1]
+                    board[move.endRow][move.endCol + 1] = "--"
+
+            # Akumulator sa steka; ako je mreža priključena tek nakon ovog poteza, računa se od nule
+            if self.nnue is not None:
+                accumulator = self.accumulatorStack[ply]
+                self.accumulator = accumulator if accumulator is not None else self.nnue.refresh(self)
+
+    # Null potez: igrač na potezu "preskače" potez (koristi se za null-move pruning u pretrazi)
+    def makeNullMove(self):
+        ply = self.undoPly
+        if ply == len(self.undoStack):
+            self.undoStack.extend([0] * ply)
+            self.hashStack.extend([0] * ply)
+            self.pawnHashStack.extend([0] * ply)
+            self.evalStack.extend([None] * ply)
+            self.accumulatorStack.extend([None] * ply)
+        ep = self.enPassantPossible
+        self.undoStack[ply] = (self.castlingRights << 4) | ((ep[0] * 8 + ep[1] + 1 if ep else 0) << 8) | (self.halfmoveClock << 15)
+        self.hashStack[ply] = self.zobristHash
+        self.undoPly = ply + 1
+        if ep:
+            self.zobristHash ^= ZOBRIST_EN_PASSANT[ep[1]]
+            self.enPassantPossible = ()
+        self.zobristHash ^= ZOBRIST_BLACK_TO_MOVE
+        self.whiteToMove = not self.whiteToMove
+
+    def undoNullMove(self):
+        ply = self.undoPly - 1
+        self.undoPly = ply
+        record = self.undoStack[ply]
+        self.zobristHash = self.hashStack[ply]
+        self.enPassantPossible = EN_PASSANT_SQUARES[(record >> 8) & 127]
+        self.whiteToMove = not self.whiteToMove
+
+    # Standardna algebarska notacija (SAN) poteza u trenutnoj poziciji, npr. "Nbd2", "exd5", "O-O", "e8=Q+"
+    def moveToSan(self, move, validMoves=None, withSuffix=True):
+        if move.isCastleMove:
+            san = "O-O" if move.endCol > move.startCol else "O-O-O"
+        else:
+            pieceType = move.pieceMoved.split()[1]
+            dest = move.getRankFile(move.endRow, move.endCol)
+            capture = move.pieceCaptured != "--"
+            if pieceType == "pawn":
+                san = (move.colsToFiles[move.startCol] + "x" if capture else "") + dest
+                if move.isPawnPromotion:
+                    san += "=" + PIECE_TO_FEN["white " + move.promotionPiece]
+            else:
+                if validMoves is None:
+                    validMoves = self.getValidMoves() or []
+                # Razlikovanje kad ista vrsta figure može doći na isto polje
+                rivals = [m for m in validMoves if m.pieceMoved == move.pieceMoved and m.endRow == move.endRow
+                          and m.endCol == move.endCol and (m.startRow, m.startCol) != (move.startRow, move.startCol)]
+                disambiguation = ""
+                if rivals:
+                    if all(m.startCol != move.startCol for m in rivals):
+                        disambiguation = move.colsToFiles[move.startCol]
+                    elif all(m.startRow != move.startRow for m in rivals):
+                        disambiguation = move.rowsToRanks[move.startRow]
+                    else:
+                        disambiguation = move.getRankFile(move.startRow, move.startCol)
+                san = PIECE_TO_FEN["white " + pieceType] + disambiguation + ("x" if capture else "") + dest
+        if withSuffix:
+            # Zastavice trenutne pozicije se čuvaju jer ih getValidMoves u novoj poziciji prepisuje
+            saved = (self.inCheck, self.pins, self.checks, self.checkmate, self.stalemate)
+            self.makeMove(move)
+            self.getValidMoves()
+            if self.checkmate:
+                san += "#"
+            elif self.inCheck:
+                san += "+"
+            self.undoMove()
+            self.inCheck, self.pins, self.checks, self.checkmate, self.stalemate = saved
+        return san
+
+    # Pronalazi legalan potez za dati SAN zapis (sufiksi +, #, !, ? se zanemaruju); None ako ne postoji
+    def sanToMove(self, san, validMoves=None):
+        san = san.rstrip("+#!?").replace("0-0-0", "O-O-O").replace("0-0", "O-O")
+        if validMoves is None:
+            validMoves = self.getValidMoves() or []
+        for move in validMoves:
+            if self.moveToSan(move, validMoves, withSuffix=False) == san:
+                return move
+        return None
+
+    # Remi ponavljanjem: trenutna pozicija se pojavila najmanje `times` puta
+    def isRepetition(self, times=3):
+        return self.positionCounts.get(self.zobristHash, 0) >= times
+
+    # Remi po pravilu 50 poteza (100 polupoteza bez poteza pješakom ili uzimanja)
+    def isFiftyMoveRule(self):
+        return self.halfmoveClock >= 100
+
+    # Nedovoljan materijal za mat: K-K, K+skakač-K, K+lovac-K i lovci iste boje polja
+    def isInsufficientMaterial(self):
+        minors = []
+        for r in range(8):
+            for c in range(8):
+                piece = self.board[r][c]
+                if piece == "--" or piece.endswith("king"):
+                    continue
+                if piece.endswith("pawn") or piece.endswith("rook") or piece.endswith("queen") or len(minors) == 2:
+                    return False
+                minors.append((piece, (r + c) % 2))
+        if len(minors) < 2:
+            return True
+        (first, firstColor), (second, secondColor) = minors
+        return first.endswith("bishop") and second.endswith("bishop") and firstColor == secondColor
+
+    # Razlog remija (ponavljanje, 50 poteza, nedovoljan materijal) ili None; pat se prati zastavicom stalemate
+    def drawReason(self):
+        if self.isRepetition():
+            return "threefold repetition"
+        if self.isFiftyMoveRule():
+            return "fifty-move rule"
+        if self.isInsufficientMaterial():
+            return "insufficient material"
+        return None
+
+    def isDraw(self):
+        return self.drawReason() is not None
 
     def updateCastleRights(self, move):
-        # Ažurira prava na rošadu ako se kralj ili top pomjerio (ili bio pojedene)
-        if move.pieceMoved == "white king":
-            self.currentCastlingRights.wks = False
-            self.currentCastlingRights.wqs = False
-        elif move.pieceMoved == "black king":
-            self.currentCastlingRights.bks = False
-            self.currentCastlingRights.bqs = False
-        elif move.pieceMoved == "white rook":
-            if move.startRow == 7:
-                if move.startCol == 0:
-                    self.currentCastlingRights.wqs = False  # queenside top
-                elif move.startCol == 7:
-                    self.currentCastlingRights.wks = False  # kingside top
-        elif move.pieceMoved == "black rook":
-            if move.startRow == 0:
-                if move.startCol == 0:
-                    self.currentCastlingRights.bqs = False
-                elif move.startCol == 7:
-                    self.currentCastlingRights.bks = False
+        # Ažurira prava na rošadu ako se kralj ili top pomjerio (ili bio pojeden na svom polju)
+        self.castlingRights &= CASTLE_MASK[move.startRow * 8 + move.startCol] & CASTLE_MASK[move.endRow * 8 + move.endCol]
 
     # Glavna funkcija koja vraća sve validne poteze (koji ne izlažu kralja šahu)
     def getValidMoves(self):
@@ -520,9 +906,9 @@ class GameState():
     def getCastleMoves(self, r, c, moves, allyColor):
         if self.inCheck:
             return  #Rokada nije dozvoljena ako je kralj trenutno pod šahom
-        if (self.whiteToMove and self.currentCastlingRights.wks) or (not self.whiteToMove and self.currentCastlingRights.bks):
+        if self.castlingRights & (CASTLE_WKS if self.whiteToMove else CASTLE_BKS):
             self.getKingsideCastleMoves(r, c, moves, allyColor)
-        if (self.whiteToMove and self.currentCastlingRights.wqs) or (not self.whiteToMove and self.currentCastlingRights.bqs):
+        if self.castlingRights & (CASTLE_WQS if self.whiteToMove else CASTLE_BQS):
             self.getQueensideCastleMoves(r, c, moves, allyColor)
 
     # Rokada na kraljevoj strani (short castling)
@@ -530,12 +916,8 @@ class GameState():
         # Provjerava da li su polja između kralja i topa prazna
         if self.board[r][c + 1] == "--" and self.board[r][c + 2] == "--":
             # Provjera da li ta polja nisu pod napadom, ignoring castling during check
-            prev_castle_rights = self.currentCastlingRights
-            try:
-                if not self._isSquareUnderAttackNoCastle(r, c + 1) and not self._isSquareUnderAttackNoCastle(r, c + 2):
-                    moves.append(Move((r, c), (r, c + 2), self.board, isCastleMove=True))
-            finally:
-                self.currentCastlingRights = prev_castle_rights  # Restore state if needed
+            if not self._isSquareUnderAttackNoCastle(r, c + 1) and not self._isSquareUnderAttackNoCastle(r, c + 2):
+                moves.append(Move((r, c), (r, c + 2), self.board, isCastleMove=True))
 
     def getQueensideCastleMoves(self, r, c, moves, allyColor):
         if self.board[r][c - 1] == "--" and self.board[r][c - 2] == "--" and self.board[r][c - 3] == "--":
@@ -556,13 +938,6 @@ class GameState():
         filteredMoves = [m for m in oppMoves if not getattr(m, "isCastleMove", False)]
         return any(move.endRow == r and move.endCol == c for move in filteredMoves)
 
-class CastleRights:
-    def __init__(self, wks, wqs, bks, bqs):
-        self.wks = wks  # Bijela rokada desno (king side)
-        self.wqs = wqs  # Bijela rokada lijevo (queen side)
-        self.bks = bks  # Crna rokada desno
-        self.bqs = bqs  # Crna rokada lijevo
-
 class Move():
     # Mape između oznaka na tabli (rank/file) i indeksa liste
 
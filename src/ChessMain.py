@@ -1,92 +1,145 @@
-import random
-import pygame as p
-import tkinter as tk
-from tkinter import messagebox
 import os
-from concurrent.futures import ThreadPoolExecutor
+import random
+import time
 
 import ChessEngine
 from OpeningBook import OPENINGS
-from monte_carlo_ai import parallel_mcts
+
+# pygame, tkinter, engine proces i baza partija se uvoze tek u main(), pa uvoz ovog modula
+# (npr. zbog konstanti ili BoardRenderer-a) ne učitava ništa od GUI-ja ni engine procesa
+p = None
 
 # Constants
 WIDTH = HEIGHT = 720
 DIMENSION = 8
 SQ_SIZE = HEIGHT // DIMENSION
 MAX_FPS = 60
+AI_POLL_MS = 50  # koliko često se provjerava da li je AI završio dok korisnik ne radi ništa
+AI_ENGINE = "parallel_mcts"
+AI_LIMITS = {"iterations": 300, "workers": 4}
+SPRITE_CACHE_DIR = "cache"
+PIECES = [
+    'white rook', 'white knight', 'white bishop', 'white queen', 'white king', 'white pawn',
+    'black rook', 'black knight', 'black bishop', 'black queen', 'black king', 'black pawn'
+]
 IMAGES = {}
 
-executor = ThreadPoolExecutor(max_workers=1)
-
+# Figure se uzimaju iz atlasa već skaliranih sprite-ova (cache/sprites_<veličina polja>.png).
+# Atlas se pravi iz images/*.png samo pri prvom pokretanju za datu veličinu table ili kad se neka slika promijeni.
 def loadImages():
-    pieces = [
-        'white rook', 'white knight', 'white bishop', 'white queen', 'white king', 'white pawn',
-        'black rook', 'black knight', 'black bishop', 'black queen', 'black king', 'black pawn'
-    ]
-    for piece in pieces:
-        IMAGES[piece] = p.transform.scale(
-            p.image.load("images/" + piece + ".png"), (SQ_SIZE, SQ_SIZE)
-        )
-
-def get_next_log_filename(log_dir="log", base_name="game", extension=".txt"):
-    if not os.path.exists(log_dir):
-        os.makedirs(log_dir)
-    index = 1
-    while f"{base_name}{index}{extension}" in os.listdir(log_dir):
-        index += 1
-    return os.path.join(log_dir, f"{base_name}{index}{extension}")
-
-def drawBoard(screen):
-    colors = [p.Color("white"), p.Color("brown")]
-    for r in range(DIMENSION):
-        for c in range(DIMENSION):
-            color = colors[(r + c) % 2]
-            p.draw.rect(screen, color, p.Rect(c * SQ_SIZE, r * SQ_SIZE, SQ_SIZE, SQ_SIZE))
-
-def drawPieces(screen, board):
-    for r in range(DIMENSION):
-        for c in range(DIMENSION):
-            piece = board[r][c]
-            if piece != "--":
-                screen.blit(IMAGES[piece], p.Rect(c * SQ_SIZE, r * SQ_SIZE, SQ_SIZE, SQ_SIZE))
-
-def highlightSquare(screen, gs, sqSelected):
-    if sqSelected:
-        r, c = sqSelected
-        if gs.board[r][c] != '--' and ((gs.whiteToMove and gs.board[r][c].startswith('white')) or
-                                       (not gs.whiteToMove and gs.board[r][c].startswith('black'))):
+    atlasPath = os.path.join(SPRITE_CACHE_DIR, f"sprites_{SQ_SIZE}.png")
+    sources = ["images/" + piece + ".png" for piece in PIECES]
+    if os.path.exists(atlasPath) and os.path.getmtime(atlasPath) >= max(os.path.getmtime(s) for s in sources):
+        atlas = p.image.load(atlasPath).convert_alpha()
+    else:
+        atlas = p.Surface((SQ_SIZE * len(PIECES), SQ_SIZE), p.SRCALPHA)
+        for i, source in enumerate(sources):
+            atlas.blit(p.transform.scale(p.image.load(source), (SQ_SIZE, SQ_SIZE)), (i * SQ_SIZE, 0))
+        os.makedirs(SPRITE_CACHE_DIR, exist_ok=True)
+        p.image.save(atlas, atlasPath)
+        atlas = atlas.convert_alpha()
+    for i, piece in enumerate(PIECES):
+        IMAGES[piece] = atlas.subsurface(p.Rect(i * SQ_SIZE, 0, SQ_SIZE, SQ_SIZE))
+
+def showGameOver(text):
+    import tkinter as tk
+    from tkinter import messagebox
+    tk.Tk().withdraw()
+    messagebox.showinfo("Game Over", text)
+
+def save_game(store, gs, playerOne, playerTwo):
+    from game_store import resultOf
+    if gs.moveLog:
+        headers = {
+            "Event": "Chess AI",
+            "Date": time.strftime("%Y.%m.%d"),
+            "White": "Human" if playerOne else "MCTS",
+            "Black": "Human" if playerTwo else "MCTS",
+        }
+        store.append(gs.moveLog, resultOf(gs), headers)
+    store.close()
+
+# Renderer sa unaprijed iscrtanom tablom i keširanim overlay površinama.
+# Pamti šta je zadnje nacrtano na svakom polju i ponovo crta samo polja koja su se promijenila.
+class BoardRenderer:
+    def __init__(self):
+        self.boardSurface = p.Surface((WIDTH, HEIGHT))
+        colors = [p.Color("white"), p.Color("brown")]
+        for r in range(DIMENSION):
+            for c in range(DIMENSION):
+                p.draw.rect(self.boardSurface, colors[(r + c) % 2], p.Rect(c * SQ_SIZE, r * SQ_SIZE, SQ_SIZE, SQ_SIZE))
+
+        self.overlays = {}
+        for name in ("blue", "yellow", "darkred"):
             s = p.Surface((SQ_SIZE, SQ_SIZE))
             s.set_alpha(100)
-            s.fill(p.Color('blue'))
-            screen.blit(s, (c * SQ_SIZE, r * SQ_SIZE))
-
-def highlightKing(screen, gs):
-    king_pos = gs.whiteKingLocation if gs.whiteToMove else gs.blackKingLocation
-    if gs.checkmate:
-        color = p.Color("darkred")
-    elif gs.inCheck:
-        color = p.Color("yellow")
-    else:
-        return
-    s = p.Surface((SQ_SIZE, SQ_SIZE))
-    s.set_alpha(100)
-    s.fill(color)
-    screen.blit(s, (king_pos[1] * SQ_SIZE, king_pos[0] * SQ_SIZE))
-
-def drawGameState(screen, gs, sqSelected):
-    drawBoard(screen)
-    highlightSquare(screen, gs, sqSelected)
-    drawPieces(screen, gs.board)
-    highlightKing(screen, gs)
+            s.fill(p.Color(name))
+            self.overlays[name] = s
+
+        self.drawn = {}  # (red, kolona) -> (figura, overlay) zadnje nacrtano stanje
+
+    # Željeno stanje svih polja: figura i eventualni overlay (odabrano polje ili kralj u šahu/matu)
+    def squareStates(self, gs, sqSelected):
+        states = {(r, c): (gs.board[r][c], None) for r in range(DIMENSION) for c in range(DIMENSION)}
+        if sqSelected:
+            r, c = sqSelected
+            if gs.board[r][c] != '--' and gs.board[r][c].startswith('white' if gs.whiteToMove else 'black'):
+                states[(r, c)] = (gs.board[r][c], "blue")
+        if gs.checkmate or gs.inCheck:
+            king = gs.whiteKingLocation if gs.whiteToMove else gs.blackKingLocation
+            states[tuple(king)] = (gs.board[king[0]][king[1]], "darkred" if gs.checkmate else "yellow")
+        return states
+
+    # Crta promijenjena polja (ili cijelu tablu) i vraća listu pravougaonika za p.display.update
+    def draw(self, screen, gs, sqSelected, full=False):
+        if full:
+            self.drawn = {}
+        dirty = []
+        for (r, c), state in self.squareStates(gs, sqSelected).items():
+            if self.drawn.get((r, c)) == state:
+                continue
+            piece, overlay = state
+            rect = p.Rect(c * SQ_SIZE, r * SQ_SIZE, SQ_SIZE, SQ_SIZE)
+            screen.blit(self.boardSurface, rect, rect)
+            # Odabrano polje se boji ispod figure, a kralj u šahu preko nje
+            if overlay == "blue":
+                screen.blit(self.overlays[overlay], rect)
+            if piece != "--":
+                screen.blit(IMAGES[piece], rect)
+            if overlay in ("yellow", "darkred"):
+                screen.blit(self.overlays[overlay], rect)
+            self.drawn[(r, c)] = state
+            dirty.append(rect)
+        return dirty
+
+# Čeka događaje umjesto stalnog vrtenja petlje: timeout None blokira do prvog događaja,
+# 0 samo pokupi postojeće, a broj milisekundi čeka najviše toliko (npr. dok AI razmišlja)
+def waitForEvents(timeout):
+    if timeout == 0:
+        return p.event.get()
+    event = p.event.wait() if timeout is None else p.event.wait(timeout)
+    events = [event] if event.type != p.NOEVENT else []
+    return events + p.event.get()
 
 def main():
+    global p
+    import pygame as p
+    from engine_process import EngineClient
+    from game_store import GameStore
+
+    # Engine radi u zasebnom procesu (pokreće se prije pygame-a); aiRequest je id zahtjeva čiji se rezultat čeka
+    engine = EngineClient()
+
     p.init()
     screen = p.display.set_mode((WIDTH, HEIGHT))
+    p.display.set_caption("Chess")
     clock = p.time.Clock()
     screen.fill(p.Color("white"))
+    renderer = BoardRenderer()
+    fullRedraw = True
 
     gs = ChessEngine.GameState()
-    log_file = open(get_next_log_filename(), "w")
+    game_store = GameStore()
 
     validMoves = gs.getValidMoves()
     moveMade = False
@@ -97,7 +150,9 @@ def main():
 
     aiThinking = False
     aiMove = None
-    aiFuture = None
+    aiRequest = None
+    # Greška engine-a ili odgovor bez poteza: novi zahtjev se ne šalje dok igrač ne vrati potez (z)
+    engineFailed = False
 
     loadImages()
     running = True
@@ -109,10 +164,22 @@ def main():
     while running:
         humanTurn = (gs.whiteToMove and playerOne) or (not gs.whiteToMove and playerTwo)
 
-        for e in p.event.get():
+        if fullRedraw:
+            timeout = 0
+        elif aiThinking:
+            timeout = AI_POLL_MS
+        elif humanTurn:
+            timeout = None
+        else:
+            timeout = 0
+
+        for e in waitForEvents(timeout):
             if e.type == p.QUIT:
                 running = False
 
+            elif e.type in (p.VIDEOEXPOSE, p.WINDOWEXPOSED):
+                fullRedraw = True
+
             elif e.type == p.MOUSEBUTTONDOWN and humanTurn:
                 loc = p.mouse.get_pos()
                 col, row = loc[0] // SQ_SIZE, loc[1] // SQ_SIZE
@@ -128,7 +195,6 @@ def main():
                     if (gs.whiteToMove and piece.startswith('white')) or (not gs.whiteToMove and piece.startswith('black')):
                         if move in validMoves:
                             gs.makeMove(move)
-                            log_file.write(move.getChessNotation() + "\n")
                             moveMade = True
 
                             # ✅ Advance book tracking
@@ -149,9 +215,13 @@ def main():
                 gs.undoMove()
                 validMoves = gs.getValidMoves()
                 moveMade = False
+                if aiThinking:
+                    engine.stop(aiRequest)
                 aiThinking = False
                 aiMove = None
-                aiFuture = None
+                aiRequest = None
+                engineFailed = False
+                p.display.set_caption("Chess")
                 book_line = None
                 book_index = 0
                 book_attempted = False
@@ -165,14 +235,13 @@ def main():
                 print(f"[📘 Opening] Using book line: {' '.join(book_line)}")
             book_attempted = True
 
-        if not humanTurn and not aiThinking:
+        if not humanTurn and not aiThinking and not engineFailed:
             if book_line and book_index < len(book_line):
                 expected = book_line[book_index]
                 for move in validMoves:
                     if move.getChessNotation() == expected:
                         print(f"[📘 Book Move] {expected}")
                         gs.makeMove(move)
-                        log_file.write(move.getChessNotation() + "\n")
                         moveMade = True
                         book_index += 1
                         if book_index >= len(book_line):
@@ -182,35 +251,57 @@ def main():
                     print("[📘 Book deviation] Falling back to AI.")
                     book_line = None
             else:
-                print("Submitting AI move to background thread...")
+                print("Submitting AI move to engine process...")
                 aiThinking = True
-                aiFuture = executor.submit(parallel_mcts, gs, iterations=300, max_workers=4)
+                aiRequest = engine.search(gs, engine=AI_ENGINE, **AI_LIMITS)
 
-        if aiThinking and aiFuture and aiFuture.done():
-            aiMove = aiFuture.result()
+        # Poruke od engine-a; rezultati zahtjeva koji su u međuvremenu otkazani (undo) se ignorišu
+        for message in engine.poll():
+            if message["id"] != aiRequest or message["type"] == "info":
+                continue
+            aiMove = next((m for m in validMoves if m.getChessNotation() == message.get("move")), None)
             if aiMove:
                 print("AI chose:", aiMove.getChessNotation())
                 gs.makeMove(aiMove)
-                log_file.write(aiMove.getChessNotation() + "\n")
                 moveMade = True
+            else:
+                error = message["message"] if message["type"] == "error" else "no move returned"
+                print("[!] Engine error:", error)
+                p.display.set_caption(f"Chess - engine error: {error} (press z to undo)")
+                engineFailed = True
             aiThinking = False
-            aiFuture = None
+            aiRequest = None
 
         if moveMade:
             validMoves = gs.getValidMoves()
             moveMade = False
 
-        drawGameState(screen, gs, sqSelected)
+        dirty = renderer.draw(screen, gs, sqSelected, fullRedraw)
+        if fullRedraw:
+            p.display.flip()
+        elif dirty:
+            p.display.update(dirty)
+        fullRedraw = False
 
         if gs.checkmate:
             winner = "Black" if gs.whiteToMove else "White"
-            tk.Tk().withdraw()
-            messagebox.showinfo("Game Over", f"{winner} wins by checkmate.")
-            log_file.close()
+            showGameOver(f"{winner} wins by checkmate.")
+            save_game(game_store, gs, playerOne, playerTwo)
+            engine.close()
             p.quit()
+            return
+        elif gs.stalemate or gs.isDraw():
+            reason = "stalemate" if gs.stalemate else gs.drawReason()
+            showGameOver(f"Draw by {reason}.")
+            save_game(game_store, gs, playerOne, playerTwo)
+            engine.close()
+            p.quit()
+            return
 
         clock.tick(MAX_FPS)
-        p.display.flip()
+
+    save_game(game_store, gs, playerOne, playerTwo)
+    engine.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
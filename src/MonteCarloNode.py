@@ -4,15 +4,29 @@ import random
 import math
 import time
 
+import bitbase
+import mate_solver
+from search_stats import SearchStats
+
+last_search_stats = None  # SearchStats of the most recent mcts call
+
+# Nodes keep no position of their own: the search walks down from its private copy of the root with
+# makeMove and back up with undoMove, so the caller's GameState is never touched.
+# wins/visits are from the point of view of the side that moved into the node.
 class MCTSNode:
     def __init__(self, game_state, parent=None, move=None):
-        self.game_state = game_state
         self.parent = parent
         self.move = move
         self.children = []
         self.wins = 0
         self.visits = 0
-        self.untried_moves = game_state.getValidMoves()
+        self.white_to_move = game_state.whiteToMove
+        self.untried_moves = game_state.getValidMoves() or []  # None on checkmate/stalemate
+        # Result from white's point of view when the game is over at this node, else None
+        if self.untried_moves:
+            self.terminal_value = None
+        else:
+            self.terminal_value = 0.5 if game_state.stalemate else (0 if game_state.whiteToMove else 1)
 
     def is_fully_expanded(self):
         return len(self.untried_moves) == 0
@@ -23,61 +37,124 @@ class MCTSNode:
             key=lambda child: (child.wins / child.visits) + c_param * math.sqrt(math.log(self.visits) / child.visits)
         )
 
-    def is_terminal_node(self):
-        return self.game_state.checkmate or self.game_state.stalemate
-
-    def expand(self):
+    # Plays an untried move on state (the position at this node) and adds its child
+    def expand(self, state):
         move = self.untried_moves.pop()
-        self.game_state.makeMove(move)
-        child_node = MCTSNode(self.game_state, self, move)
-        self.game_state.undoMove()
+        state.makeMove(move)
+        child_node = MCTSNode(state, self, move)
         self.children.append(child_node)
         return child_node
 
     def update(self, result):
+        # result is from white's point of view
         self.visits += 1
-        self.wins += result
+        self.wins += result if not self.white_to_move else 1 - result
 
 def simulate(game_state):
     temp_state = deepcopy_game_state(game_state)
-    while not (temp_state.checkmate or temp_state.stalemate):
+    plies = 0
+    while not (temp_state.checkmate or temp_state.stalemate or temp_state.isDraw()):
+        # Endgame bitbase positions end the rollout with their exact result
+        if temp_state.pieceCount <= bitbase.MAX_PIECES:
+            value = bitbase.probe(temp_state)
+            if value is not None:
+                return (value + 1) / 2, plies
         valid_moves = temp_state.getValidMoves()
         if not valid_moves:
             break
         move = random.choice(valid_moves)
         temp_state.makeMove(move)
+        plies += 1
     if temp_state.checkmate:
-        return 1 if not temp_state.whiteToMove else 0
-    return 0.5  # Stalemate or no moves = draw
+        return (1 if not temp_state.whiteToMove else 0), plies
+    return 0.5, plies  # Stalemate, repetition, fifty-move rule or insufficient material = draw
 
 def deepcopy_game_state(gs):
     import copy
     return copy.deepcopy(gs)
 
-def mcts(root_state, max_iterations=1000):
-    root_node = MCTSNode(root_state)
+# transpositions=True runs the same random-rollout search on monte_carlo_ai's hash-keyed graph,
+# where move orders that reach the same position share one node
+# mate_nodes runs mate_solver first with that node budget and plays a proven mate right away
+# (random rollouts rarely find a long forced mate on their own)
+def mcts(root_state, max_iterations=1000, time_limit=None, on_progress=None, transpositions=False, mate_nodes=None):
+    global last_search_stats
+    if mate_nodes:
+        mate = mate_solver.solve(root_state, mate_nodes)
+        if mate['result'] == mate_solver.MATE:
+            stats = SearchStats('uct')
+            stats.count('mateSolverNodes', mate['nodes'])
+            last_search_stats = stats.stop(mate['move'])
+            return mate['move']
+    if transpositions:
+        return mcts_transpositions(root_state, max_iterations, time_limit, on_progress)
+    stats = SearchStats('uct')
+    state = deepcopy_game_state(root_state)
+    root_node = MCTSNode(state)
+    deadline = time.time() + time_limit if time_limit is not None else None
 
     for _ in range(max_iterations):
+        if deadline is not None and root_node.children and time.time() >= deadline:
+            break
         node = root_node
-        state = deepcopy_game_state(root_state)
+        depth = 0
 
         # Selection
         while node.is_fully_expanded() and node.children:
             node = node.best_child()
             state.makeMove(node.move)
+            depth += 1
 
         # Expansion
         if node.untried_moves:
-            node = node.expand()
-            state.makeMove(node.move)
+            node = node.expand(state)
+            depth += 1
 
         # Simulation
-        result = simulate(state)
+        if node.terminal_value is not None:
+            result = node.terminal_value
+        else:
+            result, plies = simulate(state)
+            stats.count('rolloutPlies', plies)
+        stats.count('mctsIterations')
+        for _ in range(depth):
+            state.undoMove()
 
         # Backpropagation
         while node is not None:
             node.update(result)
             node = node.parent
 
+        if on_progress is not None and root_node.children:
+            if on_progress(stats.counters['mctsIterations'], max(root_node.children, key=lambda c: c.visits).move):
+                break  # on_progress returned True: stop requested
+
     best_child = max(root_node.children, key=lambda c: c.visits)
-    return best_child.move
\ No newline at end of file
+    stats.counters['treeSize'] = count_tree_nodes(root_node)
+    last_search_stats = stats.stop(best_child.move)
+    return best_child.move
+
+def count_tree_nodes(node):
+    return 1 + sum(count_tree_nodes(child) for child in node.children)
+
+def mcts_transpositions(root_state, max_iterations=1000, time_limit=None, on_progress=None):
+    global last_search_stats
+    from monte_carlo_ai import MCTSTree
+    stats = SearchStats('uct')
+    tree = MCTSTree(root_state, rollout=simulate)
+    deadline = time.time() + time_limit if time_limit is not None else None
+
+    for _ in range(max_iterations):
+        if deadline is not None and tree.root.children and time.time() >= deadline:
+            break
+        tree.iterate()
+        stats.count('mctsIterations')
+        if on_progress is not None and tree.root.children:
+            if on_progress(stats.counters['mctsIterations'], tree.best_move()):
+                break
+
+    best_move = tree.best_move()
+    stats.count('rolloutPlies', tree.rollout_plies)
+    tree.record_stats(stats)
+    last_search_stats = stats.stop(best_move)
+    return best_move
@@ -0,0 +1,90 @@
+"""
+Trajni keš analiza na disku, ključ je Zobrist hash pozicije.
+
+Fajl ima fiksnu veličinu i mapira se u memoriju (mmap). Iza zaglavlja slijede bucketi od po
+BUCKET_SLOTS zapisa fiksne dužine:
+    <QbBhHHI  hash, dubina, tip granice, skor, moveID najboljeg poteza, generacija, CRC32 prethodnih polja
+
+Bucket se bira iz donjih bitova hasha. Kad je bucket pun, izbacuje se zapis iz najstarije generacije
+(svako otvaranje keša je nova generacija), a među jednako starim onaj sa najmanjom dubinom, pa
+veličina fajla nikad ne raste. Više procesa može istovremeno čitati i pisati: zapis koji je drugi
+proces upravo prepisivao ne prolazi provjeru CRC-a i tretira se kao promašaj.
+"""
+
+import mmap
+import os
+import struct
+import zlib
+
+FILE_MAGIC = b"CHAC"
+HEADER = struct.Struct("<4sIIH")    # magic, verzija, broj bucketa, generacija
+HEADER_SIZE = 32
+RECORD = struct.Struct("<QbBhHHI")
+RECORD_DATA = struct.Struct("<QbBhHH")  # dio zapisa koji pokriva CRC
+BUCKET_SLOTS = 4
+VERSION = 1
+DEFAULT_ENTRIES = 1 << 20  # ~20 MB
+
+
+class AnalysisCache:
+    def __init__(self, path, entries=DEFAULT_ENTRIES):
+        exists = os.path.exists(path) and os.path.getsize(path) >= HEADER_SIZE
+        self.file = open(path, "r+b" if exists else "w+b")
+        if not exists:
+            buckets = 1
+            while buckets * BUCKET_SLOTS < entries:
+                buckets *= 2
+            self.file.truncate(HEADER_SIZE + buckets * BUCKET_SLOTS * RECORD.size)
+            self.file.write(HEADER.pack(FILE_MAGIC, VERSION, buckets, 0))
+            self.file.flush()
+        self.map = mmap.mmap(self.file.fileno(), 0)
+
+        magic, version, self.buckets, generation = HEADER.unpack_from(self.map)
+        if magic != FILE_MAGIC or version != VERSION:
+            raise ValueError(f"{path} nije keš analiza")
+        self.generation = (generation + 1) & 0xFFFF
+        HEADER.pack_into(self.map, 0, FILE_MAGIC, VERSION, self.buckets, self.generation)
+        self.hits = self.misses = self.stores = 0
+
+    def bucketOffset(self, key):
+        return HEADER_SIZE + (key & (self.buckets - 1)) * BUCKET_SLOTS * RECORD.size
+
+    # Vraća (dubina, skor, tip granice, moveID) ili None
+    def probe(self, key):
+        offset = self.bucketOffset(key)
+        for slot in range(BUCKET_SLOTS):
+            storedKey, depth, flag, score, moveID, generation, crc = RECORD.unpack_from(self.map, offset)
+            if storedKey == key and crc == zlib.crc32(self.map[offset:offset + RECORD_DATA.size]):
+                self.hits += 1
+                return depth, score, flag, moveID
+            offset += RECORD.size
+        self.misses += 1
+        return None
+
+    def store(self, key, depth, score, flag, moveID):
+        offset = self.bucketOffset(key)
+        target, targetRank = None, None
+        for slot in range(BUCKET_SLOTS):
+            storedKey, storedDepth, _, _, _, generation, crc = RECORD.unpack_from(self.map, offset + slot * RECORD.size)
+            slotOffset = offset + slot * RECORD.size
+            if storedKey == key:
+                if storedDepth > depth and crc == zlib.crc32(self.map[slotOffset:slotOffset + RECORD_DATA.size]):
+                    return  # postojeća analiza je dublja
+                target = slotOffset
+                break
+            if crc == 0 and storedKey == 0:
+                target = slotOffset  # prazan slot
+                break
+            # Zamjena: najstarija generacija, pa najmanja dubina
+            age = (self.generation - generation) & 0xFFFF
+            rank = (-age, storedDepth)
+            if targetRank is None or rank < targetRank:
+                target, targetRank = slotOffset, rank
+        data = RECORD_DATA.pack(key, depth, flag, score, moveID, self.generation)
+        self.map[target:target + RECORD.size] = data + struct.pack("<I", zlib.crc32(data))
+        self.stores += 1
+
+    def close(self):
+        self.map.flush()
+        self.map.close()
+        self.file.close()
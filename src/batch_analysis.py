@@ -0,0 +1,198 @@
+"""
+Neinteraktivna analiza partija: partije se čitaju iz baze (game_store) ili starih log/gameN.txt fajlova,
+odigravaju kroz GameState, a pozicije se šalju pulu procesa koji za svaku pokreće negamax pretragu
+sa ograničenjem po poziciji. Pozicije koje se ponavljaju (isti Zobrist hash) analiziraju se samo jednom.
+
+Rezultati se upisuju u JSON lines fajl odmah po završetku svake pozicije, pa se prekinuta analiza
+nastavlja ponovnim pokretanjem sa istim --out fajlom (već analizirane pozicije se preskaču).
+Sa --multipv K svaki rezultat ima i "lines": K najboljih poteza sa skorom, dubinom, brojem čvorova i
+glavnom varijantom, iz jedne multi-PV pretrage.
+Sa --pgn-out se na kraju ispisuju partije sa ocjenom i najboljim potezom kao PGN komentarima.
+
+Primjer:
+    python src/batch_analysis.py --store log/games --workers 8 --movetime 0.5 --out analiza.jsonl --pgn-out analiza.pgn
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import ChessEngine
+import chessAI
+import game_store
+
+MAX_IN_FLIGHT_PER_WORKER = 4  # koliko pozicija po procesu čeka u redu (ograničava memoriju kod velikih kolekcija)
+
+
+# Izvor partija: baza partija ili direktorij sa starim tekstualnim logovima
+def readGames(storePath=None, logDir=None):
+    if storePath:
+        with game_store.GameStore(storePath) as store:
+            for record in store:
+                yield record
+    if logDir:
+        names = sorted((n for n in os.listdir(logDir) if n.startswith("game") and n.endswith(".txt")),
+                       key=lambda n: int(n[4:-4]) if n[4:-4].isdigit() else 0)
+        for name in names:
+            with open(os.path.join(logDir, name)) as f:
+                yield game_store.GameRecord({"Site": name}, [line.strip() for line in f if line.strip()], "*")
+
+
+# Pozicije partije (hash, FEN) prije svakog poteza, do kraja partije ili prvog nelegalnog poteza
+def gamePositions(record):
+    gs = ChessEngine.GameState()
+    if "FEN" in record.headers:
+        gs.loadFen(record.headers["FEN"])
+    for notation in record.moves + [None]:
+        validMoves = gs.getValidMoves()
+        if not validMoves:
+            return
+        yield gs.zobristHash, gs.getFen()
+        move = next((m for m in validMoves if m.getChessNotation() == (notation or "")[:4]), None)
+        if move is None:
+            return
+        gs.makeMove(move)
+
+
+def analyzePosition(task):
+    positionHash, fen, movetime, nodes, depth, multiPV = task
+    gs = ChessEngine.GameState().loadFen(fen)
+    validMoves = gs.getValidMoves()
+    if multiPV > 1:
+        lines = chessAI.findMultiPV(gs, validMoves, multiPV, depth, timeLimit=movetime, nodeLimit=nodes)
+        move = lines[0]["move"] if lines else validMoves[0]
+    else:
+        move = chessAI.findBestMoveNegaMax(gs, validMoves, depth, timeLimit=movetime, nodeLimit=nodes)
+    stats = chessAI.lastSearchStats
+    lastIteration = stats.iterations[-1] if stats.iterations else (0, stats.counters["nodes"], 0, 0, None)
+    turnMultiplier = 1 if gs.whiteToMove else -1
+    entry = {
+        "hash": format(positionHash, "016x"),
+        "fen": fen,
+        "bestMove": move.getChessNotation(),
+        "san": gs.moveToSan(move, validMoves),
+        "score": lastIteration[2] * turnMultiplier,  # iz ugla bijelog
+        "depth": lastIteration[0],
+        "nodes": stats.counters["nodes"] + stats.counters["qnodes"],
+        "seconds": round(stats.elapsed, 4),
+    }
+    if multiPV > 1:
+        entry["lines"] = chessAI.multiPVToDicts(gs, lines)  # najboljih multiPV poteza, svaki sa dubinom i čvorovima
+    return entry
+
+
+# Već analizirane pozicije iz ranijeg (možda prekinutog) pokretanja
+def loadResults(path):
+    results = {}
+    if path and os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # posljednja linija prekinutog upisa
+                results[entry["hash"]] = entry
+    return results
+
+
+def analyzeGames(games, outPath, workers, movetime, nodes, depth, report=print, cachePath=None, multiPV=1):
+    results = loadResults(outPath)
+    if results:
+        report(f"Nastavak: {len(results)} pozicija je već analizirano")
+    queued = set(results)
+    analyzed = 0
+    start = time.time()
+
+    def tasks():
+        for record in games:
+            for positionHash, fen in gamePositions(record):
+                key = format(positionHash, "016x")
+                if key not in queued:
+                    queued.add(key)
+                    yield positionHash, fen, movetime, nodes, depth, multiPV
+
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=chessAI.useAnalysisCache, initargs=(cachePath,))
+    with open(outPath, "a") as out, executor:
+        pending = set()
+        source = tasks()
+        exhausted = False
+        while pending or not exhausted:
+            while not exhausted and len(pending) < workers * MAX_IN_FLIGHT_PER_WORKER:
+                task = next(source, None)
+                if task is None:
+                    exhausted = True
+                else:
+                    pending.add(executor.submit(analyzePosition, task))
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                entry = future.result()
+                results[entry["hash"]] = entry
+                out.write(json.dumps(entry) + "\n")
+                analyzed += 1
+            out.flush()
+            if analyzed and analyzed % (workers * 25) < len(done):
+                elapsed = time.time() - start
+                report(f"  {analyzed} pozicija, {analyzed / elapsed:.1f} pozicija/s")
+
+    elapsed = time.time() - start
+    report(f"Analizirano {analyzed} novih pozicija za {elapsed:.1f} s"
+           + (f" ({analyzed / elapsed:.1f} pozicija/s)" if analyzed and elapsed > 0 else ""))
+    return results
+
+
+# PGN sa ocjenom i najboljim potezom engine-a kao komentarom iza svakog poteza
+def annotatedPgn(record, results):
+    pgn = game_store.toPgn(record)
+    tagsPart, _, movetext = pgn.partition("\n\n")
+    gs = ChessEngine.GameState()
+    if "FEN" in record.headers:
+        gs.loadFen(record.headers["FEN"])
+    tokens = []
+    for notation in record.moves:
+        validMoves = gs.getValidMoves() or []
+        move = next((m for m in validMoves if m.getChessNotation() == notation[:4]), None)
+        if move is None:
+            break
+        if gs.whiteToMove or not tokens:
+            moveNumber = (gs.startPly + len(gs.moveLog)) // 2 + 1
+            tokens.append(f"{moveNumber}." if gs.whiteToMove else f"{moveNumber}...")
+        tokens.append(gs.moveToSan(move, validMoves))
+        entry = results.get(format(gs.zobristHash, "016x"))
+        if entry:
+            tokens.append(f"{{{entry['score']:+d} best {entry['san']} d{entry['depth']}}}")
+        gs.makeMove(move)
+    tokens.append(record.result)
+    return tagsPart + "\n\n" + " ".join(tokens) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Paralelna analiza sačuvanih partija")
+    parser.add_argument("--store", default=None, help="baza partija (putanja bez ekstenzije), npr. log/games")
+    parser.add_argument("--log-dir", default=None, help="direktorij sa starim gameN.txt fajlovima")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--movetime", type=float, default=None, help="sekunde po poziciji")
+    parser.add_argument("--nodes", type=int, default=None, help="čvorovi po poziciji")
+    parser.add_argument("--depth", type=int, default=None, help="fiksna dubina (bez --movetime/--nodes)")
+    parser.add_argument("--out", default="analysis.jsonl", help="JSON lines fajl sa rezultatima (nastavlja se ako postoji)")
+    parser.add_argument("--cache", default=None, help="trajni keš analiza koji dijele svi procesi")
+    parser.add_argument("--multipv", type=int, default=1, help="broj najboljih linija po poziciji")
+    parser.add_argument("--pgn-out", default=None, help="PGN sa komentarima ocjene i najboljeg poteza")
+    args = parser.parse_args()
+    if not args.store and not args.log_dir:
+        args.store = game_store.DEFAULT_STORE
+    depth = args.depth or (64 if args.movetime or args.nodes else chessAI.MAX_DEPTH)
+
+    results = analyzeGames(readGames(args.store, args.log_dir), args.out, args.workers,
+                           args.movetime, args.nodes, depth, cachePath=args.cache, multiPV=args.multipv)
+    if args.pgn_out:
+        with open(args.pgn_out, "w", encoding="utf-8") as f:
+            for record in readGames(args.store, args.log_dir):
+                f.write(annotatedPgn(record, results) + "\n")
+
+
+if __name__ == "__main__":
+    main()
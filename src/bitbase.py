@@ -0,0 +1,391 @@
+"""
+Bitbaze završnica (KPK, KRK, KQK, KBNK) napravljene retrogradnom analizom.
+
+Za svaku završnicu jači igrač ima kralja i jednu ili dvije figure, a slabiji samo kralja, pa slabiji nikad
+ne može dobiti: za svaku poziciju je dovoljan jedan bit, "jači igrač dobija" (1) ili "remi" (0, također za
+nemoguće pozicije). Tabele se prave za bijelog kao jačeg igrača; pozicija u kojoj je jači crni se pri
+čitanju preslika (zamjena boja i okretanje table).
+
+Indeks pozicije je ((naPotezu * 64 + bijeliKralj) * 64 + crniKralj) * 64 ... + polje svake figure, gdje je
+polje r * 8 + c kao u GameState.board, a naPotezu 0 za bijelog i 1 za crnog. Generator (generate) radi nad
+NumPy nizovima svih pozicija: polazi od matova i ponavlja dva koraka dok se skup dobijenih pozicija ne
+prestane širiti — bijeli na potezu dobija ako neki njegov potez vodi u dobijenu poziciju, crni na potezu
+gubi ako ga svaki legalan potez vodi u dobijenu poziciju (uzimanje figure vodi u remi). Promocija u KPK
+čita već napravljene tabele KQK i KRK. Pravilo 50 poteza i rošada se ne uzimaju u obzir.
+
+Sve tabele su u jednom fajlu (bit po poziciji, 8 pozicija po bajtu) sa imenikom tabela u zaglavlju; fajl
+se mapira u memoriju (mmap), pa je čitanje jedne pozicije samo izračun indeksa i čitanje jednog bajta.
+Ako fajl postoji na DEFAULT_PATH, učitava se pri uvozu modula i koriste ga pretraga (chessAI) i MCTS
+simulacije (monte_carlo_ai, MonteCarloNode).
+
+Primjer:
+    python src/bitbase.py generate            # pravi cache/bitbases.bin
+    python src/bitbase.py probe "8/8/8/4k3/8/8/4P3/4K3 w - - 0 1"
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import time
+
+import ChessEngine
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "cache", "bitbases.bin")
+FILE_MAGIC = b"CHBB"
+HEADER = struct.Struct("<4sIH")      # magic, verzija, broj tabela
+ENTRY = struct.Struct("<8sQQ")      # ime tabele, offset podataka, broj pozicija
+VERSION = 1
+MAX_PIECES = 4  # najviše figura (sa kraljevima) u nekoj tabeli
+
+# Tabele po figurama jačeg igrača (bez kralja), redoslijedom generisanja (KPK koristi KQK i KRK)
+TABLES = {
+    "KQK": ("queen",),
+    "KRK": ("rook",),
+    "KPK": ("pawn",),
+    "KBNK": ("bishop", "knight"),
+}
+SIGNATURES = {tuple(sorted(pieces)): name for name, pieces in TABLES.items()}
+PROMOTIONS = {"queen": "KQK", "rook": "KRK"}  # KPK: promocija u damu ili topa (lovac i skakač ne dobijaju)
+
+
+class Bitbases:
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count = HEADER.unpack_from(self.map)
+        if magic != FILE_MAGIC or version != VERSION:
+            raise ValueError(f"{path} nije fajl sa bitbazama")
+        self.offsets = {}
+        for i in range(count):
+            name, offset, _ = ENTRY.unpack_from(self.map, HEADER.size + i * ENTRY.size)
+            self.offsets[name.rstrip(b"\0").decode()] = offset
+
+    # Rezultat iz ugla bijelog: 1 (bijeli dobija), -1 (crni dobija), 0 (remi) ili None (nema tabele)
+    def probe(self, gs):
+        found = lookup(gs)
+        if found is None or found[0] not in self.offsets:
+            return None
+        name, index, strongIsWhite = found
+        if not self.map[self.offsets[name] + (index >> 3)] >> (index & 7) & 1:
+            return 0
+        return 1 if strongIsWhite else -1
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+
+# Završnica pozicije: (ime tabele, indeks, da li je jači igrač bijeli) ili None ako tabela ne postoji
+def lookup(gs):
+    pieces = []
+    strongIsWhite = None
+    for r in range(8):
+        row = gs.board[r]
+        for c in range(8):
+            piece = row[c]
+            if piece != "--" and not piece.endswith("king"):
+                color, pieceType = piece.split()
+                if strongIsWhite is None:
+                    strongIsWhite = color == "white"
+                elif strongIsWhite != (color == "white"):
+                    return None
+                pieces.append((pieceType, r * 8 + c))
+    if not pieces:
+        return None
+    pieces.sort()
+    name = SIGNATURES.get(tuple(p[0] for p in pieces))
+    if name is None:
+        return None
+    (wr, wc), (br, bc) = gs.whiteKingLocation, gs.blackKingLocation
+    if strongIsWhite:
+        strongKing, weakKing, sideToMove = wr * 8 + wc, br * 8 + bc, 0 if gs.whiteToMove else 1
+        squares = [sq for _, sq in pieces]
+    else:
+        # Preslikavanje: crni postaje bijeli, red r postaje 7 - r
+        strongKing, weakKing, sideToMove = (7 - br) * 8 + bc, (7 - wr) * 8 + wc, 1 if gs.whiteToMove else 0
+        squares = [(7 - sq // 8) * 8 + sq % 8 for _, sq in pieces]
+    order = {pieceType: i for i, pieceType in enumerate(TABLES[name])}
+    index = (sideToMove * 64 + strongKing) * 64 + weakKing
+    for _, sq in sorted(zip([order[p[0]] for p in pieces], squares)):
+        index = index * 64 + sq
+    return name, index, strongIsWhite
+
+
+# Heuristika napretka u dobijenoj završnici (iz ugla jačeg igrača, 0 do oko 250): vrijednost završnice (dama
+# vrijedi više od pješaka, pa je promocija napredak), slabiji kralj što bliže ivici (KBNK: uglu boje lovca),
+# kraljevi što bliže, a u KPK pješak što dalje. Bitbaza kaže samo "dobijeno", pa bez ovoga pretraga ne bi
+# razlikovala poteze koji vode ka matu od onih koji se vrte u mjestu.
+TABLE_BONUS = {"KPK": 0, "KRK": 100, "KBNK": 100, "KQK": 150}
+
+
+def winProgress(gs):
+    found = lookup(gs)
+    if found is None:
+        return 0
+    name, _, strongIsWhite = found
+    strong, weak = (gs.whiteKingLocation, gs.blackKingLocation) if strongIsWhite else (gs.blackKingLocation, gs.whiteKingLocation)
+    score = TABLE_BONUS[name] + 5 * (7 - max(abs(strong[0] - weak[0]), abs(strong[1] - weak[1])))
+    if name == "KPK":
+        for r in range(8):
+            for c in range(8):
+                if gs.board[r][c].endswith("pawn"):
+                    score += 20 * ((6 - r) if strongIsWhite else (r - 1))
+    elif name == "KBNK":
+        bishopSquare = next((r + c) % 2 for r in range(8) for c in range(8) if gs.board[r][c].endswith("bishop"))
+        corners = [(0, 0), (7, 7)] if bishopSquare == 0 else [(0, 7), (7, 0)]
+        score += 8 * (14 - min(abs(weak[0] - r) + abs(weak[1] - c) for r, c in corners))
+    else:
+        score += 20 * max(abs(2 * weak[0] - 7), abs(2 * weak[1] - 7)) // 2
+    return score
+
+
+tables = None  # Bitbases iz DEFAULT_PATH (ili useBitbases), None ako fajl ne postoji
+
+
+def useBitbases(path=DEFAULT_PATH):
+    global tables
+    if tables is not None:
+        tables.close()
+    tables = Bitbases(path) if path and os.path.exists(path) else None
+    return tables
+
+
+def probe(gs):
+    return tables.probe(gs) if tables is not None else None
+
+
+# ----------------------------------------------------------------------------------------------------------
+# Generator (NumPy se koristi samo ovdje)
+
+KNIGHT_OFFSETS = [(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)]
+KING_OFFSETS = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+SLIDER_DIRECTIONS = {
+    "rook": [(-1, 0), (1, 0), (0, -1), (0, 1)],
+    "bishop": [(-1, -1), (-1, 1), (1, -1), (1, 1)],
+}
+SLIDER_DIRECTIONS["queen"] = SLIDER_DIRECTIONS["rook"] + SLIDER_DIRECTIONS["bishop"]
+
+
+# Geometrijski potezi figure sa polja sq: lista (ciljno polje, polja između) bez obzira na ostale figure
+def pieceMoves(pieceType, sq):
+    r, c = divmod(sq, 8)
+    moves = []
+    if pieceType in SLIDER_DIRECTIONS:
+        for dr, dc in SLIDER_DIRECTIONS[pieceType]:
+            between = []
+            tr, tc = r + dr, c + dc
+            while 0 <= tr < 8 and 0 <= tc < 8:
+                moves.append((tr * 8 + tc, list(between)))
+                between.append(tr * 8 + tc)
+                tr, tc = tr + dr, tc + dc
+    else:
+        offsets = KNIGHT_OFFSETS if pieceType == "knight" else KING_OFFSETS
+        moves = [((r + dr) * 8 + c + dc, []) for dr, dc in offsets if 0 <= r + dr < 8 and 0 <= c + dc < 8]
+    return moves
+
+
+# Polja koja figura napada (bijeli pješak napada dijagonalno prema redu 0)
+def pieceAttacks(pieceType, sq):
+    if pieceType == "pawn":
+        r, c = divmod(sq, 8)
+        return [((r - 1) * 8 + c + dc, []) for dc in (-1, 1) if r > 0 and 0 <= c + dc < 8]
+    return pieceMoves(pieceType, sq)
+
+
+class Generator:
+    def __init__(self, np, report=print):
+        self.np = np
+        self.report = report
+        self.results = {}  # ime -> (dobijeno sa bijelim na potezu, dobijeno sa crnim na potezu)
+        square = np.arange(64)
+        self.kingAdjacent = np.zeros((64, 64), dtype=bool)
+        for sq in range(64):
+            for target, _ in pieceMoves("king", sq):
+                self.kingAdjacent[sq, target] = True
+        self.square = square
+
+    # 1D maska duž jedne ose niza sa ndim osa
+    def along(self, vector, axis, ndim):
+        shape = [1] * ndim
+        shape[axis] = 64
+        return vector.reshape(shape)
+
+    # Maska "polje figure nije ni na jednom od zadanih polja" za svaku navedenu osu
+    def notOn(self, squares, axes, ndim):
+        free = self.np.ones(64, dtype=bool)
+        free[list(squares)] = False
+        mask = True
+        for axis in axes:
+            mask = mask & self.along(free, axis, ndim)
+        return mask
+
+    def generate(self, name):
+        np = self.np
+        pieceTypes = TABLES[name]
+        ndim = 2 + len(pieceTypes)
+        shape = (64,) * ndim
+        pieceAxes = list(range(2, ndim))
+        start = time.time()
+
+        # Legalne pozicije (bez obzira ko je na potezu): sve figure na različitim poljima, kraljevi nisu
+        # susjedni, pješak nije na prvom ni osmom redu
+        legal = np.ones(shape, dtype=bool)
+        for a in range(ndim):
+            for b in range(a + 1, ndim):
+                legal &= self.along(self.square, a, ndim) != self.along(self.square, b, ndim)
+        legal &= ~self.kingAdjacent.reshape((64, 64) + (1,) * len(pieceTypes))
+        for axis, pieceType in zip(pieceAxes, pieceTypes):
+            if pieceType == "pawn":
+                legal &= self.along((self.square >= 8) & (self.square < 56), axis, ndim)
+
+        # attacked[bijeliKralj, figure..., polje]: polje napadnuto bijelim figurama (crni kralj ne blokira,
+        # figura na samom polju se ne računa kao napadač)
+        attacked = np.zeros(shape, dtype=bool)
+        attacked |= self.kingAdjacent.reshape((64,) + (1,) * len(pieceTypes) + (64,))
+        for i, pieceType in enumerate(pieceTypes):
+            axis = 1 + i  # osa figure u attacked (bez ose crnog kralja)
+            # Ostale bijele figure (ose niza nakon izbora polja figure i ciljnog polja) blokiraju napad
+            blockers = list(range(ndim - 2))
+            for sq in range(64):
+                for target, between in pieceAttacks(pieceType, sq):
+                    index = [slice(None)] * (ndim - 1) + [target]
+                    index[axis] = sq
+                    mask = self.notOn(between, blockers, ndim - 2) if between else True
+                    attacked[tuple(index)] |= mask
+        # inCheck[bijeliKralj, crniKralj, figure...]: crni kralj je napadnut (osa polja postaje osa crnog kralja)
+        inCheck = np.moveaxis(attacked, ndim - 1, 1)
+
+        legalWhite = legal & ~inCheck  # sa bijelim na potezu crni ne smije biti u šahu
+        legalBlack = legal
+
+        # Potezi crnog kralja: za svako (bk, t) maska legalnosti i da li je potez uzimanje
+        blackMoves = []
+        for bk in range(64):
+            for target, _ in pieceMoves("king", bk):
+                free = ~attacked[(slice(None),) * (ndim - 1) + (target,)]  # (wk, figure...)
+                capture = False
+                for axis in range(1, ndim - 1):
+                    capture = capture | self.along(self.square == target, axis, ndim - 1)
+                blackMoves.append((bk, target, free, free & capture, free & ~capture))
+        hasMove = np.zeros(shape, dtype=bool)
+        escapeByCapture = np.zeros(shape, dtype=bool)
+        for bk, target, free, captureMove, quietMove in blackMoves:
+            hasMove[:, bk] |= free
+            escapeByCapture[:, bk] |= captureMove
+        mate = legalBlack & inCheck & ~hasMove
+        self.report(f"{name}: {int(legal.sum())} legalnih pozicija, {int(mate.sum())} matova")
+
+        winBlack = mate
+        iteration = 0
+        while True:
+            iteration += 1
+            winWhite = self.whiteStep(name, pieceTypes, winBlack, ndim) & legalWhite
+            escape = escapeByCapture.copy()
+            for bk, target, free, captureMove, quietMove in blackMoves:
+                escape[:, bk] |= quietMove & ~winWhite[:, target]
+            newBlack = mate | (legalBlack & hasMove & ~escape)
+            if (newBlack == winBlack).all():
+                break
+            winBlack = newBlack
+        self.results[name] = (winWhite, winBlack)
+        self.report(f"{name}: {iteration} iteracija, dobijeno {int(winWhite.sum())}/{int(legalWhite.sum())} "
+                    f"(bijeli na potezu), {int(winBlack.sum())}/{int(legalBlack.sum())} (crni na potezu), "
+                    f"{time.time() - start:.1f} s")
+        return np.stack([winWhite, winBlack])
+
+    # Pozicije sa bijelim na potezu iz kojih neki potez bijelog vodi u dobijenu poziciju sa crnim na potezu
+    def whiteStep(self, name, pieceTypes, winBlack, ndim):
+        np = self.np
+        win = np.zeros(winBlack.shape, dtype=bool)
+        # Kralj: ne na polje figure, crnog kralja ili polje susjedno crnom kralju
+        for wk in range(64):
+            for target, _ in pieceMoves("king", wk):
+                mask = self.along(~self.kingAdjacent[target] & (self.square != target), 0, ndim - 1)
+                mask = mask & self.notOn([target], range(1, ndim - 1), ndim - 1)
+                win[wk] |= winBlack[target] & mask
+        for i, pieceType in enumerate(pieceTypes):
+            axis = 2 + i
+            sub = list(range(ndim - 1))  # ose niza nakon izbora polja figure (svi ostali blokiraju)
+            for sq in range(64):
+                source = [slice(None)] * ndim
+                source[axis] = sq
+                if pieceType == "pawn":
+                    if not 8 <= sq < 56:
+                        continue
+                    self.pawnStep(win, winBlack, source, axis, sq, sub, ndim)
+                    continue
+                for target, between in pieceMoves(pieceType, sq):
+                    destination = list(source)
+                    destination[axis] = target
+                    mask = self.notOn(between + [target], sub, ndim - 1)
+                    win[tuple(source)] |= winBlack[tuple(destination)] & mask
+        return win
+
+    # Potezi pješaka (KPK): jedno ili dva polja naprijed na prazna polja; sa sedmog reda promocija u
+    # damu ili topa, čiji rezultat se čita iz već napravljenih tabela KQK i KRK
+    def pawnStep(self, win, winBlack, source, axis, sq, sub, ndim):
+        target = sq - 8
+        mask = self.notOn([target], sub, ndim - 1)
+        destination = list(source)
+        source = tuple(source)
+        if target < 8:
+            for promotion in PROMOTIONS.values():
+                promotedBlack = self.results[promotion][1]  # [wk, bk, figura]
+                win[source] |= promotedBlack[:, :, target] & mask
+            return
+        destination[axis] = target
+        win[source] |= winBlack[tuple(destination)] & mask
+        if sq >= 48:
+            destination[axis] = sq - 16
+            win[source] |= winBlack[tuple(destination)] & self.notOn([target, sq - 16], sub, ndim - 1)
+
+
+def generate(path=DEFAULT_PATH, names=tuple(TABLES), report=print):
+    import numpy as np
+    generator = Generator(np, report)
+    needed = list(names)
+    if "KPK" in needed:
+        needed = [n for n in PROMOTIONS.values() if n not in needed] + needed
+    data = {}
+    for name in TABLES:
+        if name in needed:
+            data[name] = np.packbits(generator.generate(name).ravel(), bitorder="little").tobytes()
+    names = [name for name in TABLES if name in names]
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+    with open(path, "wb") as f:
+        offset = HEADER.size + len(names) * ENTRY.size
+        f.write(HEADER.pack(FILE_MAGIC, VERSION, len(names)))
+        for name in names:
+            f.write(ENTRY.pack(name.encode(), offset, len(data[name]) * 8))
+            offset += len(data[name])
+        for name in names:
+            f.write(data[name])
+    report(f"Bitbaze upisane u {path} ({os.path.getsize(path) // 1024} KB)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bitbaze završnica: generisanje i provjera pozicija")
+    sub = parser.add_subparsers(dest="command", required=True)
+    generateParser = sub.add_parser("generate", help="retrogradna analiza i upis fajla")
+    generateParser.add_argument("--out", default=DEFAULT_PATH)
+    generateParser.add_argument("--tables", default=",".join(TABLES), help="npr. KPK,KRK")
+    probeParser = sub.add_parser("probe", help="rezultat pozicije iz bitbaza")
+    probeParser.add_argument("fen")
+    probeParser.add_argument("--path", default=DEFAULT_PATH)
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        generate(args.out, tuple(args.tables.split(",")))
+    else:
+        bases = Bitbases(args.path)
+        result = bases.probe(ChessEngine.GameState().loadFen(args.fen))
+        print({None: "nema tabele", 1: "bijeli dobija", -1: "crni dobija", 0: "remi"}[result])
+
+
+if __name__ == "__main__":
+    main()
+else:
+    useBitbases()
@@ -1,4 +1,13 @@
 import random
+import time
+
+from search_stats import SearchStats, CUTOFF_HISTOGRAM_SIZE
+from see import staticExchange
+from analysis_cache import AnalysisCache, DEFAULT_ENTRIES
+from pawn_eval import evaluatePawns
+import bitbase
+import mate_solver
+from psqt import taper
 
 # Bodovna vrijednost figura za procjenu pozicije; pozitivne za bijele, negativne za crne
 pieceScore = {
@@ -41,16 +50,36 @@ def findBestMove(gs, validMoves):
     return bestMove
 
 
-# Druga verzija minimaxa, sa globalnom varijablom nextMove za čuvanje poteza
-def bestMinMax(gs, validMoves):
+# Druga verzija minimaxa, sa globalnom varijablom nextMove za čuvanje poteza.
+# depth je dubina pretrage (podrazumijevano MAX_DEPTH). Uz timeLimit (sekunde) ili nodeLimit dubina se povećava
+# od 1 do depth, a nakon prekida se vraća potez zadnje završene dubine (kao u findBestMoveNegaMax).
+def bestMinMax(gs, validMoves, depth=None, timeLimit=None, nodeLimit=None):
     global nextMove
-    nextMove = None
-    minimax(gs, validMoves, MAX_DEPTH, gs.whiteToMove)
-    return nextMove
+    depth = MAX_DEPTH if depth is None else depth
+    limited = timeLimit is not None or nodeLimit is not None
+    beginSearch(gs, timeLimit, nodeLimit)
+    bestMove = None
+    for d in range(1 if limited else depth, depth + 1):
+        nextMove = None
+        minimax(gs, validMoves, d, gs.whiteToMove, d)
+        if searchLimits['stopped']:
+            break
+        bestMove = nextMove
+    return bestMove if bestMove is not None else nextMove
 
-# Klasični minimax algoritam sa dvije strane (maksimizira i minimizira)
-def minimax(gs, validMoves, depth, whiteToMove):
+# Klasični minimax algoritam sa dvije strane (maksimizira i minimizira); rootDepth je dubina korijena,
+# na kojoj se pamti najbolji potez
+def minimax(gs, validMoves, depth, whiteToMove, rootDepth=None):
     global nextMove
+    rootDepth = MAX_DEPTH if rootDepth is None else rootDepth
+    searchStats['nodes'] += 1
+    if searchShouldStop():
+        return STALEMATE  # pretraga je prekinuta, skor se ne koristi
+    if not validMoves:
+        # Mat ili pat (getValidMoves vraća None i postavlja zastavice)
+        if gs.checkmate:
+            return -CHECKMATE if whiteToMove else CHECKMATE
+        return STALEMATE
     if depth == 0:
         return scoreMaterial(gs.board)  # Evaluacija materijala na tabli
 
@@ -59,11 +88,11 @@ def minimax(gs, validMoves, depth, whiteToMove):
         for move in validMoves:
             gs.makeMove(move)
             nextMoves = gs.getValidMoves()  # Dobij validne poteze protivnika
-            score = minimax(gs, nextMoves, depth - 1, False)
+            score = minimax(gs, nextMoves, depth - 1, False, rootDepth)
             if score > maxScore:
                 maxScore = score
                 # Ako smo na vrhu pretrage, zapamti potez
-                if depth == MAX_DEPTH:
+                if depth == rootDepth:
                     nextMove = move
             gs.undoMove()
         return maxScore
@@ -73,10 +102,10 @@ def minimax(gs, validMoves, depth, whiteToMove):
             gs.makeMove(move)
             nextMoves = gs.getValidMoves()
             # Greška u tvojoj verziji: koristi MAX_DEPTH umjesto depth-1, treba popraviti
-            score = minimax(gs, nextMoves, depth - 1, True)
+            score = minimax(gs, nextMoves, depth - 1, True, rootDepth)
             if score < minScore:
                 minScore = score
-                if depth == MAX_DEPTH:
+                if depth == rootDepth:
                     nextMove = move
             gs.undoMove()
         return minScore
@@ -84,48 +113,508 @@ def minimax(gs, validMoves, depth, whiteToMove):
 
 # -------------
 
-# NegaMax algoritam sa alfa-beta prunerom za efikasnije pretraživanje
-def findBestMoveNegaMax(gs, validMoves, depth):
-    bestMove = None
-    bestScore = -CHECKMATE
-    alpha = -CHECKMATE  # Donja granica (najgore što može biti)
-    beta = CHECKMATE    # Gornja granica (najbolje što može biti)
+# Širina aspiracijskog prozora oko rezultata prethodne iteracije
+ASPIRATION_WINDOW = 25
+
+# Transpozicijska tabela: zobristHash -> (dubina, skor, tip granice, moveID najboljeg poteza)
+TT_EXACT, TT_LOWER, TT_UPPER = 0, 1, 2
+TT_MAX_ENTRIES = 1 << 18
+transpositionTable = {}
+
+# Trajni keš analiza na disku (analysis_cache.py): u korijenu se konsultuje prije pretrage, a rezultat
+# završene pretrage se upisuje nazad. Pretraga ograničena vremenom/čvorovima prihvata zapis od bar
+# ANALYSIS_CACHE_MIN_DEPTH, a pretraga fiksne dubine zapis od bar te dubine.
+analysisCache = None
+ANALYSIS_CACHE_MIN_DEPTH = 4
+
+
+def useAnalysisCache(path, entries=DEFAULT_ENTRIES):
+    global analysisCache
+    if analysisCache is not None:
+        analysisCache.close()
+    analysisCache = AnalysisCache(path, entries) if path else None
+    return analysisCache
+
+# Selektivna pretraga: svaka tehnika se može uključiti/isključiti
+SEARCH_OPTIONS = {
+    'nullMove': True,           # null-move pruning
+    'lateMoveReductions': True,  # smanjena dubina za kasne mirne poteze
+    'futility': True,           # futility i reverse futility pruning blizu listova
+    'quiescence': True,         # pretraga uzimanja na listovima (gubitna uzimanja po SEE se preskaču)
+}
+NULL_MOVE_REDUCTION = 2        # R: null-move pretraga ide na dubinu depth - 1 - R
+NULL_MOVE_MIN_DEPTH = 3
+LMR_MIN_DEPTH = 3
+LMR_MIN_MOVE_INDEX = 3         # prva tri poteza (hash potez, uzimanja) se nikad ne smanjuju
+FUTILITY_MARGIN = [0, 60, 120]  # margina po preostaloj dubini (1 i 2)
+QUIESCENCE_MAX_DEPTH = 4       # najviše uzastopnih uzimanja u quiescence pretrazi
+
+# Statistika pretrage: čvorovi, null-window pretrage, ponovljene pretrage (PVS i aspiracija), orezivanja,
+# pozivi evaluacije i generatora poteza, transpozicijska i pješačka hash tabela i indeks poteza koji je dao beta cut-off.
+# Resetuje se na početku svake pretrage; lastSearchStats je SearchStats zadnje završene pretrage.
+searchStats = {}
+lastSearchStats = None
+
+
+def resetSearchStats():
+    searchStats.clear()
+    searchStats.update({
+        'nodes': 0,
+        'qnodes': 0,
+        'seePrunes': 0,
+        'drawCutoffs': 0,
+        'nullWindowSearches': 0,
+        'pvsResearches': 0,
+        'aspirationSearches': 0,
+        'aspirationFailLow': 0,
+        'aspirationFailHigh': 0,
+        'nullMoveCutoffs': 0,
+        'lmrSearches': 0,
+        'lmrResearches': 0,
+        'futilityPrunes': 0,
+        'reverseFutilityPrunes': 0,
+        'evalCalls': 0,
+        'moveGenCalls': 0,
+        'ttProbes': 0,
+        'ttHits': 0,
+        'ttCutoffs': 0,
+        'ttStores': 0,
+        'analysisCacheHits': 0,
+        'pawnHashHits': 0,
+        'pawnHashMisses': 0,
+        'bitbaseHits': 0,
+        'mateSolverNodes': 0,
+        'cutoffIndex': [0] * CUTOFF_HISTOGRAM_SIZE,
+    })
+
+
+resetSearchStats()
+
+# Ograničenja pretrage (vrijeme i broj čvorova); kad se prekorače, pretraga se prekida
+# i vraća se najbolji potez zadnje završene iteracije
+searchLimits = {'deadline': None, 'maxNodes': None, 'stopCheck': None, 'stopped': False, 'bitbaseRoot': False}
+
+
+def searchShouldStop():
+    if searchLimits['stopped']:
+        return True
+    total = searchStats['nodes'] + searchStats['qnodes']
+    if searchLimits['maxNodes'] is not None and total >= searchLimits['maxNodes']:
+        searchLimits['stopped'] = True
+    elif searchLimits['deadline'] is not None and total & 255 == 0 and time.time() >= searchLimits['deadline']:
+        searchLimits['stopped'] = True
+    elif searchLimits['stopCheck'] is not None and total & 1023 == 0 and searchLimits['stopCheck']():
+        searchLimits['stopped'] = True
+    return searchLimits['stopped']
+
+
+# Sortiranje poteza: potez iz transpozicijske tabele prvi, zatim dobitna i jednaka uzimanja po MVV-LVA,
+# mirni potezi, a na kraju uzimanja koja po SEE gube materijal
+def orderMoves(gs, moves, hashMoveID=None):
+    def key(move):
+        if move.moveID == hashMoveID:
+            return -1000
+        if move.pieceCaptured != "--":
+            mvvLva = -10 * abs(pieceScore[move.pieceCaptured]) + abs(pieceScore[move.pieceMoved])
+            return mvvLva if staticExchange(gs, move) >= 0 else 1000 + mvvLva
+        return 0
+    return sorted(moves, key=key)
+
+
+# Početak pretrage: nova statistika i ograničenja (vrijeme, čvorovi, stopCheck); gs je korijen pretrage
+def beginSearch(gs, timeLimit=None, nodeLimit=None, stopCheck=None):
+    resetSearchStats()
+    searchLimits['deadline'] = time.time() + timeLimit if timeLimit is not None else None
+    searchLimits['maxNodes'] = nodeLimit
+    searchLimits['stopCheck'] = stopCheck
+    searchLimits['stopped'] = False
+    searchLimits['bitbaseRoot'] = gs.pieceCount <= bitbase.MAX_PIECES and bitbase.probe(gs) is not None
+    return SearchStats('negamax')
+
+
+def endSearch(stats, bestMove):
+    global lastSearchStats
+    stats.counters = {k: v for k, v in searchStats.items() if k != 'cutoffIndex'}
+    stats.cutoffIndex = list(searchStats['cutoffIndex'])
+    lastSearchStats = stats.stop(bestMove)
+    detachSearchNnue()
+
+
+def searchedNodes():
+    return searchStats['nodes'] + searchStats['qnodes']
+
+
+# Jedna iteracija korijena na dubini depth u aspiracijskom prozoru oko skora prethodne iteracije
+# (previousScore None: puni prozor); prozor se širi dok rezultat ne padne unutar njega
+def aspirationSearch(gs, validMoves, depth, previousScore, turnMultiplier):
+    if previousScore is None:
+        alpha, beta = -CHECKMATE, CHECKMATE
+    else:
+        alpha, beta = max(previousScore - ASPIRATION_WINDOW, -CHECKMATE), min(previousScore + ASPIRATION_WINDOW, CHECKMATE)
+        searchStats['aspirationSearches'] += 1
+    delta = ASPIRATION_WINDOW
+    while True:
+        score, move = searchRoot(gs, validMoves, depth, alpha, beta, turnMultiplier)
+        if score <= alpha and alpha > -CHECKMATE:
+            # Fail-low: proširi prozor nadolje i ponovi pretragu
+            searchStats['aspirationFailLow'] += 1
+            delta *= 2
+            alpha = max(score - delta, -CHECKMATE)
+        elif score >= beta and beta < CHECKMATE:
+            # Fail-high: proširi prozor nagore i ponovi pretragu
+            searchStats['aspirationFailHigh'] += 1
+            delta *= 2
+            beta = min(score + delta, CHECKMATE)
+        else:
+            return score, move
+
+
+# NegaMax algoritam sa alfa-beta prunerom za efikasnije pretraživanje.
+# Iterativno produbljivanje: svaka iteracija pretražuje u aspiracijskom prozoru oko prethodnog rezultata.
+# timeLimit (sekunde) i nodeLimit prekidaju pretragu; tada se vraća potez zadnje završene iteracije
+# stopCheck() se poziva povremeno tokom pretrage i prekida je kad vrati True (npr. zahtjev za stop iz UI-a),
+# a onIteration(dubina, skor, potez, čvorovi) se poziva nakon svake završene iteracije.
+# evaluator bira funkciju evaluacije za ovu pretragu (EVALUATORS: "classic" ili "nnue")
+# mateNodes: prije pretrage rješavač mata (mate_solver) traži forsiran mat sa najviše toliko čvorova (ne računaju
+# se u nodeLimit); dokazani mat se igra odmah, a iteracija se bilježi sa dubinom jednakom broju polupoteza do mata
+def findBestMoveNegaMax(gs, validMoves, depth, timeLimit=None, nodeLimit=None, stopCheck=None, onIteration=None,
+                        evaluator='classic', mateNodes=None):
     turnMultiplier = 1 if gs.whiteToMove else -1  # Koji je igrač na potezu
+    selectEvaluator(gs, evaluator)
+    stats = beginSearch(gs, timeLimit, nodeLimit, stopCheck)
+    bestMove = None
+    score = 0
+    # Keš analiza sadrži skorove klasične evaluacije
+    useCache = analysisCache is not None and evaluator == 'classic'
+    if useCache:
+        requiredDepth = depth if timeLimit is None and nodeLimit is None else min(depth, ANALYSIS_CACHE_MIN_DEPTH)
+        cached = analysisCache.probe(gs.zobristHash)
+        if cached is not None and cached[0] >= requiredDepth and cached[2] == TT_EXACT:
+            bestMove = next((m for m in validMoves if m.moveID == cached[3]), None)
+            if bestMove is not None:
+                searchStats['analysisCacheHits'] += 1
+                stats.iterations.append((cached[0], 0, cached[1], 0.0, bestMove.getChessNotation()))
+                depth = 0  # pretraga se preskače
+    if mateNodes and depth:
+        mate = mate_solver.solve(gs, mateNodes)
+        searchStats['mateSolverNodes'] = mate['nodes']
+        if mate['result'] == mate_solver.MATE:
+            bestMove = next(m for m in validMoves if m == mate['move'])
+            stats.iterations.append((mate['plies'], 0, CHECKMATE, time.time() - stats.startTime, bestMove.getChessNotation()))
+            if onIteration is not None:
+                onIteration(mate['plies'], CHECKMATE, bestMove, mate['nodes'])
+            depth = 0
+    for d in range(1, depth + 1):
+        score, move = aspirationSearch(gs, validMoves, d, score if d > 1 else None, turnMultiplier)
+        if searchLimits['stopped']:
+            # Nezavršena iteracija se koristi samo ako nemamo ništa bolje
+            if bestMove is None:
+                bestMove = move if move is not None else validMoves[0]
+            break
+        stats.iterations.append((d, searchedNodes(), score, time.time() - stats.startTime,
+                                 move.getChessNotation() if move is not None else None))
+        if onIteration is not None:
+            onIteration(d, score, move, searchedNodes())
+        if move is not None:
+            bestMove = move
+            # Najbolji potez ove iteracije ide prvi u sljedećoj
+            validMoves = [move] + [m for m in validMoves if m is not move]
+    if useCache and depth and stats.iterations and bestMove is not None:
+        analysisCache.store(gs.zobristHash, stats.iterations[-1][0], stats.iterations[-1][2], TT_EXACT, bestMove.moveID)
+    endSearch(stats, bestMove)
+    return bestMove
 
-    for move in validMoves:
+
+# Multi-PV: najboljih `lines` poteza sa skorom i glavnom varijantom u jednoj pretrazi. Na svakoj dubini
+# se korijen pretražuje `lines` puta, svaki put bez poteza koji su već izabrani kao bolje linije, pa je skor
+# svake linije tačan (ne samo granica iz null-window pretrage). Transpozicijska tabela je zajednička za sve
+# linije i dubine, pa kasnije linije većinom koriste pozicije koje su ranije već pretražene.
+# Vraća listu rječnika {move, score (iz ugla igrača na potezu), depth, nodes, pv (lista poteza od move)};
+# nakon prekida, linije nezavršene iteracije dopunjuju se linijama prethodne (svaka sa svojom dubinom).
+def findMultiPV(gs, validMoves, lines, depth, timeLimit=None, nodeLimit=None, stopCheck=None, onIteration=None,
+                evaluator='classic'):
+    turnMultiplier = 1 if gs.whiteToMove else -1
+    selectEvaluator(gs, evaluator)
+    stats = beginSearch(gs, timeLimit, nodeLimit, stopCheck)
+    lines = min(lines, len(validMoves))
+    results = []
+    for d in range(1, depth + 1):
+        remaining = list(validMoves)
+        current = []
+        for k in range(lines):
+            nodesBefore = searchedNodes()
+            previousScore = results[k]['score'] if d > 1 and k < len(results) else None
+            score, move = aspirationSearch(gs, remaining, d, previousScore, turnMultiplier)
+            if searchLimits['stopped'] or move is None:
+                break
+            current.append({'move': move, 'score': score, 'depth': d, 'nodes': searchedNodes() - nodesBefore,
+                            'pv': principalVariation(gs, move, d)})
+            remaining = [m for m in remaining if m is not move]
+        if searchLimits['stopped']:
+            chosen = [line['move'] for line in current]
+            results = current + [line for line in results if line['move'] not in chosen][:lines - len(current)]
+            break
+        results = current
+        stats.iterations.append((d, searchedNodes(), results[0]['score'], time.time() - stats.startTime,
+                                 results[0]['move'].getChessNotation()))
+        if onIteration is not None:
+            onIteration(d, results[0]['score'], results[0]['move'], searchedNodes())
+        # Linije ove iteracije idu prve u sljedećoj
+        chosen = [line['move'] for line in results]
+        validMoves = chosen + [m for m in validMoves if m not in chosen]
+    endSearch(stats, results[0]['move'] if results else None)
+    return results
+
+
+# Linije iz findMultiPV (ili MCTS linije sa "value", vjerovatnoćom pobjede igrača na potezu) u obliku za
+# JSON: koordinatna notacija i SAN, skor odnosno vrijednost iz ugla bijelog, PV u SAN-u
+def multiPVToDicts(gs, lines):
+    turnMultiplier = 1 if gs.whiteToMove else -1
+    result = []
+    for line in lines:
+        sanMoves = []
+        for move in line['pv']:
+            sanMoves.append(gs.moveToSan(move, gs.getValidMoves()))
+            gs.makeMove(move)
+        for _ in line['pv']:
+            gs.undoMove()
+        entry = {'move': line['move'].getChessNotation(), 'san': sanMoves[0], 'depth': line['depth'],
+                 'nodes': line['nodes'], 'pv': sanMoves}
+        if 'score' in line:
+            entry['score'] = line['score'] * turnMultiplier
+        if 'value' in line:
+            entry['value'] = round(line['value'] if gs.whiteToMove else 1 - line['value'], 4)
+        result.append(entry)
+    return result
+
+
+# Glavna varijanta iz transpozicijske tabele: potez, pa najbolji potezi zapisani za pozicije iza njega
+def principalVariation(gs, move, maxLength):
+    pv = [move]
+    gs.makeMove(move)
+    seen = {gs.zobristHash}
+    while len(pv) < maxLength:
+        entry = transpositionTable.get(gs.zobristHash)
+        if entry is None or entry[3] is None:
+            break
+        nextMove = next((m for m in gs.getValidMoves() or [] if m.moveID == entry[3]), None)
+        if nextMove is None:
+            break
+        pv.append(nextMove)
+        gs.makeMove(nextMove)
+        if gs.zobristHash in seen:
+            break
+        seen.add(gs.zobristHash)
+    for _ in pv:
+        gs.undoMove()
+    return pv
+
+
+# Pretraga korijena sa PVS: prvi potez punim prozorom, ostali null-window prozorom
+def searchRoot(gs, validMoves, depth, alpha, beta, turnMultiplier):
+    bestMove = None
+    bestScore = -CHECKMATE
+    for i, move in enumerate(validMoves):
         gs.makeMove(move)
-        # Rekurzivno pozivanje negaMax sa obrnutim znakom i ažuriranim alpha/beta
-        score = -negaMaxAlphaBeta(gs, depth - 1, -beta, -alpha, -turnMultiplier)
+        score = principalVariationSearch(gs, depth - 1, alpha, beta, turnMultiplier, i == 0)
         gs.undoMove()
+        if searchLimits['stopped']:
+            break
         if score > bestScore:
             bestScore = score
             bestMove = move
         alpha = max(alpha, score)  # Ažuriraj alpha
-    return bestMove
+        if alpha >= beta:
+            break
+    return bestScore, bestMove
+
+
+# Rezultat poteza (iz ugla igrača koji ga je odigrao) sa PVS: null-window pretraga,
+# a puni prozor samo za prvi potez ili ako null-window pretraga padne unutar (alpha, beta)
+def principalVariationSearch(gs, depth, alpha, beta, turnMultiplier, firstMove):
+    if firstMove:
+        return -negaMaxAlphaBeta(gs, depth, -beta, -alpha, -turnMultiplier)
+    searchStats['nullWindowSearches'] += 1
+    score = -negaMaxAlphaBeta(gs, depth, -alpha - 1, -alpha, -turnMultiplier)
+    if alpha < score < beta:
+        searchStats['pvsResearches'] += 1
+        score = -negaMaxAlphaBeta(gs, depth, -beta, -score, -turnMultiplier)
+    return score
 
 
-# Glavna funkcija negaMax sa alfa-beta orezivanjem
-def negaMaxAlphaBeta(gs, depth, alpha, beta, turnMultiplier):
-    if depth == 0:
-        # Na dubini 0 procijeni poziciju i vrati rezultat
-        return turnMultiplier * scoreBoard(gs)
+# Da li igrač na potezu ima figuru osim pješaka i kralja (zaštita od zugzwanga kod null-move pruninga)
+def hasNonPawnMaterial(gs):
+    color = "white" if gs.whiteToMove else "black"
+    for row in gs.board:
+        for piece in row:
+            if piece.startswith(color) and not piece.endswith("pawn") and not piece.endswith("king"):
+                return True
+    return False
+
+
+# Miran potez: nije uzimanje ni promocija (kandidat za LMR i futility pruning)
+def isQuietMove(move):
+    return move.pieceCaptured == "--" and not move.isPawnPromotion
+
 
+# Glavna funkcija negaMax sa alfa-beta orezivanjem
+def negaMaxAlphaBeta(gs, depth, alpha, beta, turnMultiplier, allowNullMove=True):
+    searchStats['nodes'] += 1
+    if searchShouldStop():
+        return 0
+    # Remi: pozicija se već pojavila (u pretrazi je dovoljno prvo ponavljanje) ili pravilo 50 poteza;
+    # mat ima prednost nad pravilom 50 poteza, pa se tada prvo provjerava da li igrač na potezu ima potez
+    if gs.positionCounts.get(gs.zobristHash, 0) >= 2:
+        searchStats['drawCutoffs'] += 1
+        return STALEMATE
+    if gs.isFiftyMoveRule():
+        searchStats['moveGenCalls'] += 1
+        if not gs.getValidMoves() and gs.checkmate:
+            return -CHECKMATE
+        searchStats['drawCutoffs'] += 1
+        return STALEMATE
+    if depth <= 0:
+        # Na dubini 0 procijeni poziciju i vrati rezultat (ili nastavi sa uzimanjima)
+        if SEARCH_OPTIONS['quiescence']:
+            return quiescence(gs, alpha, beta, turnMultiplier, 0)
+        return turnMultiplier * evaluate(gs)
+
+    # Provjera transpozicijske tabele
+    alphaOrig = alpha
+    searchStats['ttProbes'] += 1
+    entry = transpositionTable.get(gs.zobristHash)
+    hashMoveID = None
+    if entry is not None:
+        searchStats['ttHits'] += 1
+        entryDepth, entryScore, entryFlag, hashMoveID = entry
+        if entryDepth >= depth and (entryFlag == TT_EXACT or
+                                    (entryFlag == TT_LOWER and entryScore >= beta) or
+                                    (entryFlag == TT_UPPER and entryScore <= alpha)):
+            searchStats['ttCutoffs'] += 1
+            return entryScore
+
+    searchStats['moveGenCalls'] += 1
     validMoves = gs.getValidMoves()
     if not validMoves:
         # Ako nema poteza, procijeni poziciju (mat ili remi)
-        return turnMultiplier * scoreBoard(gs)
+        return turnMultiplier * evaluate(gs)
+
+    # Završnica iz bitbaza: rezultat je poznat, pretraga se ovdje prekida (osim dobijene pozicije kad je i
+    # korijen u bitbazi, gdje pretraga dalje traži put do mata; skor bitbaze je tada statička evaluacija)
+    knownScore = None
+    if gs.pieceCount <= bitbase.MAX_PIECES:
+        knownScore = bitbaseScore(gs)
+        if knownScore is not None and (knownScore == STALEMATE or not searchLimits['bitbaseRoot']):
+            return turnMultiplier * knownScore
+
+    # Selektivne tehnike se ne primjenjuju u PV čvorovima (puni prozor) niti kad je igrač u šahu
+    inCheck = gs.inCheck
+    pvNode = beta - alpha > 1
+    staticEval = None
+    if not pvNode and not inCheck:
+        staticEval = turnMultiplier * (knownScore if knownScore is not None else evaluate(gs))
+
+        # Reverse futility: pozicija je toliko dobra da ni najbolji odgovor protivnika neće spustiti skor ispod beta
+        if SEARCH_OPTIONS['futility'] and depth < len(FUTILITY_MARGIN) and staticEval - FUTILITY_MARGIN[depth] >= beta:
+            searchStats['reverseFutilityPrunes'] += 1
+            return staticEval
+
+        # Null-move pruning: ako i nakon preskočenog poteza skor ostaje >= beta, grana se odsijeca
+        if (SEARCH_OPTIONS['nullMove'] and allowNullMove and depth >= NULL_MOVE_MIN_DEPTH
+                and staticEval >= beta and hasNonPawnMaterial(gs)):
+            gs.makeNullMove()
+            score = -negaMaxAlphaBeta(gs, depth - 1 - NULL_MOVE_REDUCTION, -beta, -beta + 1, -turnMultiplier, False)
+            gs.undoNullMove()
+            if score >= beta:
+                searchStats['nullMoveCutoffs'] += 1
+                return score
+
+    # Futility: blizu listova se mirni potezi ne pretražuju ako ni uz marginu ne mogu podići alpha
+    futile = (SEARCH_OPTIONS['futility'] and staticEval is not None and depth < len(FUTILITY_MARGIN)
+              and staticEval + FUTILITY_MARGIN[depth] <= alpha)
 
     maxScore = -CHECKMATE
-    for move in validMoves:
+    bestMoveID = None
+    for i, move in enumerate(orderMoves(gs, validMoves, hashMoveID)):
+        quiet = isQuietMove(move)
+        if futile and quiet and i > 0:
+            searchStats['futilityPrunes'] += 1
+            continue
+
         gs.makeMove(move)
-        score = -negaMaxAlphaBeta(gs, depth - 1, -beta, -alpha, -turnMultiplier)
+        if (SEARCH_OPTIONS['lateMoveReductions'] and quiet and not inCheck and not pvNode
+                and depth >= LMR_MIN_DEPTH and i >= LMR_MIN_MOVE_INDEX):
+            # LMR: kasni mirni potez se prvo pretražuje plićom null-window pretragom
+            searchStats['lmrSearches'] += 1
+            score = -negaMaxAlphaBeta(gs, depth - 2, -alpha - 1, -alpha, -turnMultiplier)
+            if score > alpha:
+                searchStats['lmrResearches'] += 1
+                score = principalVariationSearch(gs, depth - 1, alpha, beta, turnMultiplier, False)
+        else:
+            score = principalVariationSearch(gs, depth - 1, alpha, beta, turnMultiplier, i == 0)
         gs.undoMove()
+        if searchLimits['stopped']:
+            return 0
 
         if score > maxScore:
             maxScore = score
+            bestMoveID = move.moveID
         alpha = max(alpha, score)
 
         if alpha >= beta:  # Beta cut-off, preskače nepotrebne grane
+            searchStats['cutoffIndex'][min(i, CUTOFF_HISTOGRAM_SIZE - 1)] += 1
+            break
+
+    # Spremi rezultat u transpozicijsku tabelu (tabela se prazni kad se napuni)
+    if len(transpositionTable) >= TT_MAX_ENTRIES:
+        transpositionTable.clear()
+    if maxScore <= alphaOrig:
+        flag = TT_UPPER
+    elif maxScore >= beta:
+        flag = TT_LOWER
+    else:
+        flag = TT_EXACT
+    transpositionTable[gs.zobristHash] = (depth, maxScore, flag, bestMoveID)
+    searchStats['ttStores'] += 1
+    return maxScore
+
+
+# Quiescence pretraga: na listovima se nastavlja samo sa uzimanjima dok se pozicija ne smiri.
+# Uzimanja koja po SEE gube materijal se ne pretražuju.
+def quiescence(gs, alpha, beta, turnMultiplier, qDepth):
+    searchStats['qnodes'] += 1
+    if searchShouldStop():
+        return 0
+    # Potezi se generišu prije procjene da bi zastavice mat/pat bile ažurne za ovu poziciju
+    searchStats['moveGenCalls'] += 1
+    validMoves = gs.getValidMoves()
+    if validMoves and gs.pieceCount <= bitbase.MAX_PIECES:
+        score = bitbaseScore(gs)
+        if score is not None:
+            return turnMultiplier * score
+    standPat = turnMultiplier * evaluate(gs)
+    if not validMoves or standPat >= beta or qDepth >= QUIESCENCE_MAX_DEPTH:
+        return standPat
+    alpha = max(alpha, standPat)
+
+    captures = []
+    for move in validMoves:
+        if move.pieceCaptured != "--":
+            if staticExchange(gs, move) < 0:
+                searchStats['seePrunes'] += 1
+            else:
+                captures.append(move)
+    captures.sort(key=lambda m: -10 * abs(pieceScore[m.pieceCaptured]) + abs(pieceScore[m.pieceMoved]))
+
+    maxScore = standPat
+    for move in captures:
+        gs.makeMove(move)
+        score = -quiescence(gs, -beta, -alpha, -turnMultiplier, qDepth + 1)
+        gs.undoMove()
+        if score > maxScore:
+            maxScore = score
+        alpha = max(alpha, score)
+        if alpha >= beta:
             break
     return maxScore
 
@@ -142,75 +631,9 @@ def scoreMaterial(board):
     return score
 
 
-# Tabele za pozicijsku procjenu za svaku figuru po polju (heurističke vrijednosti)
-pawn_table = [
-    [0,   0,   0,   0,   0,   0,   0,   0],
-    [5,  10,  10, -20, -20, 10, 10,   5],
-    [5,  -5, -10,   0,   0,-10, -5,   5],
-    [0,   0,   0,  20,  20,  0,  0,   0],
-    [5,   5,  10,  25,  25, 10,  5,   5],
-    [10, 10,  20,  30,  30, 20, 10,  10],
-    [50, 50,  50,  50,  50, 50, 50,  50],
-    [0,   0,   0,   0,   0,  0,  0,   0]
-]
-
-knight_table = [
-    [-50, -40, -30, -30, -30, -30, -40, -50],
-    [-40, -20,   0,   5,   5,   0, -20, -40],
-    [-30,   5,  10,  15,  15, 10,   5, -30],
-    [-30,   0,  15,  20,  20, 15,   0, -30],
-    [-30,   5,  15,  20,  20, 15,   5, -30],
-    [-30,   0,  10,  15,  15, 10,   0, -30],
-    [-40, -20,   0,   0,   0,   0, -20, -40],
-    [-50, -40, -30, -30, -30, -30, -40, -50]
-]
-
-bishop_table = [
-    [-20, -10, -10, -10, -10, -10, -10, -20],
-    [-10,   5,   0,   0,   0,   0,   5, -10],
-    [-10,  10,  10,  10,  10,  10,  10, -10],
-    [-10,   0,  10,  10,  10,  10,   0, -10],
-    [-10,   5,   5,  10,  10,   5,   5, -10],
-    [-10,   0,   5,  10,  10,   5,   0, -10],
-    [-10,   0,   0,   0,   0,   0,   0, -10],
-    [-20, -10, -10, -10, -10, -10, -10, -20]
-]
-
-rook_table = [
-    [0,   0,   5,  10,  10,   5,   0,   0],
-    [-5,  0,   0,   0,   0,   0,   0,  -5],
-    [-5,  0,   0,   0,   0,   0,   0,  -5],
-    [-5,  0,   0,   0,   0,   0,   0,  -5],
-    [-5,  0,   0,   0,   0,   0,   0,  -5],
-    [-5,  0,   0,   0,   0,   0,   0,  -5],
-    [5,  10,  10,  10,  10,  10,  10,   5],
-    [0,   0,   0,   0,   0,   0,   0,   0]
-]
-
-queen_table = [
-    [-20, -10, -10,  -5,  -5, -10, -10, -20],
-    [-10,   0,   5,   0,   0,   0,   0, -10],
-    [-10,   5,   5,   5,   5,   5,   0, -10],
-    [0,     0,   5,   5,   5,   5,   0,  -5],
-    [-5,    0,   5,   5,   5,   5,   0,  -5],
-    [-10,   0,   5,   5,   5,   5,   0, -10],
-    [-10,   0,   0,   0,   0,   0,   0, -10],
-    [-20, -10, -10,  -5,  -5, -10, -10, -20]
-]
-
-king_table = [
-    [-30, -40, -40, -50, -50, -40, -40, -30],
-    [-30, -40, -40, -50, -50, -40, -40, -30],
-    [-30, -40, -40, -50, -50, -40, -40, -30],
-    [-30, -40, -40, -50, -50, -40, -40, -30],
-    [-20, -30, -30, -40, -40, -30, -30, -20],
-    [-10, -20, -20, -20, -20, -20, -20, -10],
-    [20,  20,   0,   0,   0,   0,  20,  20],
-    [20,  30,  10,   0,   0,  10,  30,  20]
-]
-
 # Funkcija koja računa ukupnu procjenu pozicije sa materijalom i pozicijskim bonusima
 def scoreBoard(gs):
+    searchStats['evalCalls'] += 1
     if gs.checkmate:
         # Ako je šah-mat, daj veliku vrijednost u korist pobjednika
         return -CHECKMATE if gs.whiteToMove else CHECKMATE
@@ -218,29 +641,79 @@ def scoreBoard(gs):
         # Remi daje neutralnu vrijednost
         return STALEMATE
 
-    score = 0
-    board = gs.board
-    # Prođi kroz svako polje i zbroji bodove za figuru i poziciju
-    for r in range(8):
-        for c in range(8):
-            piece = board[r][c]
-            if piece != "--":
-                color, piece_type = piece.split()
-                table_score = 0
-                # Dodaj pozicijske bodove zavisno od boje i tipa figure
-                if piece_type == "pawn":
-                    table_score = pawn_table[r][c] if color == "white" else -pawn_table[7 - r][c]
-                elif piece_type == "knight":
-                    table_score = knight_table[r][c] if color == "white" else -knight_table[7 - r][c]
-                elif piece_type == "bishop":
-                    table_score = bishop_table[r][c] if color == "white" else -bishop_table[7 - r][c]
-                elif piece_type == "rook":
-                    table_score = rook_table[r][c] if color == "white" else -rook_table[7 - r][c]
-                elif piece_type == "queen":
-                    table_score = queen_table[r][c] if color == "white" else -queen_table[7 - r][c]
-                elif piece_type == "king":
-                    table_score = king_table[r][c] if color == "white" else -king_table[7 - r][c]
-
-                material_score = pieceScore.get(piece, 0)
-                score += material_score + table_score
+    # Materijal i pozicione tabele za sredinu partije i završnicu (psqt.py) GameState održava inkrementalno;
+    # ovdje se samo miješaju po fazi igre, bez prolaska kroz tablu
+    score = taper(gs.mgScore, gs.egScore, gs.phase)
+    # Pješačka struktura iz pješačke hash tabele
+    score += evaluatePawns(gs, searchStats)
     return score
+
+
+# Skor završnice iz bitbaza (iz ugla bijelog) ili None ako za poziciju nema tabele. Dobijena pozicija vrijedi
+# BITBASE_WIN plus heuristika napretka (bliže matu ili promociji), a remi je remi bez obzira na materijal.
+# Poziva se tek kad igrač na potezu ima legalan potez, pa mat i pat ostaju CHECKMATE i STALEMATE.
+BITBASE_WIN = 600
+
+
+def bitbaseScore(gs):
+    result = bitbase.probe(gs)
+    if result is None:
+        return None
+    searchStats['bitbaseHits'] += 1
+    if result == 0:
+        return STALEMATE
+    return result * (BITBASE_WIN + bitbase.winProgress(gs))
+
+
+# Neuronska evaluacija (nnue.py): mreža se učitava jednom po procesu (useNnue), a bez fajla sa težinama se
+# koristi mreža napravljena iz pozicionih tabela. nnue (i NumPy) se uvozi tek kad se mreža prvi put koristi.
+nnueNetwork = None
+
+
+def useNnue(path=None):
+    global nnueNetwork
+    import nnue
+    nnueNetwork = nnue.loadWeights(path) if path else nnue.psqtNetwork()
+    return nnueNetwork
+
+
+# Procjena pozicije neuronskom mrežom iz akumulatora koji GameState održava inkrementalno
+def scoreNnue(gs):
+    searchStats['evalCalls'] += 1
+    if gs.checkmate:
+        return -CHECKMATE if gs.whiteToMove else CHECKMATE
+    elif gs.stalemate:
+        return STALEMATE
+    return gs.nnue.evaluate(gs)
+
+
+EVALUATORS = {'classic': scoreBoard, 'nnue': scoreNnue}
+evaluate = scoreBoard  # evaluacija trenutne pretrage (selectEvaluator)
+evaluatorName = 'classic'
+nnueAttachedTo = None  # stanje igre na koje je selectEvaluator priključio mrežu samo za trenutnu pretragu
+
+
+# Bira evaluaciju za pretragu; za "nnue" priključuje mrežu na stanje igre. Transpozicijska tabela se
+# prazni kad se evaluacija promijeni, jer skorovi dvije evaluacije nisu uporedivi.
+# Mreža priključena ovdje se otkači u endSearch, da akumulator ne usporava makeMove/undoMove pozivaocu.
+def selectEvaluator(gs, name):
+    global evaluate, evaluatorName, nnueAttachedTo
+    if name not in EVALUATORS:
+        raise ValueError(f"Nepoznata evaluacija '{name}', dostupne: {', '.join(EVALUATORS)}")
+    detachSearchNnue()  # ostatak pretrage prekinute izuzetkom
+    if name == 'nnue':
+        network = nnueNetwork if nnueNetwork is not None else useNnue()
+        if gs.nnue is not network:
+            gs.attachNnue(network)
+            nnueAttachedTo = gs
+    if name != evaluatorName:
+        transpositionTable.clear()
+        evaluatorName = name
+    evaluate = EVALUATORS[name]
+
+
+def detachSearchNnue():
+    global nnueAttachedTo
+    if nnueAttachedTo is not None:
+        nnueAttachedTo.attachNnue(None)
+        nnueAttachedTo = None
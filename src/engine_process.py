@@ -0,0 +1,220 @@
+"""
+Engine u zasebnom, dugovječnom procesu. UI (ili bilo koji drugi klijent) mu šalje poruke kroz
+multiprocessing.Pipe, pa pretraga nikad ne dijeli GIL sa pygame petljom, a transpozicijska tabela
+i ostali keševi engine-a ostaju topli između poteza. Jedan proces služi više tabli: zahtjevi se
+obrađuju redom, a novi zahtjev za istu tablu zamjenjuje onaj koji još čeka.
+
+Poruke su rječnici.
+UI -> engine:
+    {"type": "search", "id", "board", "fen", "moves", "engine", "movetime", "nodes", "depth", "iterations", "workers", "transpositions", "multipv", "evaluator", "mateNodes"}
+        fen je početna pozicija partije, a moves odigrani potezi u koordinatnoj notaciji (zbog ponavljanja)
+    {"type": "stop", "id"}
+    {"type": "quit"}
+engine -> UI:
+    {"type": "info", "id", "board", "bestMove", "depth" ili "iterations", "score", "nodes"}
+    {"type": "bestmove", "id", "board", "move", "stopped", "stats", "lines"}
+        lines (uz multipv > 1): najbolji potezi sa "san", "score" (negamax) ili "value" (MCTS), "depth", "nodes", "pv"
+    {"type": "error", "id", "board", "message"}
+"""
+
+import itertools
+import multiprocessing
+import time
+import traceback
+from collections import deque
+
+import ChessEngine
+import chessAI
+import monte_carlo_ai
+import MonteCarloNode
+
+INFO_INTERVAL = 0.1  # najviše jedna "info" poruka po zahtjevu u ovoliko sekundi
+
+
+class EngineServer:
+    def __init__(self, conn):
+        self.conn = conn
+        self.queue = deque()
+        self.running = True
+        self.current = None
+        self.currentStopped = False
+        self.lastInfo = 0.0
+
+    def send(self, message):
+        try:
+            self.conn.send(message)
+        except (BrokenPipeError, OSError):
+            self.disconnected()
+
+    # Klijent je zatvorio svoju stranu cijevi (npr. UI je ugašen): prekid pretrage i kraj procesa
+    def disconnected(self):
+        self.running = False
+        self.currentStopped = True
+
+    def receive(self, message):
+        kind = message.get("type")
+        if kind == "search":
+            # Zahtjev koji još čeka za istu tablu je zastario
+            for old in [r for r in self.queue if r.get("board") == message.get("board")]:
+                self.queue.remove(old)
+                self.send({"type": "bestmove", "id": old["id"], "board": old.get("board"), "move": None, "stopped": True})
+            self.queue.append(message)
+        elif kind == "stop":
+            if self.current is not None and self.current["id"] == message.get("id"):
+                self.currentStopped = True
+            for old in [r for r in self.queue if r["id"] == message.get("id")]:
+                self.queue.remove(old)
+                self.send({"type": "bestmove", "id": old["id"], "board": old.get("board"), "move": None, "stopped": True})
+        elif kind == "quit":
+            self.running = False
+            self.currentStopped = True
+
+    # Čita sve poruke koje su stigle tokom pretrage; True ako trenutnu pretragu treba prekinuti
+    def pollMessages(self):
+        try:
+            while self.running and self.conn.poll():
+                self.receive(self.conn.recv())
+        except (EOFError, OSError):
+            self.disconnected()
+        return self.currentStopped
+
+    def info(self, **fields):
+        now = time.time()
+        if now - self.lastInfo >= INFO_INTERVAL:
+            self.lastInfo = now
+            self.send(dict({"type": "info", "id": self.current["id"], "board": self.current.get("board")}, **fields))
+
+    def serve(self):
+        while self.running:
+            if not self.queue:
+                try:
+                    self.receive(self.conn.recv())
+                except (EOFError, OSError):
+                    self.disconnected()
+                continue
+            request = self.queue.popleft()
+            self.current, self.currentStopped = request, False
+            try:
+                self.send(self.search(request))
+            except Exception as e:
+                traceback.print_exc()
+                self.send({"type": "error", "id": request["id"], "board": request.get("board"), "message": str(e)})
+            self.current = None
+
+    def search(self, request):
+        gs = ChessEngine.GameState().loadFen(request.get("fen") or ChessEngine.START_FEN)
+        for notation in request.get("moves", []):
+            move = next(m for m in gs.getValidMoves() if m.getChessNotation() == notation)
+            gs.makeMove(move)
+        validMoves = gs.getValidMoves()
+        result = {"type": "bestmove", "id": request["id"], "board": request.get("board"), "move": None}
+        if not validMoves:
+            result["stopped"] = False
+            return result
+
+        engine = request.get("engine", "mcts")
+        movetime, nodes = request.get("movetime"), request.get("nodes")
+
+        def onProgress(iterations, best):
+            self.info(iterations=iterations, bestMove=best.getChessNotation())
+            return self.pollMessages()
+
+        def onIteration(depth, score, move, searchedNodes):
+            self.info(depth=depth, score=score, nodes=searchedNodes, bestMove=move.getChessNotation() if move else None)
+
+        multiPV = request.get("multipv", 1)
+        lines = None
+        if engine == "negamax":
+            depth = request.get("depth", 64 if movetime or nodes else chessAI.MAX_DEPTH)
+            evaluator = request.get("evaluator", "classic")
+            if multiPV > 1:
+                lines = chessAI.findMultiPV(gs, validMoves, multiPV, depth, timeLimit=movetime, nodeLimit=nodes,
+                                            stopCheck=self.pollMessages, onIteration=onIteration, evaluator=evaluator)
+                move = lines[0]["move"] if lines else None
+            else:
+                move = chessAI.findBestMoveNegaMax(gs, validMoves, depth, timeLimit=movetime, nodeLimit=nodes,
+                                                   stopCheck=self.pollMessages, onIteration=onIteration,
+                                                   evaluator=evaluator, mateNodes=request.get("mateNodes"))
+            stats = chessAI.lastSearchStats
+        elif engine == "mcts":
+            move = monte_carlo_ai.serial_mcts(gs, request.get("iterations", nodes or 300), time_limit=movetime,
+                                              on_progress=onProgress, transpositions=request.get("transpositions", True),
+                                              multipv=multiPV, mate_nodes=request.get("mateNodes"))
+            stats = monte_carlo_ai.last_search_stats
+            lines = monte_carlo_ai.last_search_lines
+        elif engine == "parallel_mcts":
+            move = monte_carlo_ai.parallel_mcts(gs, request.get("iterations", 300), request.get("workers", 4),
+                                                on_progress=onProgress, time_limit=movetime, multipv=multiPV)
+            stats = monte_carlo_ai.last_search_stats
+            lines = monte_carlo_ai.last_search_lines
+        elif engine == "uct":
+            move = MonteCarloNode.mcts(gs, request.get("iterations", nodes or 1000), time_limit=movetime,
+                                       on_progress=onProgress, transpositions=request.get("transpositions", False),
+                                       mate_nodes=request.get("mateNodes"))
+            stats = MonteCarloNode.last_search_stats
+        else:
+            raise ValueError(f"Nepoznat engine '{engine}'")
+
+        result["move"] = move.getChessNotation() if move is not None else None
+        result["stopped"] = self.currentStopped
+        result["stats"] = stats.toDict() if stats is not None else None
+        if multiPV > 1 and lines:
+            result["lines"] = chessAI.multiPVToDicts(gs, lines)
+        return result
+
+
+def engineMain(conn):
+    try:
+        EngineServer(conn).serve()
+    finally:
+        # Engine proces je vlasnik pula parallel_mcts radnika i gasi ga na izlazu (atexit se ne izvršava u multiprocessing procesu)
+        monte_carlo_ai.shutdown_worker_pool()
+        conn.close()
+
+
+# Klijentska strana: pokreće engine proces i šalje mu zahtjeve
+class EngineClient:
+    def __init__(self):
+        # forkserver/spawn: engine proces ne smije naslijediti stanje roditelja (SDL prozor i ekran iz pygame-a)
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        self.conn, childConn = context.Pipe()
+        # Nije daemon proces jer parallel_mcts pokreće svoje procese; gasi se porukom "quit" ili zatvaranjem cijevi
+        self.process = context.Process(target=engineMain, args=(childConn,))
+        self.process.start()
+        childConn.close()
+        self.requestIds = itertools.count(1)
+
+    # Šalje zahtjev za pretragu pozicije iz gs i vraća id zahtjeva; rezultat stiže kao "bestmove" poruka
+    def search(self, gs, board=0, engine="mcts", **limits):
+        requestId = next(self.requestIds)
+        self.conn.send(dict({
+            "type": "search",
+            "id": requestId,
+            "board": board,
+            "fen": gs.startFen,
+            "moves": [m.getChessNotation() for m in gs.moveLog],
+            "engine": engine,
+        }, **limits))
+        return requestId
+
+    def stop(self, requestId):
+        self.conn.send({"type": "stop", "id": requestId})
+
+    # Sve poruke koje su stigle, bez blokiranja (ili najviše timeout sekundi čekanja na prvu)
+    def poll(self, timeout=0):
+        messages = []
+        if self.conn.poll(timeout):
+            while self.conn.poll():
+                messages.append(self.conn.recv())
+        return messages
+
+    def close(self):
+        try:
+            self.conn.send({"type": "quit"})
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.conn.close()
@@ -0,0 +1,409 @@
+"""
+Asyncio server koji istovremeno vodi mnogo partija protiv engine-a (lokalni TCP ili Unix socket).
+
+Protokol je jedna JSON poruka po liniji; svaki zahtjev može imati "id" koji se vraća u odgovoru,
+a odgovori na "go" i "eval" stižu kad budu gotovi (ne nužno redom).
+    {"cmd": "new", "fen"?}                                   -> {"session"}
+    {"cmd": "move", "session", "move": "e2e4"}               -> {"ok", "fen"}
+    {"cmd": "go", "session", "movetime"?, "nodes"?, "depth"?, "deadline"?, "multipv"?}
+                                                             -> {"bestMove", "san", "score", "queueMs", "searchMs", "lines"?}
+    {"cmd": "eval", "session"}                               -> {"score"}
+    {"cmd": "close", "session"}  /  {"cmd": "stats"}
+
+Pretrage idu u ograničen pul procesa. Raspoređivač uzima zahtjeve kružno po sesijama, pa jedna sesija
+sa mnogo zahtjeva ne može izgladniti ostale. "deadline" (sekunde od prijema) važi i za čekanje u redu:
+zahtjev kojem rok istekne prije početka pretrage odbija se, a vrijeme pretrage se skraćuje na preostali rok.
+Statičke evaluacije iz više sesija spajaju se u jedan zadatak za pul (do EVAL_BATCH_SIZE pozicija).
+"stats" vraća kašnjenje u redu, trajanje pretraga, propusnost i prosječnu veličinu paketa evaluacija.
+
+Primjer:
+    python src/engine_server.py serve --port 8765 --workers 4
+    python src/engine_server.py bench --sessions 32 --moves 3 --movetime 0.2 --workers 4
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import multiprocessing
+import os
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+
+import ChessEngine
+import chessAI
+from monte_carlo_ai import encode_position, decode_position
+
+EVAL_BATCH_SIZE = 64
+DEADLINE_MARGIN = 0.05  # sekunde rezerve za slanje rezultata nazad
+LATENCY_SAMPLES = 2000  # koliko zadnjih mjerenja se čuva za percentile
+
+
+# --- Zadaci koji se izvršavaju u procesima pula ---
+
+def searchTask(payload, movetime, nodes, depth, multiPV=1):
+    gs = decode_position(payload)
+    validMoves = gs.getValidMoves()
+    start = time.perf_counter()
+    lines = None
+    if multiPV > 1:
+        lines = chessAI.findMultiPV(gs, validMoves, multiPV, depth, timeLimit=movetime, nodeLimit=nodes)
+        move = lines[0]["move"] if lines else validMoves[0]
+    else:
+        move = chessAI.findBestMoveNegaMax(gs, validMoves, depth, timeLimit=movetime, nodeLimit=nodes)
+    stats = chessAI.lastSearchStats
+    score = stats.iterations[-1][2] if stats.iterations else 0
+    result = {
+        "bestMove": move.getChessNotation(),
+        "san": gs.moveToSan(move, validMoves),
+        "score": score * (1 if gs.whiteToMove else -1),  # iz ugla bijelog
+        "nodes": stats.counters["nodes"] + stats.counters["qnodes"],
+        "searchMs": (time.perf_counter() - start) * 1000,
+    }
+    if lines:
+        result["lines"] = chessAI.multiPVToDicts(gs, lines)
+    return result
+
+
+def evalBatchTask(payloads):
+    return [chessAI.scoreBoard(decode_position(payload)) for payload in payloads]
+
+
+# --- Server ---
+
+class Job:
+    def __init__(self, session, kind, payload, options, deadline):
+        self.session = session
+        self.kind = kind
+        self.payload = payload
+        self.options = options
+        self.deadline = deadline
+        self.enqueued = time.perf_counter()
+        self.future = asyncio.get_running_loop().create_future()
+
+
+class EngineServer:
+    def __init__(self, workers=os.cpu_count(), cachePath=None):
+        self.workers = workers
+        # forkserver/spawn: procesi pula ne smiju naslijediti otvorene sockete klijenata (inače zatvaranje
+        # veze na strani klijenta ne bi stiglo do servera)
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        self.executor = ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                            initializer=chessAI.useAnalysisCache, initargs=(cachePath,))
+        self.sessions = {}
+        self.sessionIds = itertools.count(1)
+        self.queues = OrderedDict()  # sesija -> red poslova; redoslijed određuje ko je sljedeći na redu
+        self.jobAdded = asyncio.Event()
+        self.slots = asyncio.Semaphore(workers)
+        self.started = time.perf_counter()
+        self.metrics = {"completed": 0, "expired": 0, "failed": 0, "evalBatches": 0, "evalPositions": 0}
+        self.queueLatency = deque(maxlen=LATENCY_SAMPLES)
+        self.serviceTime = deque(maxlen=LATENCY_SAMPLES)
+        self.dispatcher = None
+        self.listener = None
+        self.clientTasks = set()
+
+    async def start(self, host="127.0.0.1", port=8765, unixPath=None):
+        # Svi procesi pula se pokreću odmah, da prvi zahtjevi ne čekaju na njihovo pokretanje
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.executor, evalBatchTask, []) for _ in range(self.workers)))
+        self.dispatcher = asyncio.create_task(self.dispatch())
+        if unixPath:
+            self.listener = await asyncio.start_unix_server(self.handleClient, path=unixPath)
+        else:
+            self.listener = await asyncio.start_server(self.handleClient, host, port)
+        return self.listener
+
+    # Zatvara socket, čeka da klijenti koji su se odjavili završe i gasi pul
+    async def stop(self, timeout=1.0):
+        if self.listener is not None:
+            self.listener.close()
+        if self.clientTasks:
+            await asyncio.wait(self.clientTasks, timeout=timeout)
+        self.close()
+
+    def close(self):
+        if self.dispatcher is not None:
+            self.dispatcher.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    # --- Raspoređivanje ---
+
+    def enqueue(self, job):
+        self.queues.setdefault(job.session, deque()).append(job)
+        self.jobAdded.set()
+        return job.future
+
+    # Sljedeći posao kružno po sesijama: sesija čiji je posao uzet ide na kraj reda
+    def nextJob(self):
+        while self.queues:
+            session, queue = next(iter(self.queues.items()))
+            job = queue.popleft()
+            if queue:
+                self.queues.move_to_end(session)
+            else:
+                del self.queues[session]
+            if job.deadline is not None and time.perf_counter() >= job.deadline:
+                self.metrics["expired"] += 1
+                job.future.set_exception(TimeoutError("deadline exceeded while queued"))
+                continue
+            return job
+        return None
+
+    # Evaluacije sa početka redova drugih sesija idu u isti paket
+    def collectEvalBatch(self, first):
+        batch = [first]
+        for session in list(self.queues):
+            if len(batch) >= EVAL_BATCH_SIZE:
+                break
+            queue = self.queues[session]
+            while queue and queue[0].kind == "eval" and len(batch) < EVAL_BATCH_SIZE:
+                batch.append(queue.popleft())
+            if not queue:
+                del self.queues[session]
+        return batch
+
+    async def dispatch(self):
+        while True:
+            await self.slots.acquire()
+            job = self.nextJob()
+            while job is None:
+                self.jobAdded.clear()
+                await self.jobAdded.wait()
+                job = self.nextJob()
+            asyncio.create_task(self.run(job))
+
+    async def run(self, job):
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        try:
+            if job.kind == "eval":
+                batch = self.collectEvalBatch(job)
+                for j in batch:
+                    self.queueLatency.append(started - j.enqueued)
+                scores = await loop.run_in_executor(self.executor, evalBatchTask, [j.payload for j in batch])
+                self.metrics["evalBatches"] += 1
+                self.metrics["evalPositions"] += len(batch)
+                for j, score in zip(batch, scores):
+                    self.metrics["completed"] += 1
+                    if not j.future.done():
+                        j.future.set_result({"score": score})
+            else:
+                self.queueLatency.append(started - job.enqueued)
+                movetime = job.options.get("movetime")
+                if job.deadline is not None:
+                    remaining = max(0.01, job.deadline - started - DEADLINE_MARGIN)
+                    movetime = min(movetime, remaining) if movetime else remaining
+                nodes = job.options.get("nodes")
+                depth = job.options.get("depth", 64 if movetime or nodes else chessAI.MAX_DEPTH)
+                result = await loop.run_in_executor(self.executor, searchTask, job.payload, movetime, nodes, depth,
+                                                    job.options.get("multipv", 1))
+                result["queueMs"] = (started - job.enqueued) * 1000
+                self.metrics["completed"] += 1
+                if not job.future.done():
+                    job.future.set_result(result)
+        except Exception as e:
+            self.metrics["failed"] += 1
+            if not job.future.done():
+                job.future.set_exception(e)
+        finally:
+            self.serviceTime.append(time.perf_counter() - started)
+            self.slots.release()
+
+    def stats(self):
+        def percentiles(samples):
+            if not samples:
+                return {"p50": None, "p95": None}
+            ordered = sorted(samples)
+            return {"p50": ordered[len(ordered) // 2] * 1000, "p95": ordered[int(len(ordered) * 0.95)] * 1000}
+
+        uptime = time.perf_counter() - self.started
+        return dict(self.metrics, **{
+            "sessions": len(self.sessions),
+            "queued": sum(len(q) for q in self.queues.values()),
+            "workers": self.workers,
+            "uptime": uptime,
+            "throughput": self.metrics["completed"] / uptime if uptime > 0 else 0.0,
+            "queueLatencyMs": percentiles(self.queueLatency),
+            "serviceMs": percentiles(self.serviceTime),
+            "avgEvalBatch": self.metrics["evalPositions"] / self.metrics["evalBatches"] if self.metrics["evalBatches"] else 0.0,
+        })
+
+    # --- Komande ---
+
+    async def handle(self, request):
+        cmd = request.get("cmd")
+        if cmd == "new":
+            sessionId = next(self.sessionIds)
+            gs = ChessEngine.GameState()
+            if request.get("fen"):
+                gs.loadFen(request["fen"])
+            self.sessions[sessionId] = gs
+            return {"session": sessionId}
+        if cmd == "stats":
+            return self.stats()
+
+        gs = self.sessions.get(request.get("session"))
+        if gs is None:
+            raise KeyError(f"unknown session {request.get('session')}")
+        if cmd == "move":
+            move = next((m for m in gs.getValidMoves() or [] if m.getChessNotation() == request.get("move")), None)
+            if move is None:
+                raise ValueError(f"illegal move {request.get('move')}")
+            gs.makeMove(move)
+            gs.getValidMoves()
+            return {"ok": True, "fen": gs.getFen(), "result": gs.drawReason() if gs.isDraw() else
+                    "checkmate" if gs.checkmate else "stalemate" if gs.stalemate else None}
+        if cmd in ("go", "eval"):
+            if cmd == "go" and not gs.getValidMoves():
+                raise ValueError("game is over")
+            deadline = time.perf_counter() + request["deadline"] if request.get("deadline") else None
+            job = Job(request["session"], cmd, encode_position(gs), request, deadline)
+            return await self.enqueue(job)
+        if cmd == "close":
+            self.sessions.pop(request["session"], None)
+            return {"ok": True}
+        raise ValueError(f"unknown command {cmd}")
+
+    async def handleClient(self, reader, writer):
+        self.clientTasks.add(asyncio.current_task())
+        writeLock = asyncio.Lock()
+
+        async def respond(request):
+            try:
+                response = await self.handle(request)
+            except Exception as e:
+                response = {"error": str(e) or type(e).__name__}
+            if "id" in request:
+                response["id"] = request["id"]
+            async with writeLock:
+                writer.write((json.dumps(response) + "\n").encode())
+                await writer.drain()
+
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    request = {"cmd": None}
+                task = asyncio.create_task(respond(request))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            writer.close()
+            self.clientTasks.discard(asyncio.current_task())
+
+
+# --- Lokalni klijent ---
+
+class EngineServerClient:
+    def __init__(self, reader, writer):
+        self.reader, self.writer = reader, writer
+        self.requestIds = itertools.count(1)
+        self.pending = {}
+        self.receiver = asyncio.create_task(self.receive())
+
+    @classmethod
+    async def connect(cls, host="127.0.0.1", port=8765, unixPath=None):
+        if unixPath:
+            return cls(*await asyncio.open_unix_connection(unixPath))
+        return cls(*await asyncio.open_connection(host, port))
+
+    async def receive(self):
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                break
+            response = json.loads(line)
+            future = self.pending.pop(response.get("id"), None)
+            if future is not None and not future.done():
+                future.set_result(response)
+
+    async def request(self, cmd, **fields):
+        requestId = next(self.requestIds)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[requestId] = future
+        self.writer.write((json.dumps(dict(fields, cmd=cmd, id=requestId)) + "\n").encode())
+        await self.writer.drain()
+        return await future
+
+    async def close(self):
+        self.receiver.cancel()
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+# Opterećenje: mnogo sesija istovremeno traži poteze, engine igra obje strane
+async def runBench(sessions, moves, movetime, workers, report=print):
+    server = EngineServer(workers)
+    port = (await server.start(port=0)).sockets[0].getsockname()[1]
+    client = await EngineServerClient.connect(port=port)
+
+    async def play():
+        session = (await client.request("new"))["session"]
+        for _ in range(moves):
+            result = await client.request("go", session=session, movetime=movetime, deadline=movetime * sessions)
+            if "error" in result:
+                continue
+            await client.request("eval", session=session)
+            if (await client.request("move", session=session, move=result["bestMove"])).get("result"):
+                break
+        await client.request("close", session=session)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(play() for _ in range(sessions)))
+    elapsed = time.perf_counter() - start
+    stats = await client.request("stats")
+    report(f"{sessions} sesija x {moves} poteza za {elapsed:.1f} s, {stats['completed'] / elapsed:.1f} zahtjeva/s "
+           f"({workers} procesa)")
+    report(f"čekanje u redu p50 {stats['queueLatencyMs']['p50']:.0f} ms, p95 {stats['queueLatencyMs']['p95']:.0f} ms; "
+           f"obrada p50 {stats['serviceMs']['p50']:.0f} ms; isteklo {stats['expired']}, "
+           f"prosječan paket evaluacija {stats['avgEvalBatch']:.1f}")
+    await client.close()
+    await server.stop()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Asyncio server za više istovremenih partija")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--unix", default=None, help="putanja Unix socketa umjesto TCP-a")
+    serve.add_argument("--workers", type=int, default=os.cpu_count())
+    serve.add_argument("--cache", default=None, help="trajni keš analiza koji dijele procesi pula")
+    bench = commands.add_parser("bench")
+    bench.add_argument("--sessions", type=int, default=16)
+    bench.add_argument("--moves", type=int, default=3)
+    bench.add_argument("--movetime", type=float, default=0.2)
+    bench.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        asyncio.run(runBench(args.sessions, args.moves, args.movetime, args.workers))
+        return
+
+    async def serveForever():
+        server = EngineServer(args.workers, args.cache)
+        listener = await server.start(args.host, args.port, args.unix)
+        print(f"Server sluša na {args.unix or f'{args.host}:{args.port}'} ({args.workers} procesa)")
+        try:
+            async with listener:
+                await listener.serve_forever()
+        finally:
+            server.close()
+
+    asyncio.run(serveForever())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Benchmark taktičkih pozicija iz EPD fajlova (operacije "bm" i "am", npr. Win-at-Chess).
+Za svaki engine i poziciju bilježi da li je riješena, vrijeme i broj čvorova do rješenja
+(trenutak od kojeg engine do kraja pretrage ostaje na tačnom potezu). Rezultati se spremaju
+u JSON i mogu se porediti sa ranijim pokretanjem da bi se odmah vidjela regresija.
+
+Primjer:
+    python src/epd_bench.py --engines negamax,mcts --movetime 5 --out wac.json --compare wac_old.json
+"""
+
+import argparse
+import json
+import os
+import time
+
+import ChessEngine
+import chessAI
+import monte_carlo_ai
+import MonteCarloNode
+
+DEFAULT_SUITE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "epd", "wac.epd")
+
+
+# Parsira jednu EPD liniju: (FEN, {operacija: lista argumenata})
+def parseEpdLine(line):
+    fields = line.split()
+    fen = " ".join(fields[:4]) + " 0 1"
+    operations = {}
+    for op in " ".join(fields[4:]).split(";"):
+        parts = op.split()
+        if parts:
+            operations[parts[0]] = [arg.strip('"') for arg in parts[1:]]
+    return fen, operations
+
+
+def loadEpd(path):
+    positions = []
+    with open(path) as f:
+        for line in f:
+            if line.strip() and not line.startswith("#"):
+                positions.append(parseEpdLine(line))
+    return positions
+
+
+# Da li je potez (koordinatna notacija) tačan: mora biti među "bm", a ne smije biti među "am"
+def isCorrect(notation, bestMoves, avoidMoves):
+    if notation is None:
+        return False
+    if bestMoves and notation not in bestMoves:
+        return False
+    return notation not in avoidMoves
+
+
+# Pokreće engine nad pozicijom; vraća konačni potez i listu (sekunde, čvorovi, potez) za svaku promjenu mišljenja
+def searchPosition(engine, gs, movetime, nodes):
+    validMoves = gs.getValidMoves()
+    if engine == "negamax":
+        move = chessAI.findBestMoveNegaMax(gs, validMoves, 64 if movetime or nodes else chessAI.MAX_DEPTH,
+                                           timeLimit=movetime, nodeLimit=nodes)
+        stats = chessAI.lastSearchStats
+        timeline = [(it[3], it[1], it[4]) for it in stats.iterations if it[4] is not None]
+        return move, timeline
+
+    timeline = []
+    start = time.time()
+
+    def onProgress(iterations, best):
+        notation = best.getChessNotation()
+        if not timeline or timeline[-1][2] != notation:
+            timeline.append((time.time() - start, iterations, notation))
+
+    if engine == "mcts":
+        move = monte_carlo_ai.serial_mcts(gs, nodes or 10 ** 9, time_limit=movetime, on_progress=onProgress)
+    else:
+        move = MonteCarloNode.mcts(gs, nodes or 10 ** 9, time_limit=movetime, on_progress=onProgress)
+    return move, timeline
+
+
+def runSuite(positions, engine, movetime, nodes, report=print):
+    results = []
+    for index, (fen, operations) in enumerate(positions):
+        gs = ChessEngine.GameState().loadFen(fen)
+        validMoves = gs.getValidMoves() or []
+        # bm/am su u SAN notaciji; pretvaraju se u koordinatnu notaciju poteza ovog engine-a
+        bestMoves = [m.getChessNotation() for m in map(lambda san: gs.sanToMove(san, validMoves), operations.get("bm", [])) if m]
+        avoidMoves = [m.getChessNotation() for m in map(lambda san: gs.sanToMove(san, validMoves), operations.get("am", [])) if m]
+        positionId = (operations.get("id") or [str(index + 1)])[0]
+
+        # Svaka pozicija počinje sa praznom transpozicionom tabelom, da rezultat ne zavisi od redoslijeda
+        chessAI.transpositionTable.clear()
+        try:
+            move, timeline = searchPosition(engine, gs, movetime, nodes)
+        except Exception as e:
+            # Greška engine-a obara samo ovu poziciju, ne cijeli benchmark
+            results.append({
+                "id": positionId,
+                "move": None,
+                "solved": False,
+                "timeToSolution": None,
+                "nodesToSolution": None,
+                "error": f"{type(e).__name__}: {e}",
+            })
+            report(f"  {engine:<8} {positionId:<10} {'-':<6} GREŠKA ({type(e).__name__}: {e})")
+            continue
+        notation = move.getChessNotation() if move is not None else None
+        solved = isCorrect(notation, bestMoves, avoidMoves)
+
+        # Rješenje je prvi trenutak nakon kojeg engine više ne mijenja mišljenje sa tačnog poteza
+        timeToSolution = nodesToSolution = None
+        if solved:
+            for seconds, count, candidate in reversed(timeline):
+                if not isCorrect(candidate, bestMoves, avoidMoves):
+                    break
+                timeToSolution, nodesToSolution = seconds, count
+        results.append({
+            "id": positionId,
+            "move": notation,
+            "solved": solved,
+            "timeToSolution": timeToSolution,
+            "nodesToSolution": nodesToSolution,
+        })
+        report(f"  {engine:<8} {positionId:<10} {notation or '-':<6} {'OK' if solved else '--'}"
+               + (f"  {timeToSolution:.2f} s, {nodesToSolution} čvorova" if solved and timeToSolution is not None else ""))
+    return results
+
+
+def summarize(results):
+    solved = [r for r in results if r["solved"]]
+    times = [r["timeToSolution"] for r in solved if r["timeToSolution"] is not None]
+    return {
+        "solved": len(solved),
+        "total": len(results),
+        "errors": sum(1 for r in results if r.get("error")),
+        "totalTimeToSolution": sum(times),
+        "positions": results,
+    }
+
+
+# Poređenje sa ranijim rezultatima: broj riješenih i pozicije koje su prestale biti riješene
+def compare(current, previous, report=print):
+    for engine, summary in current["engines"].items():
+        old = previous.get("engines", {}).get(engine)
+        if old is None:
+            continue
+        report(f"{engine}: riješeno {old['solved']} -> {summary['solved']}, "
+               f"ukupno vrijeme do rješenja {old['totalTimeToSolution']:.2f} s -> {summary['totalTimeToSolution']:.2f} s")
+        oldById = {p["id"]: p for p in old["positions"]}
+        for position in summary["positions"]:
+            before = oldById.get(position["id"])
+            if before and before["solved"] and not position["solved"]:
+                report(f"  REGRESIJA {position['id']}: više nije riješena ({position['move']})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EPD benchmark: riješene pozicije, vrijeme i čvorovi do rješenja")
+    parser.add_argument("suite", nargs="?", default=DEFAULT_SUITE)
+    parser.add_argument("--engines", default="negamax,mcts", help="lista engine-a: negamax, mcts, uct")
+    parser.add_argument("--movetime", type=float, default=None, help="sekunde po poziciji")
+    parser.add_argument("--nodes", type=int, default=None, help="čvorovi (ili MCTS iteracije) po poziciji")
+    parser.add_argument("--out", default=None, help="JSON fajl za rezultate")
+    parser.add_argument("--compare", default=None, help="raniji JSON rezultat za poređenje")
+    args = parser.parse_args()
+    if args.movetime is None and args.nodes is None:
+        args.movetime = 5.0
+
+    positions = loadEpd(args.suite)
+    result = {
+        "suite": os.path.basename(args.suite),
+        "movetime": args.movetime,
+        "nodes": args.nodes,
+        "engines": {},
+    }
+    for engine in args.engines.split(","):
+        print(f"{engine}: {len(positions)} pozicija")
+        summary = summarize(runSuite(positions, engine, args.movetime, args.nodes))
+        result["engines"][engine] = summary
+        print(f"{engine}: riješeno {summary['solved']}/{summary['total']}, "
+              f"ukupno vrijeme do rješenja {summary['totalTimeToSolution']:.2f} s"
+              + (f", grešaka {summary['errors']}" if summary["errors"] else "") + "\n")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(result, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(result, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+"""
+Baza partija: append-only binarni fajl (<putanja>.bin) sa indeksom offseta (<putanja>.idx).
+
+Svaka partija je jedan zapis:
+    zaglavlje  <IBHH  dužina zapisa, rezultat, dužina tagova, broj poteza
+    tagovi     JSON (UTF-8), PGN tagovi partije (npr. White, Black, Date, FEN za početnu poziciju)
+    potezi     <H po potezu: polazno polje | krajnje polje << 6 | promocija << 12
+
+Indeks je niz <Q offseta (8 bajtova po partiji), pa je pristup n-toj partiji jedan seek, a dodavanje
+partije ne zahtijeva skeniranje direktorija ni čitanje postojećih partija. Ako je program prekinut
+usred upisa, pri otvaranju se indeks dopunjava, a nepotpun zapis na kraju odsijeca.
+
+Primjer:
+    python src/game_store.py import log          # uvoz starih log/gameN.txt fajlova
+    python src/game_store.py export partije.pgn  # izvoz cijele baze u PGN
+"""
+
+import argparse
+import json
+import os
+import re
+import struct
+from collections import namedtuple
+
+import ChessEngine
+
+DEFAULT_STORE = os.path.join("log", "games")
+FILE_MAGIC = b"CHGSTOR1"
+RECORD_HEADER = struct.Struct("<IBHH")
+INDEX_ENTRY = struct.Struct("<Q")
+
+RESULTS = ("*", "1-0", "0-1", "1/2-1/2")
+PROMOTIONS = ("queen", "rook", "bishop", "knight")
+PROMOTION_LETTERS = "qrbn"
+
+GameRecord = namedtuple("GameRecord", ["headers", "moves", "result"])
+
+
+# Potez (Move ili koordinatna notacija "e2e4" / "e7e8n") -> 16-bitni kod
+def encodeMove(move):
+    if isinstance(move, ChessEngine.Move):
+        promotion = PROMOTIONS.index(move.promotionPiece) if move.isPawnPromotion else 0
+        startSq, endSq = move.startRow * 8 + move.startCol, move.endRow * 8 + move.endCol
+    else:
+        startSq = ChessEngine.Move.ranksToRows[move[1]] * 8 + ChessEngine.Move.filesToCols[move[0]]
+        endSq = ChessEngine.Move.ranksToRows[move[3]] * 8 + ChessEngine.Move.filesToCols[move[2]]
+        promotion = PROMOTION_LETTERS.index(move[4]) if len(move) > 4 else 0
+    return startSq | endSq << 6 | promotion << 12
+
+
+# 16-bitni kod -> koordinatna notacija; slovo figure se dodaje samo za promociju u figuru koja nije dama
+def decodeMove(code):
+    startSq, endSq = code & 63, code >> 6 & 63
+    notation = ChessEngine.Move.colsToFiles[startSq % 8] + ChessEngine.Move.rowsToRanks[startSq // 8] + \
+        ChessEngine.Move.colsToFiles[endSq % 8] + ChessEngine.Move.rowsToRanks[endSq // 8]
+    if code >> 12:
+        notation += PROMOTION_LETTERS[code >> 12]
+    return notation
+
+
+def encodeRecord(moves, result="*", headers=None):
+    tags = json.dumps(headers or {}, ensure_ascii=False).encode("utf-8")
+    codes = [encodeMove(m) for m in moves]
+    body = tags + struct.pack(f"<{len(codes)}H", *codes)
+    return RECORD_HEADER.pack(RECORD_HEADER.size + len(body), RESULTS.index(result), len(tags), len(codes)) + body
+
+
+def decodeRecord(data):
+    length, result, tagsLength, moveCount = RECORD_HEADER.unpack_from(data)
+    headers = json.loads(data[RECORD_HEADER.size:RECORD_HEADER.size + tagsLength].decode("utf-8"))
+    codes = struct.unpack_from(f"<{moveCount}H", data, RECORD_HEADER.size + tagsLength)
+    return GameRecord(headers, [decodeMove(code) for code in codes], RESULTS[result])
+
+
+class GameStore:
+    def __init__(self, path=DEFAULT_STORE):
+        self.binPath = path + ".bin"
+        self.indexPath = path + ".idx"
+        directory = os.path.dirname(self.binPath)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self.data = open(self.binPath, "a+b")
+        self.index = open(self.indexPath, "a+b")
+        if os.path.getsize(self.binPath) == 0:
+            self.data.write(FILE_MAGIC)
+            self.data.flush()
+        self.data.seek(0)
+        if self.data.read(len(FILE_MAGIC)) != FILE_MAGIC:
+            raise ValueError(f"{self.binPath} nije baza partija")
+        self.count, self.end = self.recover()
+
+    # Usklađuje indeks sa binarnim fajlom nakon eventualnog prekida usred upisa
+    def recover(self):
+        dataSize = os.path.getsize(self.binPath)
+        count = os.path.getsize(self.indexPath) // INDEX_ENTRY.size
+        end = len(FILE_MAGIC)
+        while count:
+            offset = self.offsetAt(count - 1)
+            if offset + RECORD_HEADER.size <= dataSize:
+                self.data.seek(offset)
+                end = offset + RECORD_HEADER.unpack(self.data.read(RECORD_HEADER.size))[0]
+                if end <= dataSize:
+                    break
+            count -= 1
+            end = len(FILE_MAGIC)
+        self.index.truncate(count * INDEX_ENTRY.size)
+
+        # Zapisi koji su upisani, a nisu stigli u indeks
+        while end + RECORD_HEADER.size <= dataSize:
+            self.data.seek(end)
+            length = RECORD_HEADER.unpack(self.data.read(RECORD_HEADER.size))[0]
+            if end + length > dataSize:
+                break
+            self.index.write(INDEX_ENTRY.pack(end))
+            count += 1
+            end += length
+        self.index.flush()
+        if end < dataSize:
+            self.data.truncate(end)
+        return count, end
+
+    def offsetAt(self, i):
+        self.index.seek(i * INDEX_ENTRY.size)
+        return INDEX_ENTRY.unpack(self.index.read(INDEX_ENTRY.size))[0]
+
+    # Dodaje partiju i vraća njen redni broj; potezi su Move objekti ili koordinatna notacija
+    def append(self, moves, result="*", headers=None):
+        record = encodeRecord(moves, result, headers)
+        self.data.seek(0, os.SEEK_END)
+        self.data.write(record)
+        self.data.flush()
+        self.index.seek(0, os.SEEK_END)
+        self.index.write(INDEX_ENTRY.pack(self.end))
+        self.index.flush()
+        self.end += len(record)
+        self.count += 1
+        return self.count - 1
+
+    def __len__(self):
+        return self.count
+
+    # Slučajan pristup n-toj partiji preko indeksa
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        self.data.seek(self.offsetAt(i))
+        header = self.data.read(RECORD_HEADER.size)
+        return decodeRecord(header + self.data.read(RECORD_HEADER.unpack(header)[0] - RECORD_HEADER.size))
+
+    # Sekvencijalno čitanje bez indeksa; u memoriji je samo trenutna partija
+    def __iter__(self):
+        end = self.end
+        with open(self.binPath, "rb", buffering=1 << 16) as f:
+            f.seek(len(FILE_MAGIC))
+            position = len(FILE_MAGIC)
+            while position < end:
+                header = f.read(RECORD_HEADER.size)
+                length = RECORD_HEADER.unpack(header)[0]
+                yield decodeRecord(header + f.read(length - RECORD_HEADER.size))
+                position += length
+
+    def close(self):
+        self.data.close()
+        self.index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Rezultat partije na osnovu završnog stanja ("*" ako partija nije završena)
+def resultOf(gs):
+    if gs.checkmate:
+        return "0-1" if gs.whiteToMove else "1-0"
+    if gs.stalemate or gs.isDraw():
+        return "1/2-1/2"
+    return "*"
+
+
+# Odigrava partiju od početne pozicije; vraća (stanje, lista Move objekata) do prvog nelegalnog poteza
+def replay(moves, fen=None):
+    gs = ChessEngine.GameState()
+    if fen:
+        gs.loadFen(fen)
+    played = []
+    for notation in moves:
+        validMoves = gs.getValidMoves() or []
+        move = next((m for m in validMoves if m.getChessNotation() == notation[:4]), None)
+        if move is None:
+            break
+        if move.isPawnPromotion and len(notation) > 4:
+            move.promotionPiece = PROMOTIONS[PROMOTION_LETTERS.index(notation[4])]
+        gs.makeMove(move)
+        played.append(move)
+    gs.getValidMoves()
+    return gs, played
+
+
+def toPgn(record):
+    headers = {"Event": "?", "Site": "?", "Date": "????.??.??", "Round": "?", "White": "?", "Black": "?"}
+    headers.update(record.headers)
+    headers["Result"] = record.result
+    if "FEN" in headers:
+        headers["SetUp"] = "1"
+    lines = [f'[{key} "{value}"]' for key, value in headers.items()]
+
+    gs = ChessEngine.GameState()
+    if "FEN" in headers:
+        gs.loadFen(headers["FEN"])
+    tokens = []
+    for notation in record.moves:
+        validMoves = gs.getValidMoves() or []
+        move = next((m for m in validMoves if m.getChessNotation() == notation[:4]), None)
+        if move is None:
+            break
+        if move.isPawnPromotion and len(notation) > 4:
+            move.promotionPiece = PROMOTIONS[PROMOTION_LETTERS.index(notation[4])]
+        if gs.whiteToMove or not tokens:
+            moveNumber = (gs.startPly + len(gs.moveLog)) // 2 + 1
+            tokens.append(f"{moveNumber}." if gs.whiteToMove else f"{moveNumber}...")
+        tokens.append(gs.moveToSan(move, validMoves))
+        gs.makeMove(move)
+    tokens.append(record.result)
+
+    # Tekst poteza se prelama na 80 znakova, kao u PGN standardu
+    movetext, line = [], ""
+    for token in tokens:
+        if line and len(line) + 1 + len(token) > 80:
+            movetext.append(line)
+            line = token
+        else:
+            line = f"{line} {token}" if line else token
+    movetext.append(line)
+    return "\n".join(lines) + "\n\n" + "\n".join(movetext) + "\n"
+
+
+def exportPgn(store, path):
+    with open(path, "w", encoding="utf-8") as f:
+        for record in store:
+            f.write(toPgn(record) + "\n")
+
+
+# Uvoz starih log/gameN.txt fajlova (jedan potez u koordinatnoj notaciji po liniji).
+# Stari logovi sadrže i poteze koji su poslije vraćeni (undo), pa se partija čita do prvog nelegalnog poteza.
+def importTextLogs(store, logDir="log"):
+    names = [n for n in os.listdir(logDir) if re.fullmatch(r"game\d+\.txt", n)]
+    imported = 0
+    for name in sorted(names, key=lambda n: int(n[4:-4])):
+        with open(os.path.join(logDir, name)) as f:
+            moves = [line.strip() for line in f if line.strip()]
+        gs, played = replay(moves)
+        if len(played) < len(moves):
+            print(f"{name}: nelegalan potez {moves[len(played)]} nakon {len(played)} poteza, ostatak se preskače")
+        store.append(played, resultOf(gs), {"Event": "Chess AI", "Site": name})
+        imported += 1
+    return imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Baza partija: uvoz starih logova, izvoz u PGN i pregled")
+    parser.add_argument("--store", default=DEFAULT_STORE, help="putanja baze bez ekstenzije")
+    commands = parser.add_subparsers(dest="command", required=True)
+    importParser = commands.add_parser("import", help="uvoz log/gameN.txt fajlova")
+    importParser.add_argument("logDir", nargs="?", default="log")
+    exportParser = commands.add_parser("export", help="izvoz u PGN")
+    exportParser.add_argument("pgn")
+    showParser = commands.add_parser("show", help="ispis jedne partije u PGN formatu")
+    showParser.add_argument("number", type=int)
+    commands.add_parser("info", help="broj partija i rezultati")
+    args = parser.parse_args()
+
+    with GameStore(args.store) as store:
+        if args.command == "import":
+            print(f"Uvezeno {importTextLogs(store, args.logDir)} partija, ukupno {len(store)}")
+        elif args.command == "export":
+            exportPgn(store, args.pgn)
+            print(f"Izvezeno {len(store)} partija u {args.pgn}")
+        elif args.command == "show":
+            print(toPgn(store[args.number]))
+        else:
+            results = {result: 0 for result in RESULTS}
+            plies = 0
+            for record in store:
+                results[record.result] += 1
+                plies += len(record.moves)
+            print(f"{len(store)} partija, {plies} poteza; " + ", ".join(f"{r}: {n}" for r, n in results.items()))
+
+
+if __name__ == "__main__":
+    main()
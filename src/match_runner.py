@@ -0,0 +1,275 @@
+"""
+Headless meč između dva engine-a: partije se igraju paralelno u zasebnim procesima iz skupa
+otvaranja (svako otvaranje dva puta, sa zamijenjenim bojama), a rezultat se prati kroz Elo razliku
+i SPRT test koji prekida meč čim je odluka statistički sigurna.
+
+Primjer:
+    python src/match_runner.py --engine-a negamax:depth=4 --engine-b mcts:iterations=200 --games 200 --workers 4 --movetime 1
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import random
+import time
+
+import ChessEngine
+import chessAI
+import monte_carlo_ai
+import MonteCarloNode
+from OpeningBook import OPENINGS
+from search_stats import GameStats, PhaseProfiler
+
+DEFAULT_OPENING_PLIES = 8
+DEFAULT_MAX_PLIES = 200  # partija duža od ovoga se proglašava remijem
+
+
+# Opis engine-a iz komandne linije: "ime:kljuc=vrijednost,kljuc=vrijednost", npr. "negamax:depth=4"
+def parseEngineSpec(spec):
+    name, _, params = spec.partition(":")
+    options = {}
+    for item in filter(None, params.split(",")):
+        key, _, value = item.partition("=")
+        options[key] = float(value) if "." in value else int(value)
+    if name not in ENGINES:
+        raise ValueError(f"Nepoznat engine '{name}', dostupni: {', '.join(ENGINES)}")
+    return name, options
+
+
+def playRandom(gs, validMoves, options, movetime, nodes):
+    return chessAI.findRandomMove(validMoves)
+
+
+def playMinimax(gs, validMoves, options, movetime, nodes):
+    return chessAI.bestMinMax(gs, validMoves, options.get("depth", 64 if movetime or nodes else chessAI.MAX_DEPTH),
+                              timeLimit=movetime, nodeLimit=nodes) or validMoves[0]
+
+
+def playNegamax(gs, validMoves, options, movetime, nodes):
+    return chessAI.findBestMoveNegaMax(gs, validMoves, options.get("depth", 64 if movetime or nodes else chessAI.MAX_DEPTH),
+                                       timeLimit=movetime, nodeLimit=nodes,
+                                       evaluator="nnue" if options.get("nnue") else "classic",
+                                       mateNodes=options.get("mate"))
+
+
+def playMcts(gs, validMoves, options, movetime, nodes):
+    return monte_carlo_ai.serial_mcts(gs, options.get("iterations", nodes or 300), time_limit=movetime,
+                                      transpositions=bool(options.get("transpositions", 1)),
+                                      early_stop=bool(options.get("early_stop", 1)),
+                                      extension=options.get("extension", monte_carlo_ai.TIME_EXTENSION),
+                                      mate_nodes=options.get("mate")) or validMoves[0]
+
+
+def playUct(gs, validMoves, options, movetime, nodes):
+    return MonteCarloNode.mcts(gs, options.get("iterations", nodes or 1000), time_limit=movetime,
+                               transpositions=bool(options.get("transpositions", 0)), mate_nodes=options.get("mate"))
+
+
+# Statistika zadnje pretrage za engine-e koji je bilježe (SearchStats)
+ENGINE_STATS = {
+    "negamax": lambda: chessAI.lastSearchStats,
+    "mcts": lambda: monte_carlo_ai.last_search_stats,
+    "uct": lambda: MonteCarloNode.last_search_stats,
+}
+
+ENGINES = {
+    "random": playRandom,
+    "minimax": playMinimax,
+    "negamax": playNegamax,
+    "mcts": playMcts,  # monte_carlo_ai (vođene simulacije)
+    "uct": playUct,    # MonteCarloNode (nasumične simulacije)
+}
+
+
+# Početne pozicije: prvih `plies` polupoteza svake linije iz knjige otvaranja
+def openingPositions(plies=DEFAULT_OPENING_PLIES):
+    fens = []
+    for firstMoves, lines in OPENINGS.items():
+        for line in lines:
+            gs = ChessEngine.GameState()
+            for notation in (list(firstMoves) + line)[:plies]:
+                move = next((m for m in gs.getValidMoves() or [] if m.getChessNotation() == notation), None)
+                if move is None:
+                    break
+                gs.makeMove(move)
+            fen = gs.getFen()
+            if fen not in fens:
+                fens.append(fen)
+    return fens
+
+
+# Inicijalizacija procesa u pulu: trajni keš analiza i težine neuronske evaluacije (ako su zadani)
+def initWorker(cachePath, nnuePath):
+    chessAI.useAnalysisCache(cachePath)
+    if nnuePath:
+        chessAI.useNnue(nnuePath)
+
+
+# Odigra jednu partiju; vraća (rezultat za engine A: 1 / 0.5 / 0, broj polupoteza, razlog kraja, statistika poteza)
+def playGame(task):
+    fen, engineA, engineB, aIsWhite, movetime, nodes, maxPlies, seed, collectStats = task
+    random.seed(seed)
+    gs = ChessEngine.GameState().loadFen(fen)
+    gameStats = {"A": GameStats(), "B": GameStats()}
+
+    def finish(result, plies, reason):
+        return result, plies, reason, {side: stats.moves for side, stats in gameStats.items()} if collectStats else None
+
+    for ply in range(maxPlies):
+        validMoves = gs.getValidMoves()
+        if not validMoves:
+            if gs.checkmate:
+                whiteWon = not gs.whiteToMove
+                return finish((1 if whiteWon == aIsWhite else 0), ply, "checkmate")
+            return finish(0.5, ply, "stalemate")
+        reason = gs.drawReason()
+        if reason:
+            return finish(0.5, ply, reason)
+        side = "A" if gs.whiteToMove == aIsWhite else "B"
+        name, options = engineA if side == "A" else engineB
+        try:
+            if collectStats and name in ENGINE_STATS:
+                with PhaseProfiler() as profiler:
+                    move = ENGINES[name](gs, validMoves, options, movetime, nodes)
+                stats = ENGINE_STATS[name]()
+                stats.phaseSeconds = dict(profiler.seconds)
+                gameStats[side].add(stats)
+            else:
+                move = ENGINES[name](gs, validMoves, options, movetime, nodes)
+        except Exception as e:
+            # Partija sa greškom engine-a nema rezultat (ne ulazi u Elo i SPRT), a meč se nastavlja
+            return finish(None, ply, f"engine error {side}: {type(e).__name__}: {e}")
+        gs.makeMove(move)
+    return finish(0.5, maxPlies, "max plies")
+
+
+# Upisuje statistiku svakog poteza i zbir po partiji za oba engine-a (JSON linije)
+def writeGameStats(path, gameIndex, moveStats):
+    with open(path, "a") as f:
+        for side, moves in moveStats.items():
+            game = GameStats()
+            for entry in moves:
+                game.add(entry)
+                f.write(json.dumps({"type": "move", "game": gameIndex, "side": side, **entry}) + "\n")
+            f.write(json.dumps({"type": "game", "game": gameIndex, "side": side, **game.toDict()}) + "\n")
+
+
+# Elo razlika iz očekivanog rezultata
+def eloFromScore(score):
+    score = min(max(score, 1e-6), 1 - 1e-6)
+    return -400 * math.log10(1 / score - 1) + 0.0
+
+
+def expectedScore(elo):
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+# Elo razlika sa 95% intervalom povjerenja
+def eloEstimate(wins, draws, losses):
+    n = wins + draws + losses
+    if n == 0:
+        return 0.0, 0.0
+    score = (wins + draws / 2) / n
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / n
+    margin = 1.96 * math.sqrt(variance / n)
+    return eloFromScore(score), (eloFromScore(score + margin) - eloFromScore(score - margin)) / 2
+
+
+# Log-likelihood ratio za SPRT (H0: elo = elo0, H1: elo = elo1), trinomni model sa normalnom aproksimacijom
+def sprtLLR(wins, draws, losses, elo0, elo1):
+    if wins == 0 or losses == 0:
+        # Regularizacija da varijansa ne bude nula na samom početku meča
+        wins, draws, losses = wins + 0.5, draws + 0.5, losses + 0.5
+    n = wins + draws + losses
+    score = (wins + draws / 2) / n
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / n
+    if variance <= 0:
+        return 0.0
+    s0, s1 = expectedScore(elo0), expectedScore(elo1)
+    return (s1 - s0) * (2 * score - s0 - s1) / (2 * variance / n)
+
+
+def sprtBounds(alpha, beta):
+    return math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+
+
+def runMatch(engineA, engineB, games, workers, movetime, nodes, elo0, elo1, alpha, beta,
+             openingPlies=DEFAULT_OPENING_PLIES, maxPlies=DEFAULT_MAX_PLIES, report=print, statsOut=None,
+             cachePath=None, nnuePath=None):
+    fens = openingPositions(openingPlies)
+    tasks = []
+    for i in range(games):
+        # Svako otvaranje se igra dva puta zaredom, sa zamijenjenim bojama
+        fen = fens[(i // 2) % len(fens)]
+        tasks.append((fen, engineA, engineB, i % 2 == 0, movetime, nodes, maxPlies, i, statsOut is not None))
+
+    lower, upper = sprtBounds(alpha, beta)
+    wins = draws = losses = errors = 0
+    verdict = None
+    start = time.time()
+    with multiprocessing.Pool(workers, initializer=initWorker, initargs=(cachePath, nnuePath)) as pool:
+        for gameIndex, (result, plies, reason, moveStats) in enumerate(pool.imap_unordered(playGame, tasks)):
+            if moveStats is not None:
+                writeGameStats(statsOut, gameIndex, moveStats)
+            if result is None:
+                errors += 1
+                report(f"[{wins + draws + losses + errors}/{games}] GREŠKA ({reason}, {plies} plies)")
+                continue
+            if result == 1:
+                wins += 1
+            elif result == 0:
+                losses += 1
+            else:
+                draws += 1
+            llr = sprtLLR(wins, draws, losses, elo0, elo1)
+            elo, margin = eloEstimate(wins, draws, losses)
+            report(f"[{wins + draws + losses + errors}/{games}] +{wins} ={draws} -{losses}  Elo {elo:+.1f} ± {margin:.1f}  "
+                   f"LLR {llr:.2f} [{lower:.2f}, {upper:.2f}]  ({reason}, {plies} plies)")
+            if llr >= upper:
+                verdict = "H1"
+                break
+            if llr <= lower:
+                verdict = "H0"
+                break
+        pool.terminate()
+
+    elo, margin = eloEstimate(wins, draws, losses)
+    return {
+        "wins": wins, "draws": draws, "losses": losses, "errors": errors,
+        "elo": elo, "eloMargin": margin,
+        "llr": sprtLLR(wins, draws, losses, elo0, elo1), "sprt": verdict,
+        "seconds": time.time() - start,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless meč između dva engine-a sa SPRT zaustavljanjem")
+    parser.add_argument("--engine-a", required=True, help="npr. negamax:depth=4")
+    parser.add_argument("--engine-b", required=True, help="npr. mcts:iterations=200")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--movetime", type=float, default=None, help="vrijeme po potezu u sekundama")
+    parser.add_argument("--nodes", type=int, default=None, help="broj čvorova (ili MCTS iteracija) po potezu")
+    parser.add_argument("--elo0", type=float, default=0.0)
+    parser.add_argument("--elo1", type=float, default=10.0)
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--beta", type=float, default=0.05)
+    parser.add_argument("--opening-plies", type=int, default=DEFAULT_OPENING_PLIES)
+    parser.add_argument("--max-plies", type=int, default=DEFAULT_MAX_PLIES)
+    parser.add_argument("--stats-out", default=None, help="JSONL fajl za statistiku pretrage po potezu i partiji")
+    parser.add_argument("--cache", default=None, help="trajni keš analiza (negamax), dijele ga svi procesi")
+    parser.add_argument("--nnue", default=None, help="težine neuronske evaluacije (.npz) za negamax:nnue=1")
+    args = parser.parse_args()
+
+    summary = runMatch(parseEngineSpec(args.engine_a), parseEngineSpec(args.engine_b), args.games, args.workers,
+                       args.movetime, args.nodes, args.elo0, args.elo1, args.alpha, args.beta,
+                       args.opening_plies, args.max_plies, statsOut=args.stats_out,
+                       cachePath=args.cache, nnuePath=args.nnue)
+    print(f"\n{args.engine_a} vs {args.engine_b}: +{summary['wins']} ={summary['draws']} -{summary['losses']}, "
+          f"Elo {summary['elo']:+.1f} ± {summary['eloMargin']:.1f}, SPRT: {summary['sprt'] or 'nema odluke'} "
+          f"({summary['seconds']:.1f} s)" + (f", partija sa greškom engine-a: {summary['errors']}" if summary['errors'] else ""))
+
+
+if __name__ == "__main__":
+    main()
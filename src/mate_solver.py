@@ -0,0 +1,280 @@
+"""
+Traženje forsiranog mata pretragom brojeva dokaza (df-pn, depth-first proof-number search).
+
+Igrač na potezu u korijenu je napadač: u njegovim čvorovima (OR) dovoljan je jedan potez koji vodi u mat,
+a u čvorovima branioca (AND) svaki legalan odgovor mora voditi u mat. Napadač podrazumijevano igra samo
+poteze koji daju šah (MateSolver(checksOnly=False) pretražuje sve njegove poteze), a branilac sve legalne
+odgovore. Svaki čvor ima dva broja: phi, koliko još listova treba riješiti da igrač na potezu uspije, i
+delta, koliko treba da ne uspije; phi = 0 znači da igrač na potezu uspijeva (napadač matira, odnosno
+branilac se spašava). Pretraga uvijek ide u dijete sa najmanjim brojem (najlakše za riješiti) i ostaje u
+njemu dok taj broj ne pređe prag izveden iz drugog najboljeg djeteta (sa 1 + EPSILON faktorom da se ne
+skače stalno između dva djeteta). Brojevi čvorova se čuvaju u vlastitoj tabeli ograničene veličine
+(ključ je zobristHash), a kad se napuni zadržavaju se samo riješeni čvorovi.
+
+Ponavljanje pozicije na trenutnoj liniji i linija duža od MAX_PLY računaju se kao neuspjeh napadača,
+pa pronađeni mat je uvijek stvaran, a poneki mat se može propustiti. Uz mat se čuva i udaljenost (polupotezi
+do mata po pronađenom dokazu): napadač bira najkraći riješeni nastavak, a branilac najduži. Prvi dokaz nije
+nužno najkraći, pa se nakon mata pretraga ponavlja sa kraćom najvećom dubinom dok god nalazi kraći mat.
+
+Pretraga se ograničava brojem čvorova i/ili vremenom i može se pokrenuti prije glavne pretrage
+(chessAI.findBestMoveNegaMax(mateNodes=...), monte_carlo_ai.serial_mcts(mate_nodes=...),
+MonteCarloNode.mcts(mate_nodes=...)) ili zasebno nad pozicijom ili EPD fajlom zadataka (operacija "dm"
+je broj poteza do mata, "bm" rješenje):
+    python src/mate_solver.py --nodes 200000                     # epd/mates.epd
+    python src/mate_solver.py --fen "6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1"
+"""
+
+import argparse
+import os
+import time
+
+import ChessEngine
+
+DEFAULT_SUITE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "epd", "mates.epd")
+INFINITY = 10 ** 9
+EPSILON = 0.25        # prag za dijete je (1 + EPSILON) * broj drugog najboljeg djeteta
+MAX_PLY = 100         # dublje linije se ne pretražuju (računaju se kao neuspjeh napadača)
+TABLE_MAX_ENTRIES = 1 << 20
+DEFAULT_NODES = 100000
+
+MATE, NO_MATE, UNKNOWN = "mate", "no mate", "unknown"
+
+
+class MateSolver:
+    def __init__(self, checksOnly=True, maxEntries=TABLE_MAX_ENTRIES):
+        self.checksOnly = checksOnly
+        self.maxEntries = maxEntries
+        # zobristHash -> (phi, delta, udaljenost do kraja u polupotezima)
+        self.table = {}
+        # zobristHash -> djeca čvora (expand); df-pn se često vraća u iste čvorove
+        self.expansions = {}
+        self.nodes = 0
+        self.maxPly = MAX_PLY
+
+    def clear(self):
+        self.table.clear()
+        self.expansions.clear()
+
+    def store(self, key, phi, delta, distance):
+        if len(self.table) >= self.maxEntries and key not in self.table:
+            # Riješeni čvorovi se zadržavaju, nerazriješeni se računaju ispočetka
+            self.table = {k: v for k, v in self.table.items() if v[0] == 0 or v[1] == 0}
+            if len(self.table) >= self.maxEntries // 2:
+                self.table.clear()
+        self.table[key] = (phi, delta, distance)
+
+    # Djeca čvora: lista [potez, zobristHash, phi, delta, udaljenost] (koristi se dok dijete nije u tabeli)
+    # ili par (phi, delta) za završni čvor. Šah koji odmah matira je riješen bez daljeg širenja, a za
+    # ostale šahove početni broj dokaza je broj odgovora branioca (manje odgovora, lakši dokaz).
+    def expand(self, gs, attacker):
+        children = self.expansions.get(gs.zobristHash)
+        if children is not None:
+            return children
+        validMoves = gs.getValidMoves()
+        if not validMoves:
+            if not attacker and gs.stalemate:
+                return 0, INFINITY  # pat spašava branioca
+            return INFINITY, 0      # napadač bez poteza ne matira, branilac bez poteza je matiran
+        children = []
+        for move in validMoves:
+            gs.makeMove(move)
+            if attacker:
+                inCheck = gs.checkForPinsAndChecks()[0]
+                if inCheck or not self.checksOnly:
+                    replies = gs.getValidMoves()
+                    if not replies:
+                        children.append([move, gs.zobristHash] + ([INFINITY, 0] if inCheck else [0, INFINITY]) + [0])
+                    else:
+                        children.append([move, gs.zobristHash, 1, len(replies), None])
+            else:
+                children.append([move, gs.zobristHash, 1, 1, None])
+            gs.undoMove()
+        if not children:
+            return INFINITY, 0
+        if len(self.expansions) >= self.maxEntries // 16:
+            self.expansions.clear()
+        self.expansions[gs.zobristHash] = children
+        return children
+
+    # Brojevi i udaljenost djeteta: ponavljanje na liniji i čvor dublji od maxPly su neuspjeh napadača
+    # (ne upisuju se u tabelu, jer zavise od linije)
+    def childEntry(self, child, childAttacker, path, ply):
+        if child[1] in path or ply > self.maxPly:
+            return (INFINITY, 0, None) if childAttacker else (0, INFINITY, None)
+        entry = self.table.get(child[1])
+        if entry is not None:
+            return entry
+        return child[2], child[3], child[4]
+
+    def shouldStop(self):
+        if self.stopped:
+            return True
+        if self.nodeLimit is not None and self.nodes >= self.nodeLimit:
+            self.stopped = True
+        elif self.deadline is not None and self.nodes & 255 == 0 and time.time() >= self.deadline:
+            self.stopped = True
+        return self.stopped
+
+    # Pretraga čvora dok phi ne dostigne thPhi ili delta ne dostigne thDelta
+    def mid(self, gs, thPhi, thDelta, attacker, path, ply):
+        self.nodes += 1
+        key = gs.zobristHash
+        children = self.expand(gs, attacker)
+        if isinstance(children, tuple):
+            self.store(key, children[0], children[1], 0)
+            return
+        path.add(key)
+        while True:
+            delta = 0
+            bestIndex, bestDelta, secondDelta, bestPhi = None, INFINITY, INFINITY, 0
+            for index, child in enumerate(children):
+                childPhi, childDelta, _ = self.childEntry(child, not attacker, path, ply + 1)
+                delta = min(delta + childPhi, INFINITY)
+                if childDelta < bestDelta:
+                    bestIndex, secondDelta, bestDelta, bestPhi = index, bestDelta, childDelta, childPhi
+                elif childDelta < secondDelta:
+                    secondDelta = childDelta
+            phi = bestDelta
+            if phi >= thPhi or delta >= thDelta or self.shouldStop():
+                break
+            childThPhi = INFINITY if thDelta >= INFINITY else thDelta - delta + bestPhi
+            childThDelta = min(thPhi, int(secondDelta * (1 + EPSILON)) + 1)
+            gs.makeMove(children[bestIndex][0])
+            self.mid(gs, childThPhi, childThDelta, not attacker, path, ply + 1)
+            gs.undoMove()
+        path.discard(key)
+        self.store(key, phi, delta, self.distance(children, not attacker, phi, delta, path, ply))
+
+    # Udaljenost riješenog čvora: igrač koji uspijeva bira najkraći put, onaj koji gubi najduži
+    def distance(self, children, childAttacker, phi, delta, path, ply):
+        if phi != 0 and delta != 0:
+            return None
+        distances = []
+        for child in children:
+            childPhi, childDelta, childDistance = self.childEntry(child, childAttacker, path, ply + 1)
+            if childDistance is not None and (childDelta == 0 if phi == 0 else childPhi == 0):
+                distances.append(childDistance)
+        if not distances:
+            return None
+        return 1 + (min(distances) if phi == 0 else max(distances))
+
+    # Glavna varijanta dokaza: napadač igra najkraći riješeni nastavak, branilac najduži
+    def principalVariation(self, gs, maxLength):
+        pv = []
+        attacker = True
+        for _ in range(maxLength):
+            children = self.expand(gs, attacker)
+            if isinstance(children, tuple):
+                break
+            best, bestDistance = None, None
+            for child in children:
+                childPhi, childDelta, childDistance = self.childEntry(child, not attacker, (), 0)
+                if childDistance is None or (childDelta if attacker else childPhi) != 0:
+                    continue
+                if best is None or (childDistance < bestDistance if attacker else childDistance > bestDistance):
+                    best, bestDistance = child[0], childDistance
+            if best is None:
+                break
+            gs.makeMove(best)
+            pv.append(best)
+            attacker = not attacker
+        for _ in pv:
+            gs.undoMove()
+        return pv
+
+    # Jedan prolaz df-pn od korijena sa novom tabelom; vraća (phi, delta, udaljenost) korijena
+    def prove(self, gs, maxPly):
+        self.table.clear()
+        self.maxPly = maxPly
+        self.mid(gs, INFINITY, INFINITY, True, set(), 0)
+        return self.table.get(gs.zobristHash, (1, 1, None))
+
+    # Da li igrač na potezu u gs forsira mat; vraća rječnik {result (MATE, NO_MATE ili UNKNOWN kad
+    # ograničenje prekine pretragu), move, mateIn (potezi napadača), plies, pv, nodes, seconds}.
+    # df-pn vraća prvi pronađeni dokaz, ne nužno najkraći: nakon mata u N polupoteza pretraga se ponavlja
+    # sa maxPly = N - 2 dok god nalazi kraći mat (i dok ima čvorova i vremena).
+    def solve(self, gs, nodeLimit=DEFAULT_NODES, timeLimit=None):
+        start = time.time()
+        self.nodes = 0
+        self.nodeLimit = nodeLimit
+        self.deadline = start + timeLimit if timeLimit is not None else None
+        self.stopped = False
+        self.expansions.clear()
+        # Zastavice pozicije se čuvaju jer ih getValidMoves u čvorovima pretrage prepisuje
+        saved = (gs.inCheck, gs.pins, gs.checks, gs.checkmate, gs.stalemate)
+        phi, delta, plies = self.prove(gs, MAX_PLY)
+        result = MATE if phi == 0 else NO_MATE if delta == 0 else UNKNOWN
+        pv = []
+        while result == MATE and plies is not None:
+            pv = self.principalVariation(gs, plies)
+            if plies <= 2 or self.stopped:
+                break
+            phi, _, shorter = self.prove(gs, plies - 2)
+            if phi != 0 or shorter is None or shorter >= plies:
+                break
+            plies = shorter
+        gs.inCheck, gs.pins, gs.checks, gs.checkmate, gs.stalemate = saved
+        return {
+            "result": result,
+            "move": pv[0] if pv else None,
+            "mateIn": (plies + 1) // 2 if result == MATE else None,
+            "plies": plies if result == MATE else None,
+            "pv": pv,
+            "nodes": self.nodes,
+            "seconds": time.time() - start,
+        }
+
+
+# Zajednički rješavač (samo šahovi) za pretragu prije glavne pretrage
+defaultSolver = MateSolver()
+
+
+def solve(gs, nodeLimit=DEFAULT_NODES, timeLimit=None):
+    return defaultSolver.solve(gs, nodeLimit, timeLimit)
+
+
+# Rješava sve pozicije EPD fajla; zadatak je riješen ako je mat pronađen u najviše "dm" poteza i
+# prvi potez je među "bm" (kad su zadani)
+def runSuite(positions, nodeLimit, timeLimit, checksOnly=True, report=print):
+    results = []
+    for index, (fen, operations) in enumerate(positions):
+        gs = ChessEngine.GameState().loadFen(fen)
+        validMoves = gs.getValidMoves() or []
+        bestMoves = [m.getChessNotation() for m in (gs.sanToMove(san, validMoves) for san in operations.get("bm", [])) if m]
+        expected = int(operations["dm"][0]) if "dm" in operations else None
+        positionId = (operations.get("id") or [str(index + 1)])[0]
+
+        found = MateSolver(checksOnly).solve(gs, nodeLimit, timeLimit)
+        notation = found["move"].getChessNotation() if found["move"] is not None else None
+        solved = (found["result"] == MATE and (expected is None or found["mateIn"] <= expected)
+                  and (not bestMoves or notation in bestMoves))
+        results.append({"id": positionId, "solved": solved, "expected": expected, **found,
+                        "move": notation, "pv": [m.getChessNotation() for m in found["pv"]]})
+        line = f"  {positionId:<10} {'OK' if solved else '--'} "
+        line += f"mat u {found['mateIn']}" if found["result"] == MATE else found["result"]
+        if expected is not None:
+            line += f" (dm {expected})"
+        report(line + f"  {' '.join(results[-1]['pv'])}  {found['nodes']} čvorova, {found['seconds']:.2f} s")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Traženje forsiranog mata (df-pn) za poziciju ili EPD fajl zadataka")
+    parser.add_argument("suite", nargs="?", default=DEFAULT_SUITE)
+    parser.add_argument("--fen", default=None, help="jedna pozicija umjesto EPD fajla")
+    parser.add_argument("--nodes", type=int, default=DEFAULT_NODES, help="najviše čvorova po poziciji")
+    parser.add_argument("--movetime", type=float, default=None, help="najviše sekundi po poziciji")
+    parser.add_argument("--all-moves", action="store_true", help="napadač igra i poteze bez šaha")
+    args = parser.parse_args()
+
+    # epd_bench uvozi engine-e (i chessAI, koji uvozi ovaj modul), pa se uvozi tek ovdje
+    from epd_bench import loadEpd
+    positions = [(args.fen, {})] if args.fen else loadEpd(args.suite)
+    results = runSuite(positions, args.nodes, args.movetime, not args.all_moves)
+    solved = [r for r in results if r["solved"]]
+    print(f"riješeno {len(solved)}/{len(results)}, ukupno {sum(r['nodes'] for r in results)} čvorova, "
+          f"{sum(r['seconds'] for r in results):.2f} s")
+
+
+if __name__ == "__main__":
+    main()
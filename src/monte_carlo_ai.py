@@ -1,59 +1,72 @@
 import random
 import math
 import time
-import traceback
-from concurrent.futures import ThreadPoolExecutor
+import contextlib
 import copy
+import itertools
+import os
+
+import ChessEngine
+import bitbase
+import mate_solver
+from search_stats import SearchStats
+from see import staticExchange, exchangeThreat
 
 CHECKMATE = 1000
 STALEMATE = 0
-MAX_SIM_THREADS = 8  # Adjustable based on CPU
-
+BATCHES_PER_WORKER = 4  # parallel_mcts splits the iterations into this many tasks per worker
+MCTS_TABLE_SIZE = 200000  # max nodes per search tree; once full, new leaves are only rolled out
+CLOSE_RACE_RATIO = 0.8  # runner-up with at least this share of the best move's visits is a close race
+VALUE_DROP = 0.05  # best move's value this far below its mid-search value counts as a drop
+TIME_EXTENSION = 0.5  # a search is extended at most once, by this fraction of its budget
+
+last_search_stats = None  # SearchStats of the most recent serial_mcts / parallel_mcts call
+last_search_lines = []  # root lines (most visited first) of the most recent serial_mcts / parallel_mcts call
+
+# One node per position. With transpositions on, every move order that reaches the same position
+# (same Zobrist hash) shares the node, so the search graph is a DAG instead of a tree.
+# wins/visits are from the point of view of the side that moved into the position; they collect
+# every path through the node. Edges are [move, child, edge_visits] so that the exploration term
+# of each parent only counts its own visits of the edge.
 class MCTSNode:
-    def __init__(self, game_state, parent=None, move=None):
-        self.game_state = copy.deepcopy(game_state)
-        self.parent = parent
-        self.move = move
+    def __init__(self, game_state):
+        self.key = game_state.zobristHash
+        self.white_to_move = game_state.whiteToMove
+        moves = game_state.getValidMoves() or []  # None on checkmate/stalemate
+        if not moves:
+            self.terminal_value = 0.5 if game_state.stalemate else (0 if game_state.whiteToMove else 1)
+        elif game_state.isDraw():
+            self.terminal_value = 0.5
+        else:
+            self.terminal_value = None
+        # pop() expands the most promising move first
+        self.untried_moves = sorted(moves, key=lambda m: move_heuristic(game_state, m)) if self.terminal_value is None else []
         self.children = []
         self.wins = 0
         self.visits = 0
-        self.untried_moves = self.game_state.getValidMoves()
 
     def is_fully_expanded(self):
         return len(self.untried_moves) == 0
 
-    def best_child(self, c_param=1.41):
+    def best_edge(self, c_param=1.41):
+        log_visits = math.log(self.visits)
         return max(
             self.children,
-            key=lambda child: (child.wins / child.visits) + c_param * math.sqrt(math.log(self.visits) / child.visits)
+            key=lambda edge: (edge[1].wins / edge[1].visits) + c_param * math.sqrt(log_visits / edge[2])
         )
 
     def is_terminal_node(self):
-        return self.game_state.checkmate or self.game_state.stalemate
-
-    def expand(self):
-        move = self.untried_moves.pop()
-        self.game_state.makeMove(move)
-        child_node = MCTSNode(self.game_state, self, move)
-        self.game_state.undoMove()
-        self.children.append(child_node)
-        return child_node
+        return self.terminal_value is not None
 
     def update(self, result):
+        # result is from white's point of view
         self.visits += 1
-        self.wins += result
-
-def get_piece_value(piece):
-    if piece == "--": return 0
-    return {
-        "pawn": 10, "knight": 30, "bishop": 30,
-        "rook": 50, "queen": 90, "king": 900
-    }.get(piece.split()[-1], 0)
+        self.wins += result if not self.white_to_move else 1 - result
 
 def move_heuristic(state, move):
     score = 0
     if move.pieceCaptured != "--":
-        score += max(0, get_piece_value(move.pieceCaptured) - get_piece_value(move.pieceMoved) + 10)
+        score += max(0, staticExchange(state, move)) / 10
 
     if move.pieceMoved.endswith("pawn") and (move.endRow in [0, 7]):
         score += 20
@@ -72,92 +85,457 @@ def move_heuristic(state, move):
     if move.pieceMoved.endswith("pawn") and abs(move.startRow - move.endRow) == 2:
         score += 1
 
-    try:
-        state.makeMove(move)
-        next_moves = state.getValidMoves()
-        threats = {(m.endRow, m.endCol) for m in next_moves if m.pieceCaptured != "--"}
-        state.undoMove()
-        score += len(threats) * 0.5
-    except Exception as e:
-        print(f"[!] Error during heuristic simulation: {e}")
-        state.undoMove()
+    # Penalize moves that leave the moved piece en prise (SEE of the opponent's best recapture)
+    score -= exchangeThreat(state, move) / 10
 
     return score
 
-def select_best_move_parallel(state, moves):
-    with ThreadPoolExecutor(max_workers=min(len(moves), MAX_SIM_THREADS)) as executor:
-        scores = list(executor.map(lambda m: move_heuristic(state, m), moves))
-    return moves[scores.index(max(scores))]
+def select_best_move(state, moves):
+    return max(moves, key=lambda m: move_heuristic(state, m))
+
+# Result of a position covered by the endgame bitbases, from white's point of view (1 / 0.5 / 0),
+# or None when there is no table for it
+def bitbase_result(state):
+    if state.pieceCount > bitbase.MAX_PIECES:
+        return None
+    value = bitbase.probe(state)
+    return None if value is None else (value + 1) / 2
 
+# Plays a short guided game from state and takes the moves back afterwards. The rollout stops as soon
+# as it reaches a bitbase position, whose result is exact.
+# Returns (result from white's point of view: 1 win, 0 loss, 0.5 draw or unfinished, plies played)
 def simulate_guided_game(state):
     max_turns = 7
+    plies = 0
+    result = 0.5
     try:
         for _ in range(max_turns):
-            if state.checkmate or state.stalemate:
+            if state.isDraw():
+                break
+            known = bitbase_result(state)
+            if known is not None:
+                result = known
                 break
             moves = state.getValidMoves()
             if not moves:
+                if state.checkmate:
+                    result = 1 if not state.whiteToMove else 0
                 break
-            move = select_best_move_parallel(state, moves)
+            move = select_best_move(state, moves)
             state.makeMove(move)
+            plies += 1
+        else:
+            if not state.getValidMoves() and state.checkmate:
+                result = 1 if not state.whiteToMove else 0
     except Exception as e:
         print(f"[!] Error in guided simulation: {e}")
-
-    if state.checkmate:
-        return 1 if not state.whiteToMove else -1
-    return 0.5
-
-def run_single_iteration(initial_state):
-    root = MCTSNode(copy.deepcopy(initial_state))
-    node = root
-
-    while node.is_fully_expanded() and node.children:
-        node = node.best_child()
-        node.game_state.makeMove(node.move)
-
-    if not node.is_terminal_node() and node.untried_moves:
-        node = node.expand()
-        node.game_state.makeMove(node.move)
-
-    result = simulate_guided_game(node.game_state)
-
-    while node is not None:
-        node.update(result)
-        node = node.parent
-
-    return root
-
-def merge_nodes(master, other):
-    for child in other.children:
-        match = next((c for c in master.children if c.move == child.move), None)
-        if match:
-            match.wins += child.wins
-            match.visits += child.visits
-        else:
-            master.children.append(child)
-
-from concurrent.futures import ProcessPoolExecutor  # umesto ThreadPoolExecutor
-
-def parallel_mcts(gs, iterations=300, max_workers=4):
-    print(f"[MCTS] Starting {iterations} iterations with {max_workers} workers (PROCESS-based)...")
+    for _ in range(plies):
+        state.undoMove()
+    return result, plies
+
+# Search graph for one root position. Every iteration walks down from the root on a single working
+# state with makeMove/undoMove instead of copying positions into the nodes.
+class MCTSTree:
+    def __init__(self, gs, transpositions=True, max_nodes=MCTS_TABLE_SIZE, rollout=simulate_guided_game):
+        self.state = copy.deepcopy(gs)
+        self.transpositions = transpositions
+        self.max_nodes = max_nodes
+        self.rollout = rollout
+        self.table = {}  # zobrist hash -> node (only used with transpositions)
+        self.size = 0
+        self.transposition_hits = 0
+        self.table_full = 0
+        self.cycles = 0
+        self.rollout_plies = 0
+        self.root = self.get_node(self.state)
+
+    # Node for the current position: shared from the table, new, or None when the table is full
+    def get_node(self, state):
+        if self.transpositions:
+            node = self.table.get(state.zobristHash)
+            if node is not None:
+                self.transposition_hits += 1
+                return node
+        if self.size >= self.max_nodes and self.size:
+            self.table_full += 1
+            return None
+        node = MCTSNode(state)
+        self.size += 1
+        if self.transpositions:
+            self.table[node.key] = node
+        return node
+
+    def iterate(self):
+        state = self.state
+        node = self.root
+        path, edges = [node], []
+        on_path = {node.key}
+        result = None
+
+        # Selection. A position that is already on the current path is a repetition: scored as a
+        # draw and not descended into, so cycles in the graph never loop the walk.
+        while node.is_fully_expanded() and node.children:
+            edge = node.best_edge()
+            state.makeMove(edge[0])
+            edges.append(edge)
+            node = edge[1]
+            path.append(node)
+            if node.key in on_path:
+                self.cycles += 1
+                result = 0.5
+                break
+            on_path.add(node.key)
+
+        if result is None:
+            # Expansion
+            if not node.is_terminal_node() and node.untried_moves:
+                move = node.untried_moves.pop()
+                state.makeMove(move)
+                child = self.get_node(state)
+                if child is not None:
+                    edge = [move, child, 0]
+                    node.children.append(edge)
+                    edges.append(edge)
+                    path.append(child)
+                    node = child
+                    if child.key in on_path:
+                        self.cycles += 1
+                        result = 0.5
+                else:
+                    # Table full: rolled out, but the move stays untried so it can be expanded later
+                    node.untried_moves.append(move)
+                    node = None
+
+            # Simulation
+            if result is None:
+                if node is not None and node.is_terminal_node():
+                    result = node.terminal_value
+                else:
+                    result, plies = self.rollout(state)
+                    self.rollout_plies += plies
+
+        # Backpropagation only along the path that was walked: shared nodes collect the result once,
+        # and other parents of a transposed node see it through the node value, not their edge counts.
+        for visited in path:
+            visited.update(result)
+        for edge in edges:
+            edge[2] += 1
+        for _ in range(len(path) - 1 + (node is None)):
+            state.undoMove()
+
+    def best_move(self):
+        if not self.root.children:
+            return None
+        return max(self.root.children, key=lambda edge: edge[2])[0]
+
+    # (move, wins, visits) for every root move; root edges are only ever reached from the root
+    def root_stats(self):
+        return [(edge[0], edge[1].wins / edge[1].visits * edge[2], edge[2]) for edge in self.root.children]
+
+    # The count most visited root moves, each with its value for the side to move, visits and the
+    # principal variation that follows the most visited edges (same format as chessAI.findMultiPV lines)
+    def principal_lines(self, count=1):
+        lines = []
+        for edge in sorted(self.root.children, key=lambda e: e[2], reverse=True)[:count]:
+            pv = [edge[0]]
+            node = edge[1]
+            seen = {self.root.key, node.key}
+            while node.children:
+                best = max(node.children, key=lambda e: e[2])
+                if best[1].key in seen:
+                    break
+                pv.append(best[0])
+                seen.add(best[1].key)
+                node = best[1]
+            lines.append({'move': edge[0], 'value': edge[1].wins / edge[1].visits, 'depth': len(pv), 'nodes': edge[2], 'pv': pv})
+        return lines
+
+    def record_stats(self, stats):
+        stats.counters['treeSize'] = self.size
+        stats.count('transpositionHits', self.transposition_hits)
+        stats.count('tableFull', self.table_full)
+        stats.count('repetitionCycles', self.cycles)
+
+# Decides when an MCTS search is done. It stops early once the runner-up cannot overtake the most
+# visited root move with the iterations left, and when the budget runs out it extends it once if the
+# top two moves are close or the best move's value dropped (or the best move changed) since mid-search.
+# Time-limited searches estimate the iterations left from the iteration rate so far.
+# Every decision is counted in the search stats.
+class SearchBudget:
+    def __init__(self, stats, iterations, time_limit=None, legal_moves=None, early_stop=True, extension=TIME_EXTENSION):
+        self.stats = stats
+        self.start = time.time()
+        self.iterations = iterations
+        self.time_limit = time_limit
+        self.deadline = self.start + time_limit if time_limit is not None else None
+        self.legal_moves = legal_moves
+        self.early_stop = early_stop
+        self.extension = extension
+        self.extended = False
+        self.reference = None  # (best move, its value) at mid-search
+
+    def progress(self, done):
+        progress = done / self.iterations if self.iterations else 1.0
+        if self.deadline is not None:
+            progress = max(progress, (time.time() - self.start) / (self.deadline - self.start))
+        return progress
+
+    def remaining(self, done):
+        left = self.iterations - done
+        if self.deadline is not None:
+            now = time.time()
+            elapsed = now - self.start
+            if now >= self.deadline:
+                left = 0
+            elif elapsed > 0:
+                left = min(left, int(done / elapsed * (self.deadline - now)))
+        return max(0, left)
+
+    # root_stats: (move, wins, visits) of the expanded root moves, summed over all workers
+    def should_stop(self, done, root_stats):
+        if self.legal_moves is not None and self.legal_moves <= 1:
+            if self.legal_moves == 1 and done:
+                self.stats.count('singleMoveStops')
+            return self.legal_moves == 0 or done > 0
+        if not root_stats:
+            return done >= self.iterations
+        ranked = sorted(root_stats, key=lambda entry: entry[2], reverse=True)
+        best_move, best_wins, best_visits = ranked[0]
+        second_visits = ranked[1][2] if len(ranked) > 1 else 0
+        value = best_wins / best_visits
+        if self.reference is None and self.progress(done) >= 0.5:
+            self.reference = (best_move, value)
+
+        remaining = self.remaining(done)
+        if remaining > 0:
+            if self.early_stop and best_visits - second_visits > remaining:
+                self.stats.count('earlyStops')
+                self.stats.count('savedIterations', remaining)
+                return True
+            return False
+
+        if not self.extended and self.extension > 0:
+            close = second_visits >= CLOSE_RACE_RATIO * best_visits
+            dropped = self.reference is not None and (self.reference[0] != best_move or value < self.reference[1] - VALUE_DROP)
+            if close or dropped:
+                self.extended = True
+                self.stats.count('timeExtensions')
+                self.stats.count('extensionsCloseRace' if close else 'extensionsValueDrop')
+                self.iterations += math.ceil(self.iterations * self.extension)
+                if self.deadline is not None:
+                    self.deadline += self.time_limit * self.extension
+                return False
+        return True
+
+# Forced-mate check before a search: the solver's result if it proves a mate within node_limit, else None
+def solve_mate(gs, node_limit, stats):
+    mate = mate_solver.solve(gs, node_limit)
+    stats.count('mateSolverNodes', mate['nodes'])
+    return mate if mate['result'] == mate_solver.MATE else None
+
+def finish_search_stats(stats, tree_size, best_move):
+    global last_search_stats
+    stats.counters['treeSize'] = tree_size
+    last_search_stats = stats.stop(best_move)
+
+# Single-process variant of parallel_mcts for headless runs (match runner, analysis workers).
+# on_progress(iterations_done, best_move) is called after every iteration; returning True stops the search.
+# transpositions=False keeps a plain tree (one node per path) for comparison.
+# iterations (and time_limit, if given) are the budget that SearchBudget may cut short or extend once;
+# early_stop=False and extension=0 make it a fixed budget.
+# multipv sets how many root lines are kept in last_search_lines.
+# mate_nodes runs mate_solver first with that node budget; a proven mate is played without building a tree.
+def serial_mcts(gs, iterations=300, time_limit=None, on_progress=None, transpositions=True,
+                early_stop=True, extension=TIME_EXTENSION, multipv=1, mate_nodes=None):
+    global last_search_lines
+    stats = SearchStats('mcts')
+    if mate_nodes:
+        mate = solve_mate(gs, mate_nodes, stats)
+        if mate is not None:
+            last_search_lines = [{'move': mate['move'], 'value': 1.0, 'depth': len(mate['pv']), 'nodes': 0, 'pv': mate['pv']}]
+            finish_search_stats(stats, 0, mate['move'])
+            return mate['move']
+    tree = MCTSTree(gs, transpositions)
+    budget = SearchBudget(stats, iterations, time_limit, len(tree.root.untried_moves), early_stop, extension)
+    done = 0
+    while not budget.should_stop(done, tree.root_stats()):
+        tree.iterate()
+        done += 1
+        stats.count('mctsIterations')
+        if on_progress is not None and tree.root.children:
+            if on_progress(stats.counters['mctsIterations'], tree.best_move()):
+                break
+    best = tree.best_move()
+    stats.count('rolloutPlies', tree.rollout_plies)
+    tree.record_stats(stats)
+    last_search_lines = tree.principal_lines(multipv)
+    finish_search_stats(stats, tree.size, best)
+    return best
+
+# Long-lived worker pool shared by all parallel_mcts calls: process spawn, module imports and table
+# setup are paid once instead of on every move. Workers get positions as compact payloads
+# (start FEN + moves played) and check a shared event between iterations so a search can be cancelled.
+_worker_pool = None
+_worker_pool_size = 0
+_cancel_event = None
+_position_cache = (None, None)  # worker side: last decoded payload and its GameState
+_worker_tree = (None, None)  # worker side: (payload, search id) and the search graph built for it
+_search_ids = itertools.count(1)
+# multiprocessing and concurrent.futures are imported inside the pool functions so that importing
+# this module (serial_mcts, analysis jobs) stays cheap
+
+def encode_position(gs):
+    return gs.startFen, " ".join(m.getChessNotation() for m in gs.moveLog)
+
+def decode_position(payload):
+    global _position_cache
+    if _position_cache[0] != payload:
+        fen, moves = payload
+        state = ChessEngine.GameState().loadFen(fen)
+        for notation in moves.split():
+            state.makeMove(next(m for m in state.getValidMoves() if m.getChessNotation() == notation))
+        _position_cache = (payload, state)
+    return _position_cache[1]
+
+def _init_worker(cancel_event):
+    global _cancel_event
+    _cancel_event = cancel_event
+    decode_position(encode_position(ChessEngine.GameState()))  # warm up move generation and SEE tables
+
+def _worker_ready():
+    return True
+
+def get_worker_pool(max_workers=4):
+    global _worker_pool, _worker_pool_size, _cancel_event
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor, wait
+    if _worker_pool is None or _worker_pool_size != max_workers:
+        shutdown_worker_pool()
+        _cancel_event = multiprocessing.Event()
+        _worker_pool = ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(_cancel_event,))
+        _worker_pool_size = max_workers
+        wait([_worker_pool.submit(_worker_ready) for _ in range(max_workers)])  # start all workers now
+    return _worker_pool
+
+# The pool has no atexit hook (it would not run in a multiprocessing child such as the engine process):
+# whoever calls parallel_mcts owns the pool and shuts it down on its exit path, either by calling
+# shutdown_worker_pool() or by running its searches inside `with worker_pool():`
+def shutdown_worker_pool():
+    global _worker_pool
+    if _worker_pool is not None:
+        _worker_pool.shutdown(wait=True, cancel_futures=True)
+        _worker_pool = None
+
+@contextlib.contextmanager
+def worker_pool(max_workers=4):
+    try:
+        yield get_worker_pool(max_workers)
+    finally:
+        shutdown_worker_pool()
+
+# Worker task: a batch of iterations on one position. Batches of the same search that land on the
+# same worker keep growing one search graph there; the result is that graph's cumulative root totals
+# (keyed by worker pid), plus the iterations and rollout plies of this batch.
+def run_iteration_batch(payload, iterations, search_id=None):
+    global _worker_tree
+    if _worker_tree[0] != (payload, search_id) or search_id is None:
+        _worker_tree = ((payload, search_id), MCTSTree(decode_position(payload)))
+    tree = _worker_tree[1]
+    plies_before = tree.rollout_plies
+    done = 0
+    for _ in range(iterations):
+        if _cancel_event is not None and _cancel_event.is_set():
+            break
+        tree.iterate()
+        done += 1
+    totals = [(move.getChessNotation(), wins, visits) for move, wins, visits in tree.root_stats()]
+    counters = {'treeSize': tree.size, 'transpositionHits': tree.transposition_hits,
+                'tableFull': tree.table_full, 'repetitionCycles': tree.cycles}
+    return os.getpid(), totals, counters, done, tree.rollout_plies - plies_before
+
+# on_progress works as in serial_mcts; stopping (by on_progress or an early stop of the budget)
+# cancels the batches that are still queued or running, and an extension submits more batches.
+# Workers only report root totals, so its lines have no continuation beyond the root move.
+def parallel_mcts(gs, iterations=300, max_workers=4, on_progress=None, time_limit=None,
+                  early_stop=True, extension=TIME_EXTENSION, multipv=1):
+    global last_search_lines
+    import traceback
+    from concurrent.futures import CancelledError, FIRST_COMPLETED, wait
+    print(f"[MCTS] Starting {iterations} iterations with {max_workers} workers (warm process pool)...")
     start = time.time()
-    master = MCTSNode(copy.deepcopy(gs))
-
-    with ProcessPoolExecutor(max_workers=max_workers) as executor:
-        futures = [executor.submit(run_single_iteration, gs) for _ in range(iterations)]
-        for i, future in enumerate(futures):
+    stats = SearchStats('mcts')
+    pool = get_worker_pool(max_workers)
+    _cancel_event.clear()
+
+    valid_moves = gs.getValidMoves() or []
+    budget = SearchBudget(stats, iterations, time_limit, len(valid_moves), early_stop, extension)
+    payload = encode_position(gs)
+    search_id = next(_search_ids)
+    batch = max(1, iterations // (max_workers * BATCHES_PER_WORKER))
+    futures = []
+
+    def submit(count):
+        sizes = [batch] * (count // batch) + ([count % batch] if count % batch else [])
+        futures.extend(pool.submit(run_iteration_batch, payload, n, search_id) for n in sizes)
+        return count
+
+    submitted = submit(iterations)
+    pending = set(futures)
+    worker_totals = {}  # worker pid -> (root totals, graph counters) of that worker's search graph
+    totals = {}  # move notation -> [wins, visits], summed over the workers
+    stopped = False
+    while pending and not stopped:
+        finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in finished:
             try:
-                merge_nodes(master, future.result(timeout=60))
+                pid, children, counters, done, plies = future.result()
+            except CancelledError:
+                continue
             except Exception as e:
-                print(f"[!] Simulation {i} failed: {e}")
+                stats.count('failedIterations')
+                print(f"[!] Simulation batch failed: {e}")
                 traceback.print_exc()
-
-    if not master.children:
+                continue
+            stats.count('mctsIterations', done)
+            stats.count('rolloutPlies', plies)
+            worker_totals[pid] = (children, counters)
+        totals = {}
+        for worker_children, _ in worker_totals.values():
+            for notation, wins, visits in worker_children:
+                entry = totals.setdefault(notation, [0, 0])
+                entry[0] += wins
+                entry[1] += visits
+        if on_progress is not None and totals:
+            best_notation = max(totals, key=lambda n: totals[n][1])
+            best_move = next(m for m in valid_moves if m.getChessNotation() == best_notation)
+            stopped = bool(on_progress(stats.counters['mctsIterations'], best_move))
+        done = stats.counters.get('mctsIterations', 0)
+        if not stopped and budget.should_stop(done, [(n, w, v) for n, (w, v) in totals.items()]):
+            stopped = bool(pending)  # early stop; otherwise every batch has finished
+        elif not stopped and budget.iterations > submitted:
+            submitted += submit(budget.iterations - submitted)  # extension
+            pending.update(f for f in futures if not f.done())
+    if stopped:
+        _cancel_event.set()
+        for future in futures:
+            future.cancel()
+    wait(futures)  # running batches notice the cancel event after their current iteration
+
+    last_search_lines = []
+    if not totals:
+        finish_search_stats(stats, 1, None)
         print("[!] No valid children found.")
         return None
 
-    best = max(master.children, key=lambda c: c.visits)
-    print(f"[\u2713] Best move selected in {time.time() - start:.2f} seconds: {best.move}")
-    return best.move
-
-
+    best_notation = max(totals, key=lambda n: totals[n][1])
+    best_move = next(m for m in valid_moves if m.getChessNotation() == best_notation)
+    for notation in sorted(totals, key=lambda n: totals[n][1], reverse=True)[:multipv]:
+        wins, visits = totals[notation]
+        move = next(m for m in valid_moves if m.getChessNotation() == notation)
+        last_search_lines.append({'move': move, 'value': wins / visits, 'depth': 1, 'nodes': visits, 'pv': [move]})
+    for _, counters in worker_totals.values():
+        for name in ('transpositionHits', 'tableFull', 'repetitionCycles'):
+            stats.count(name, counters[name])
+    finish_search_stats(stats, sum(counters['treeSize'] for _, counters in worker_totals.values()), best_move)
+    print(f"[\u2713] Best move selected in {time.time() - start:.2f} seconds: {best_move}")
+    return best_move
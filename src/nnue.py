@@ -0,0 +1,169 @@
+"""
+Mala neuronska evaluacija u stilu NNUE, kao alternativa chessAI.scoreBoard.
+
+Ulaz su figure na poljima (12 * 64 binarnih osobina, indeks (kod figure - 1) * 64 + polje), zatim jedan
+skriveni sloj sa clipped ReLU aktivacijom i linearni izlaz koji daje skor iz ugla bijelog, u istim
+jedinicama kao scoreBoard. Prvi sloj je suma redova matrice w1 za figure na tabli (akumulator); potez
+mijenja samo dva do četiri polja, pa GameState akumulator ažurira inkrementalno u makeMove (oduzme red
+figure sa starog polja, doda red na novom), a undoMove vraća prethodni akumulator sa steka. Evaluacija
+je onda samo aktivacija i skalarni proizvod jednog vektora veličine HIDDEN_SIZE u NumPy-u.
+
+Težine se čuvaju kao .npz (w1, b1, w2, b2) i uče se skriptom nnue_train.py. Bez fajla sa težinama
+koristi se mreža napravljena iz pozicionih tabela (psqtNetwork): prosjek skora sredine partije i
+završnice iz psqt.py, bez miješanja po fazi i bez pješačke strukture.
+
+Primjer (benchmark evaluacija u sekundi, scoreBoard vs mreža):
+    python src/nnue.py --weights nnue.npz --positions 2000
+"""
+
+import argparse
+import os
+import random
+import time
+
+import numpy as np
+
+import ChessEngine
+import chessAI
+
+INPUT_SIZE = 12 * 64
+HIDDEN_SIZE = 32
+CLIP = 1.0  # gornja granica clipped ReLU aktivacije
+# Skala prolaznih neurona psqtNetwork: suma tabela se dijeli s njom da ostane unutar [0, CLIP]
+PSQT_SCALE = 1024.0
+
+
+class Network:
+    def __init__(self, w1, b1, w2, b2):
+        self.w1 = np.asarray(w1, dtype=np.float32)
+        self.b1 = np.asarray(b1, dtype=np.float32)
+        self.w2 = np.asarray(w2, dtype=np.float32)
+        self.b2 = float(b2)
+        if self.w1.shape != (INPUT_SIZE, len(self.b1)) or self.w2.shape != self.b1.shape:
+            raise ValueError(f"neispravne dimenzije težina: w1 {self.w1.shape}, b1 {self.b1.shape}, w2 {self.w2.shape}")
+
+    # Težine se ne mijenjaju tokom igre, pa kopija stanja igre (npr. u MCTS-u) dijeli istu mrežu
+    def __deepcopy__(self, memo):
+        return self
+
+    @property
+    def hiddenSize(self):
+        return len(self.b1)
+
+    # Akumulator od nule: b1 plus redovi w1 za sve figure na tabli
+    def refresh(self, gs):
+        acc = self.b1.copy()
+        for r in range(8):
+            for c in range(8):
+                code = ChessEngine.PIECE_CODES[gs.board[r][c]]
+                if code:
+                    acc += self.w1[(code - 1) * 64 + r * 8 + c]
+        return acc
+
+    # Novi akumulator nakon poteza; removed i added su liste (kod figure, polje)
+    def update(self, acc, removed, added):
+        w1 = self.w1
+        for code, sq in removed:
+            acc = acc - w1[(code - 1) * 64 + sq]
+        for code, sq in added:
+            acc = acc + w1[(code - 1) * 64 + sq]
+        return acc
+
+    # Clipped ReLU i izlazni sloj (np.minimum/np.maximum su za male nizove znatno brži od np.clip)
+    def output(self, acc):
+        return float(np.minimum(np.maximum(acc, 0.0), CLIP).dot(self.w2)) + self.b2
+
+    # Skor pozicije iz ugla bijelog (GameState mora imati ovu mrežu priključenu, vidi attachNnue)
+    def evaluate(self, gs):
+        return int(self.output(gs.accumulator))
+
+    def save(self, path):
+        np.savez(path, w1=self.w1, b1=self.b1, w2=self.w2, b2=np.float32(self.b2))
+
+
+def loadWeights(path):
+    with np.load(path) as f:
+        missing = [name for name in ("w1", "b1", "w2", "b2") if name not in f]
+        if missing:
+            raise ValueError(f"{path}: nedostaju težine {', '.join(missing)}")
+        return Network(f["w1"], f["b1"], f["w2"], f["b2"])
+
+
+# Početna mreža iz pozicionih tabela: dva neurona prenose pozitivni i negativni dio prosjeka skora sredine
+# partije i završnice (materijal + tabele), ostali počinju od malih nasumičnih težina za učenje
+def psqtNetwork(hiddenSize=HIDDEN_SIZE, seed=0):
+    rng = np.random.default_rng(seed)
+    w1 = rng.normal(0.0, 0.01, (INPUT_SIZE, hiddenSize))
+    w2 = rng.normal(0.0, 0.01, hiddenSize)
+    for code in range(1, len(ChessEngine.PIECE_NAMES)):
+        for sq in range(64):
+            value = (ChessEngine.PSQT_MG[code][sq] + ChessEngine.PSQT_EG[code][sq]) / 2 / PSQT_SCALE
+            w1[(code - 1) * 64 + sq, :2] = (value, -value)
+    w2[:2] = (PSQT_SCALE, -PSQT_SCALE)
+    return Network(w1, np.zeros(hiddenSize), w2, 0.0)
+
+
+# Pozicije za benchmark: nasumične partije od početne pozicije, svaka pozicija nakon 10 do 60 polupoteza
+def benchPositions(count, seed=0):
+    rnd = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        gs = ChessEngine.GameState()
+        for _ in range(rnd.randint(10, 60)):
+            validMoves = gs.getValidMoves()
+            if not validMoves:
+                break
+            gs.makeMove(rnd.choice(validMoves))
+        if not gs.checkmate and not gs.stalemate:
+            positions.append(gs)
+    return positions
+
+
+# Evaluacija u sekundi za scoreBoard i mrežu, te cijena inkrementalnog ažuriranja (make/undo sa mrežom)
+def benchmark(network, count=1000, repeat=20, report=print):
+    positions = benchPositions(count)
+    for gs in positions:
+        gs.attachNnue(network)
+    results = {}
+    for label, evaluate in (("scoreBoard", chessAI.scoreBoard), ("nnue", chessAI.scoreNnue)):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for gs in positions:
+                evaluate(gs)
+        elapsed = time.perf_counter() - start
+        results[label] = count * repeat / elapsed
+        report(f"{label:<12}{results[label]:>12.0f} evaluacija/s")
+
+    # make/undo svih legalnih poteza bez mreže i sa mrežom (razlika je cijena ažuriranja akumulatora)
+    moves = [(gs, gs.getValidMoves() or []) for gs in positions[:200]]
+    for label, attached in (("make/undo", None), ("make/undo+nnue", network)):
+        made = 0
+        start = time.perf_counter()
+        for gs, validMoves in moves:
+            gs.attachNnue(attached)
+            for move in validMoves:
+                gs.makeMove(move)
+                gs.undoMove()
+            made += len(validMoves)
+        elapsed = time.perf_counter() - start
+        results[label] = made / elapsed
+        report(f"{label:<16}{results[label]:>8.0f} poteza/s")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark neuronske evaluacije naspram scoreBoard")
+    parser.add_argument("--weights", default=None, help=".npz sa težinama (bez njega mreža iz pozicionih tabela)")
+    parser.add_argument("--positions", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    if args.weights and not os.path.exists(args.weights):
+        parser.error(f"fajl sa težinama '{args.weights}' ne postoji")
+
+    network = loadWeights(args.weights) if args.weights else psqtNetwork()
+    print(f"Mreža {INPUT_SIZE}-{network.hiddenSize}-1, {args.positions} pozicija")
+    benchmark(network, args.positions, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Učenje težina neuronske evaluacije (nnue.py) na CPU-u iz sačuvanih partija.
+
+Pozicije se izdvajaju isto kao za Texel podešavanje (texel_tuner.extractPositions: mirne pozicije iz
+baze partija ili log/gameN.txt fajlova, označene rezultatom partije) i mogu se dijeliti preko istog .npz
+fajla (--features). Mreža uči da predvidi rezultat kroz sigmoid(K * izlaz), gdje je K podešen na klasičnoj
+evaluaciji, pa izlaz mreže ostaje u istim jedinicama kao scoreBoard (margine pretrage važe i za mrežu).
+Učenje ide Adam koracima po mini-grupama u NumPy-u; čuva se mreža sa najmanjom greškom na odvojenom
+dijelu pozicija. Početne težine su mreža iz pozicionih tabela (nnue.psqtNetwork) ili postojeći fajl (--init).
+
+Primjer:
+    python src/nnue_train.py --store log/games --features pozicije.npz --epochs 20 --out nnue.npz
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+import nnue
+from batch_analysis import readGames
+from texel_tuner import TexelProblem, extractPositions, initialWeights, loadPositions, savePositions
+
+
+# Indeksi ulaznih osobina (N x MAX_PIECES) iz nizova texel_tuner-a; prazna mjesta dobijaju INPUT_SIZE
+def featureIndices(types, squares, signs):
+    types, squares = types.astype(np.int32), squares.astype(np.int32)
+    # Polja crnih figura su u texel nizovima iz ugla crnog, vraćaju se na polje table
+    absolute = np.where(signs > 0, squares, (7 - squares // 8) * 8 + squares % 8)
+    features = (types + 6 * (signs < 0)) * 64 + absolute
+    return np.where(signs != 0, features, nnue.INPUT_SIZE).astype(np.int32)
+
+
+def oneHot(features):
+    x = np.zeros((len(features), nnue.INPUT_SIZE + 1), dtype=np.float32)
+    x[np.arange(len(features))[:, None], features] = 1.0
+    return x[:, :nnue.INPUT_SIZE]
+
+
+class NnueTrainer:
+    def __init__(self, network, k, learningRate):
+        self.params = {"w1": network.w1.astype(np.float64), "b1": network.b1.astype(np.float64),
+                       "w2": network.w2.astype(np.float64), "b2": np.array(network.b2)}
+        self.k = k
+        self.learningRate = learningRate
+        # Adam: prvi i drugi momenti gradijenta po parametru
+        self.m = {name: np.zeros_like(value) for name, value in self.params.items()}
+        self.v = {name: np.zeros_like(value) for name, value in self.params.items()}
+        self.steps = 0
+
+    def network(self):
+        return nnue.Network(self.params["w1"], self.params["b1"], self.params["w2"], self.params["b2"])
+
+    def forward(self, x):
+        pre = x @ self.params["w1"] + self.params["b1"]
+        hidden = np.minimum(np.maximum(pre, 0.0), nnue.CLIP)
+        out = hidden @ self.params["w2"] + self.params["b2"]
+        return pre, hidden, 1 / (1 + np.exp(-self.k * out))
+
+    def loss(self, features, results, batchSize=8192):
+        total = 0.0
+        for start in range(0, len(results), batchSize):
+            predicted = self.forward(oneHot(features[start:start + batchSize]))[2]
+            total += float(np.sum((results[start:start + batchSize] - predicted) ** 2))
+        return total / len(results)
+
+    # Jedan Adam korak na mini-grupi; vraća grešku grupe
+    def step(self, features, results):
+        x = oneHot(features)
+        pre, hidden, predicted = self.forward(x)
+        error = results - predicted
+        dOut = -2 * error * predicted * (1 - predicted) * self.k / len(results)
+        dPre = dOut[:, None] * self.params["w2"] * ((pre > 0) & (pre < nnue.CLIP))
+        gradients = {"w1": x.T @ dPre, "b1": dPre.sum(axis=0), "w2": hidden.T @ dOut, "b2": np.array(dOut.sum())}
+
+        self.steps += 1
+        beta1, beta2, eps = 0.9, 0.999, 1e-8
+        for name, gradient in gradients.items():
+            self.m[name] = beta1 * self.m[name] + (1 - beta1) * gradient
+            self.v[name] = beta2 * self.v[name] + (1 - beta2) * gradient ** 2
+            mHat = self.m[name] / (1 - beta1 ** self.steps)
+            vHat = self.v[name] / (1 - beta2 ** self.steps)
+            self.params[name] = self.params[name] - self.learningRate * mHat / (np.sqrt(vHat) + eps)
+        return float(np.mean(error ** 2))
+
+
+def train(trainer, features, results, epochs, batchSize, validation=None, report=print):
+    rng = np.random.default_rng(0)
+    best, bestLoss = trainer.network(), None
+    start = time.time()
+    for epoch in range(1, epochs + 1):
+        order = rng.permutation(len(results))
+        losses = [trainer.step(features[order[i:i + batchSize]], results[order[i:i + batchSize]])
+                  for i in range(0, len(results), batchSize)]
+        line = f"  epoha {epoch}: greška {np.mean(losses):.6f}"
+        current = np.mean(losses)
+        if validation is not None:
+            current = trainer.loss(*validation)
+            line += f", validacija {current:.6f}"
+        if bestLoss is None or current < bestLoss:
+            best, bestLoss = trainer.network(), current
+        report(line + f" ({time.time() - start:.0f} s)")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Učenje neuronske evaluacije (nnue.py) iz sačuvanih partija")
+    parser.add_argument("--store", default=None, help="baza partija (putanja bez ekstenzije), npr. log/games")
+    parser.add_argument("--log-dir", default=None, help="direktorij sa starim gameN.txt fajlovima")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--features", default=None, help=".npz sa izdvojenim pozicijama (koristi se ako postoji, inače se pravi)")
+    parser.add_argument("--init", default=None, help="početne težine (.npz); bez njih mreža iz pozicionih tabela")
+    parser.add_argument("--hidden", type=int, default=nnue.HIDDEN_SIZE)
+    parser.add_argument("--epochs", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=1024)
+    parser.add_argument("--learning-rate", type=float, default=1e-3)
+    parser.add_argument("--validation", type=float, default=0.1, help="udio pozicija za provjeru (ne koriste se za učenje)")
+    parser.add_argument("--out", default="nnue.npz")
+    args = parser.parse_args()
+
+    if args.features and os.path.exists(args.features):
+        data = loadPositions(args.features)
+    else:
+        if not args.store and not args.log_dir:
+            args.store = "log/games"
+        data = extractPositions(readGames(args.store, args.log_dir), args.workers)
+        if args.features:
+            savePositions(args.features, data)
+    count = len(data[0])
+    print(f"{count} pozicija")
+
+    # K iz klasične evaluacije, da izlaz mreže bude u jedinicama scoreBoard-a
+    k = TexelProblem(*data).fitScale(initialWeights())
+    features = featureIndices(*data[:3])
+    results = data[5].astype(np.float64)
+
+    order = np.random.default_rng(0).permutation(count)
+    split = int(count * (1 - args.validation))
+    validation = (features[order[split:]], results[order[split:]]) if split < count else None
+    network = nnue.loadWeights(args.init) if args.init else nnue.psqtNetwork(args.hidden)
+    trainer = NnueTrainer(network, k, args.learning_rate)
+    print(f"K = {k:.5f}, mreža {nnue.INPUT_SIZE}-{network.hiddenSize}-1, "
+          f"početna greška {trainer.loss(features[order[:split]], results[order[:split]]):.6f}")
+    best = train(trainer, features[order[:split]], results[order[:split]], args.epochs, args.batch_size, validation)
+    best.save(args.out)
+    print(f"Težine upisane u {args.out}")
+
+
+if __name__ == "__main__":
+    main()
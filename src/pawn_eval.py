@@ -0,0 +1,65 @@
+"""
+Procjena pješačke strukture: udvojeni, izolovani i slobodni pješaci. Procjena zavisi samo od
+rasporeda pješaka, pa se kešira u pješačkoj hash tabeli po GameState.pawnHash (Zobrist ključ samo
+od pješaka). Pješačka struktura se u pretrazi rijetko mijenja, pa je skoro svaka procjena pogodak.
+"""
+
+# Kazne i bonusi u istim jedinicama kao pozicione tabele u chessAI.scoreBoard
+DOUBLED_PENALTY = 15   # po svakom dodatnom pješaku na istoj koloni
+ISOLATED_PENALTY = 12  # pješak bez svojih pješaka na susjednim kolonama
+# Bonus slobodnog pješaka po broju redova koje je prešao od početnog reda (0-5)
+PASSED_BONUS = [0, 10, 20, 35, 60, 100]
+
+PAWN_TABLE_MAX_ENTRIES = 1 << 14  # tabela se prazni kad se napuni (kao transpozicijska tabela)
+pawnTable = {}
+
+
+# Skor pješačke strukture iz ugla bijelog, računat od nule
+def pawnStructure(board):
+    # Redovi pješaka po kolonama za svaku boju
+    whiteFiles = [[] for _ in range(8)]
+    blackFiles = [[] for _ in range(8)]
+    for r in range(1, 7):
+        row = board[r]
+        for c in range(8):
+            if row[c] == "white pawn":
+                whiteFiles[c].append(r)
+            elif row[c] == "black pawn":
+                blackFiles[c].append(r)
+
+    score = 0
+    for c in range(8):
+        neighbours = [f for f in (c - 1, c + 1) if 0 <= f < 8]
+        for ownFiles, enemyFiles, sign in ((whiteFiles, blackFiles, 1), (blackFiles, whiteFiles, -1)):
+            pawns = ownFiles[c]
+            if not pawns:
+                continue
+            score -= sign * DOUBLED_PENALTY * (len(pawns) - 1)
+            if not any(ownFiles[f] for f in neighbours):
+                score -= sign * ISOLATED_PENALTY * len(pawns)
+            for r in pawns:
+                # Slobodan pješak: ispred njega (na njegovoj i susjednim kolonama) nema protivničkih pješaka
+                if sign == 1:
+                    passed = all(er >= r for f in neighbours + [c] for er in enemyFiles[f])
+                    advance = 6 - r
+                else:
+                    passed = all(er <= r for f in neighbours + [c] for er in enemyFiles[f])
+                    advance = r - 1
+                if passed:
+                    score += sign * PASSED_BONUS[advance]
+    return score
+
+
+# Skor pješačke strukture iz keša; stats (npr. chessAI.searchStats) broji pogotke i promašaje
+def evaluatePawns(gs, stats=None):
+    score = pawnTable.get(gs.pawnHash)
+    if score is not None:
+        if stats is not None:
+            stats['pawnHashHits'] += 1
+        return score
+    if stats is not None:
+        stats['pawnHashMisses'] += 1
+    if len(pawnTable) >= PAWN_TABLE_MAX_ENTRIES:
+        pawnTable.clear()
+    score = pawnTable[gs.pawnHash] = pawnStructure(gs.board)
+    return score
@@ -0,0 +1,139 @@
+"""
+Pozicione tabele (piece-square tables) za sredinu partije i završnicu, vrijednosti figura i faza igre.
+
+Tabele su napisane iz ugla bijelog, prvi red je osmi red table (isto kao GameState.board), pa bijela
+figura na (r, c) dobija table[r][c], a crna -table[7 - r][c]. Iz njih ChessEngine pravi PSQT_MG i
+PSQT_EG: za svaki kod figure (PIECE_CODES) i polje r * 8 + c vrijednost figure plus pozicioni bonus,
+sa predznakom boje. GameState zbraja te vrijednosti inkrementalno u makeMove/undoMove (mgScore,
+egScore), zajedno sa fazom igre (phase), a evaluacija ih samo miješa po fazi.
+"""
+
+# Vrijednosti figura (iste kao chessAI.pieceScore) za sredinu partije i završnicu
+PIECE_VALUE_MG = {"pawn": 1, "knight": 3, "bishop": 3, "rook": 5, "queen": 9, "king": 0}
+PIECE_VALUE_EG = {"pawn": 1, "knight": 3, "bishop": 3, "rook": 5, "queen": 9, "king": 0}
+
+# Doprinos figure fazi igre: 24 = sve figure na tabli (čista sredina partije), 0 = samo kraljevi i pješaci
+PHASE_WEIGHTS = {"pawn": 0, "knight": 1, "bishop": 1, "rook": 2, "queen": 4, "king": 0}
+PHASE_MAX = 24
+
+pawn_mg = [
+    [0,   0,   0,   0,   0,   0,   0,   0],
+    [50, 50,  50,  50,  50,  50,  50,  50],
+    [10, 10,  20,  30,  30,  20,  10,  10],
+    [5,   5,  10,  25,  25,  10,   5,   5],
+    [0,   0,   0,  20,  20,   0,   0,   0],
+    [5,  -5, -10,   0,   0, -10,  -5,   5],
+    [5,  10,  10, -20, -20,  10,  10,   5],
+    [0,   0,   0,   0,   0,   0,   0,   0]
+]
+
+# U završnici pješak vrijedi što je bliže promociji, bez obzira na kolonu
+pawn_eg = [
+    [0,   0,   0,   0,   0,   0,   0,   0],
+    [80, 80,  80,  80,  80,  80,  80,  80],
+    [50, 50,  50,  50,  50,  50,  50,  50],
+    [30, 30,  30,  30,  30,  30,  30,  30],
+    [15, 15,  15,  15,  15,  15,  15,  15],
+    [5,   5,   5,   5,   5,   5,   5,   5],
+    [0,   0,   0,   0,   0,   0,   0,   0],
+    [0,   0,   0,   0,   0,   0,   0,   0]
+]
+
+knight_mg = [
+    [-50, -40, -30, -30, -30, -30, -40, -50],
+    [-40, -20,   0,   0,   0,   0, -20, -40],
+    [-30,   0,  10,  15,  15,  10,   0, -30],
+    [-30,   5,  15,  20,  20,  15,   5, -30],
+    [-30,   0,  15,  20,  20,  15,   0, -30],
+    [-30,   5,  10,  15,  15,  10,   5, -30],
+    [-40, -20,   0,   5,   5,   0, -20, -40],
+    [-50, -40, -30, -30, -30, -30, -40, -50]
+]
+knight_eg = knight_mg
+
+bishop_mg = [
+    [-20, -10, -10, -10, -10, -10, -10, -20],
+    [-10,   0,   0,   0,   0,   0,   0, -10],
+    [-10,   0,   5,  10,  10,   5,   0, -10],
+    [-10,   5,   5,  10,  10,   5,   5, -10],
+    [-10,   0,  10,  10,  10,  10,   0, -10],
+    [-10,  10,  10,  10,  10,  10,  10, -10],
+    [-10,   5,   0,   0,   0,   0,   5, -10],
+    [-20, -10, -10, -10, -10, -10, -10, -20]
+]
+bishop_eg = bishop_mg
+
+rook_mg = [
+    [0,   0,   0,   0,   0,   0,   0,   0],
+    [5,  10,  10,  10,  10,  10,  10,   5],
+    [-5,  0,   0,   0,   0,   0,   0,  -5],
+    [-5,  0,   0,   0,   0,   0,   0,  -5],
+    [-5,  0,   0,   0,   0,   0,   0,  -5],
+    [-5,  0,   0,   0,   0,   0,   0,  -5],
+    [-5,  0,   0,   0,   0,   0,   0,  -5],
+    [0,   0,   0,   5,   5,   0,   0,   0]
+]
+rook_eg = rook_mg
+
+queen_mg = [
+    [-20, -10, -10,  -5,  -5, -10, -10, -20],
+    [-10,   0,   0,   0,   0,   0,   0, -10],
+    [-10,   0,   5,   5,   5,   5,   0, -10],
+    [-5,    0,   5,   5,   5,   5,   0,  -5],
+    [0,     0,   5,   5,   5,   5,   0,  -5],
+    [-10,   5,   5,   5,   5,   5,   0, -10],
+    [-10,   0,   5,   0,   0,   0,   0, -10],
+    [-20, -10, -10,  -5,  -5, -10, -10, -20]
+]
+queen_eg = queen_mg
+
+# Sredina partije: kralj u zaklonu iza pješaka
+king_mg = [
+    [-30, -40, -40, -50, -50, -40, -40, -30],
+    [-30, -40, -40, -50, -50, -40, -40, -30],
+    [-30, -40, -40, -50, -50, -40, -40, -30],
+    [-30, -40, -40, -50, -50, -40, -40, -30],
+    [-20, -30, -30, -40, -40, -30, -30, -20],
+    [-10, -20, -20, -20, -20, -20, -20, -10],
+    [20,   20,   0,   0,   0,   0,  20,  20],
+    [20,   30,  10,   0,   0,  10,  30,  20]
+]
+
+# Završnica: aktivan kralj u centru
+king_eg = [
+    [-50, -40, -30, -20, -20, -30, -40, -50],
+    [-30, -20, -10,   0,   0, -10, -20, -30],
+    [-30, -10,  20,  30,  30,  20, -10, -30],
+    [-30, -10,  30,  40,  40,  30, -10, -30],
+    [-30, -10,  30,  40,  40,  30, -10, -30],
+    [-30, -10,  20,  30,  30,  20, -10, -30],
+    [-30, -30,   0,   0,   0,   0, -30, -30],
+    [-50, -30, -30, -30, -30, -30, -30, -50]
+]
+
+TABLES_MG = {"pawn": pawn_mg, "knight": knight_mg, "bishop": bishop_mg, "rook": rook_mg, "queen": queen_mg, "king": king_mg}
+TABLES_EG = {"pawn": pawn_eg, "knight": knight_eg, "bishop": bishop_eg, "rook": rook_eg, "queen": queen_eg, "king": king_eg}
+
+
+# Tabela po kodu figure (indeks u pieceNames, 0 = prazno) i polju: vrijednost + pozicioni bonus,
+# negativno za crne figure
+def buildPsqt(pieceNames, values, tables):
+    psqt = [[0] * 64]
+    for name in pieceNames[1:]:
+        color, pieceType = name.split()
+        table = tables[pieceType]
+        if color == "white":
+            psqt.append([values[pieceType] + table[sq // 8][sq % 8] for sq in range(64)])
+        else:
+            psqt.append([-(values[pieceType] + table[7 - sq // 8][sq % 8]) for sq in range(64)])
+    return psqt
+
+
+def buildPhase(pieceNames):
+    return [0] + [PHASE_WEIGHTS[name.split()[1]] for name in pieceNames[1:]]
+
+
+# Miješanje skora sredine partije i završnice po fazi (faza veća od PHASE_MAX, npr. nakon promocija, se ograničava)
+def taper(mgScore, egScore, phase):
+    phase = min(phase, PHASE_MAX)
+    return int((mgScore * phase + egScore * (PHASE_MAX - phase)) / PHASE_MAX)
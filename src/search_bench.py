@@ -0,0 +1,59 @@
+import argparse
+import time
+
+import ChessEngine
+import chessAI
+
+# Pozicije za benchmark selektivne pretrage: (naziv, FEN, prihvatljivi najbolji potezi ili None za mirne pozicije)
+BENCH_POSITIONS = [
+    ("start", ChessEngine.START_FEN, None),
+    ("italian", "r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4", None),
+    ("qgd", "r2q1rk1/pp2bppp/2n1pn2/3p4/3P1B2/2PB1N2/PP1N1PPP/R2Q1RK1 w - - 0 10", None),
+    ("sicilian", "r1bqkb1r/pp2pppp/2np1n2/8/3NP3/2N5/PPP2PPP/R1BQKB1R w KQkq - 2 6", None),
+    ("back rank", "6k1/5ppp/8/8/8/8/5PPP/3R2K1 w - - 0 1", ["d1d8"]),
+    ("scholar", "r1bqkb1r/pppp1ppp/2n2n2/4p2Q/2B1P3/8/PPPP1PPP/RNB1K1NR w KQkq - 4 4", ["h5f7"]),
+    ("fool", "rnbqkbnr/ppppp2p/5p2/6p1/4P3/8/PPPP1PPP/RNBQKBNR w KQkq g6 0 3", ["d1h5"]),
+    ("mate in 2", "r2qkb1r/pp2nppp/3p4/2pNN1B1/2BnP3/3P4/PPP2PPP/R2bK2R w KQkq - 1 10", ["d5f6"]),
+]
+
+# Konfiguracije: sve isključeno, svaka tehnika posebno, sve uključeno
+CONFIGS = [("none", ())] + [(name, (name,)) for name in chessAI.SEARCH_OPTIONS] + [("all", tuple(chessAI.SEARCH_OPTIONS))]
+
+
+# Pokreće pretragu nad svim pozicijama sa zadanim uključenim tehnikama; vraća (čvorovi, vrijeme, riješeno, ukupno)
+def runConfig(enabled, depth):
+    saved = dict(chessAI.SEARCH_OPTIONS)
+    for name in chessAI.SEARCH_OPTIONS:
+        chessAI.SEARCH_OPTIONS[name] = name in enabled
+    nodes, elapsed, solved, total = 0, 0.0, 0, 0
+    try:
+        for name, fen, bestMoves in BENCH_POSITIONS:
+            gs = ChessEngine.GameState().loadFen(fen)
+            chessAI.transpositionTable.clear()
+            start = time.time()
+            move = chessAI.findBestMoveNegaMax(gs, gs.getValidMoves(), depth)
+            elapsed += time.time() - start
+            nodes += chessAI.searchedNodes()  # glavna pretraga i quiescence
+            if bestMoves is not None:
+                total += 1
+                solved += move is not None and move.getChessNotation() in bestMoves
+    finally:
+        chessAI.SEARCH_OPTIONS.update(saved)
+    return nodes, elapsed, solved, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark selektivne pretrage (čvorovi, vrijeme, riješene pozicije)")
+    parser.add_argument("--depth", type=int, default=chessAI.MAX_DEPTH + 2)
+    args = parser.parse_args()
+
+    print(f"Dubina {args.depth}, {len(BENCH_POSITIONS)} pozicija")
+    print(f"{'konfiguracija':<20}{'čvorovi':>10}{'vrijeme (s)':>14}{'NPS':>10}{'riješeno':>10}")
+    for label, enabled in CONFIGS:
+        nodes, elapsed, solved, total = runConfig(enabled, args.depth)
+        nps = int(nodes / elapsed) if elapsed > 0 else 0
+        print(f"{label:<20}{nodes:>10}{elapsed:>14.2f}{nps:>10}{f'{solved}/{total}':>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Statistika pretrage: jedan SearchStats objekat po potezu (negamax ili MCTS), izvoz u JSON
+i sabiranje po partiji. PhaseProfiler opciono mjeri vrijeme po fazama (generator poteza,
+evaluacija, ostatak pretrage) i izlaže trenutnu fazu za sampling profilere.
+"""
+
+import json
+import time
+
+try:
+    import resource  # nije dostupan na Windowsu
+except ImportError:
+    resource = None
+
+CUTOFF_HISTOGRAM_SIZE = 32  # zadnja ćelija broji sve cutoffove na indeksu >= 31
+
+
+# Maksimalna zauzeta memorija procesa u KB (None ako platforma to ne podržava)
+def peakMemoryKB():
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+class SearchStats:
+    def __init__(self, engine):
+        self.engine = engine
+        self.counters = {}
+        self.cutoffIndex = [0] * CUTOFF_HISTOGRAM_SIZE
+        self.iterations = []  # negamax: (dubina, čvorovi, skor, sekunde, najbolji potez) po iteraciji
+        self.phaseSeconds = {}
+        self.startTime = time.time()
+        self.elapsed = 0.0
+        self.memoryKB = None
+        self.move = None
+
+    def stop(self, move=None):
+        self.elapsed = time.time() - self.startTime
+        self.memoryKB = peakMemoryKB()
+        self.move = move.getChessNotation() if move is not None else None
+        return self
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    # Izvedene vrijednosti: NPS, efektivni faktor grananja, procenat pogodaka pješačke tabele,
+    # MCTS iteracije u sekundi, prosječna dužina simulacije
+    def derived(self):
+        c = self.counters
+        nodes = c.get('nodes', 0) + c.get('qnodes', 0)
+        result = {'nps': nodes / self.elapsed if self.elapsed > 0 else 0.0}
+        if len(self.iterations) >= 2 and self.iterations[-2][1] > 0:
+            result['branchingFactor'] = self.iterations[-1][1] / self.iterations[-2][1]
+        cutoffs = sum(self.cutoffIndex)
+        if cutoffs:
+            result['firstMoveCutoffRate'] = self.cutoffIndex[0] / cutoffs
+        pawnProbes = c.get('pawnHashHits', 0) + c.get('pawnHashMisses', 0)
+        if pawnProbes:
+            result['pawnHashHitRate'] = c['pawnHashHits'] / pawnProbes
+        if c.get('mctsIterations'):
+            result['mctsIterationsPerSecond'] = c['mctsIterations'] / self.elapsed if self.elapsed > 0 else 0.0
+            result['averageRolloutLength'] = c.get('rolloutPlies', 0) / c['mctsIterations']
+        return result
+
+    def toDict(self):
+        return {
+            'engine': self.engine,
+            'move': self.move,
+            'seconds': self.elapsed,
+            'memoryKB': self.memoryKB,
+            'counters': dict(self.counters),
+            'cutoffIndex': list(self.cutoffIndex),
+            'iterations': [list(it) for it in self.iterations],
+            'phaseSeconds': dict(self.phaseSeconds),
+            **self.derived(),
+        }
+
+    def toJson(self):
+        return json.dumps(self.toDict())
+
+
+# Sabira statistiku svih poteza jedne partije (ili više partija)
+class GameStats:
+    def __init__(self):
+        self.moves = []
+
+    def add(self, stats):
+        self.moves.append(stats.toDict() if isinstance(stats, SearchStats) else stats)
+
+    # Upisuje statistiku svakog poteza kao jednu JSON liniju
+    def writeJsonLines(self, path, **extra):
+        with open(path, "a") as f:
+            for entry in self.moves:
+                f.write(json.dumps({**extra, **entry}) + "\n")
+
+    def toDict(self):
+        counters, cutoffIndex, phaseSeconds = {}, [0] * CUTOFF_HISTOGRAM_SIZE, {}
+        seconds = 0.0
+        for entry in self.moves:
+            seconds += entry['seconds']
+            for name, value in entry['counters'].items():
+                counters[name] = counters.get(name, 0) + value
+            for i, value in enumerate(entry['cutoffIndex']):
+                cutoffIndex[i] += value
+            for name, value in entry['phaseSeconds'].items():
+                phaseSeconds[name] = phaseSeconds.get(name, 0.0) + value
+        nodes = counters.get('nodes', 0) + counters.get('qnodes', 0)
+        return {
+            'moves': len(self.moves),
+            'seconds': seconds,
+            'counters': counters,
+            'cutoffIndex': cutoffIndex,
+            'phaseSeconds': phaseSeconds,
+            'nps': nodes / seconds if seconds > 0 else 0.0,
+            'peakMemoryKB': max((e['memoryKB'] or 0 for e in self.moves), default=None),
+        }
+
+
+# Mjerenje vremena po fazama. Dok je uključen, GameState.getValidMoves i evaluacije iz chessAI.EVALUATORS su
+# zamijenjene omotačima koji mjere vrijeme i postavljaju PhaseProfiler.currentPhase (sampling profiler
+# može čitati tu vrijednost u svakom uzorku). Kad je isključen, pretraga nema nikakav dodatni trošak.
+class PhaseProfiler:
+    currentPhase = "search"
+
+    def __init__(self, stats=None):
+        self.stats = stats
+        self.seconds = {'moveGeneration': 0.0, 'evaluation': 0.0}
+        self._originals = None
+
+    def _wrap(self, func, phase):
+        profiler = self
+
+        def wrapper(*args, **kwargs):
+            previous = PhaseProfiler.currentPhase
+            PhaseProfiler.currentPhase = phase
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profiler.seconds[phase] += time.perf_counter() - start
+                PhaseProfiler.currentPhase = previous
+        return wrapper
+
+    def __enter__(self):
+        import ChessEngine
+        import chessAI
+        self._start = time.perf_counter()
+        # chessAI.evaluate se čuva jer ga selectEvaluator unutar bloka postavlja na omotanu funkciju
+        self._originals = (ChessEngine.GameState.getValidMoves, dict(chessAI.EVALUATORS), chessAI.evaluate)
+        ChessEngine.GameState.getValidMoves = self._wrap(self._originals[0], 'moveGeneration')
+        for name, func in self._originals[1].items():
+            chessAI.EVALUATORS[name] = self._wrap(func, 'evaluation')
+        return self
+
+    def __exit__(self, *exc):
+        import ChessEngine
+        import chessAI
+        ChessEngine.GameState.getValidMoves = self._originals[0]
+        chessAI.EVALUATORS.update(self._originals[1])
+        chessAI.evaluate = self._originals[2]
+        total = time.perf_counter() - self._start
+        self.seconds['search'] = total - self.seconds['moveGeneration'] - self.seconds['evaluation']
+        if self.stats is not None:
+            self.stats.phaseSeconds = dict(self.seconds)
+        return False
@@ -0,0 +1,104 @@
+"""
+Static exchange evaluation (SEE): procjena niza uzimanja na jednom polju bez igranja poteza.
+Koristi se za redoslijed poteza, orezivanje u quiescence pretrazi i politiku MCTS simulacija.
+"""
+
+# Vrijednosti figura za razmjenu (u stotinkama pješaka)
+SEE_VALUES = {"pawn": 100, "knight": 300, "bishop": 300, "rook": 500, "queen": 900, "king": 20000}
+PIECE_VALUES = {color + " " + name: value for color in ("white", "black") for name, value in SEE_VALUES.items()}
+PIECE_VALUES["--"] = 0
+
+KNIGHT_OFFSETS = [(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)]
+KING_OFFSETS = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+ORTHOGONAL = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+DIAGONAL = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+
+
+# Lista napadača boje `color` na polje (r, c) kao (vrijednost, red, kolona).
+# Polja iz `removed` se smatraju praznim, pa se vide i figure iza već razmijenjenih (x-ray).
+def getAttackers(board, r, c, color, removed=()):
+    attackers = []
+
+    # Pješaci: bijeli napada polje sa reda ispod, crni sa reda iznad
+    pawnRow = r + 1 if color == "white" else r - 1
+    if 0 <= pawnRow < 8:
+        for pc in (c - 1, c + 1):
+            if 0 <= pc < 8 and board[pawnRow][pc] == color + " pawn" and (pawnRow, pc) not in removed:
+                attackers.append((SEE_VALUES["pawn"], pawnRow, pc))
+
+    for dr, dc in KNIGHT_OFFSETS:
+        nr, nc = r + dr, c + dc
+        if 0 <= nr < 8 and 0 <= nc < 8 and board[nr][nc] == color + " knight" and (nr, nc) not in removed:
+            attackers.append((SEE_VALUES["knight"], nr, nc))
+
+    for dr, dc in KING_OFFSETS:
+        nr, nc = r + dr, c + dc
+        if 0 <= nr < 8 and 0 <= nc < 8 and board[nr][nc] == color + " king" and (nr, nc) not in removed:
+            attackers.append((SEE_VALUES["king"], nr, nc))
+
+    # Linijske figure: prva figura u pravcu (preskačući uklonjena polja)
+    for directions, sliders in ((ORTHOGONAL, ("rook", "queen")), (DIAGONAL, ("bishop", "queen"))):
+        for dr, dc in directions:
+            nr, nc = r + dr, c + dc
+            while 0 <= nr < 8 and 0 <= nc < 8:
+                piece = board[nr][nc]
+                if piece != "--" and (nr, nc) not in removed:
+                    if piece.startswith(color) and piece.split()[1] in sliders:
+                        attackers.append((PIECE_VALUES[piece], nr, nc))
+                    break
+                nr += dr
+                nc += dc
+    return attackers
+
+
+# Razrješava razmjenu na polju (r, c): `gains` već sadrži dobitak prvog uzimanja, `onSquare` je vrijednost
+# figure koja sada stoji na polju, a `side` boja koja sljedeća uzima. Svaka strana smije prekinuti razmjenu.
+def resolveExchange(board, r, c, gains, onSquare, side, removed):
+    while True:
+        attackers = getAttackers(board, r, c, side, removed)
+        if not attackers:
+            break
+        value, ar, ac = min(attackers)
+        other = "black" if side == "white" else "white"
+        # Kralj smije uzeti samo ako polje više nije napadnuto
+        if value == SEE_VALUES["king"] and getAttackers(board, r, c, other, removed | {(ar, ac)}):
+            break
+        gains.append(onSquare - gains[-1])
+        removed.add((ar, ac))
+        onSquare = value
+        side = other
+    for d in range(len(gains) - 1, 0, -1):
+        gains[d - 1] = -max(-gains[d - 1], gains[d])
+    return gains[0]
+
+
+# SEE poteza: materijalni dobitak igrača koji igra potez nakon najboljeg niza uzimanja na krajnjem polju
+def staticExchange(gs, move):
+    removed = {(move.startRow, move.startCol)}
+    if move.isEnpassantMove:
+        removed.add((move.startRow, move.endCol))
+    gain = PIECE_VALUES[move.pieceCaptured]
+    onSquare = PIECE_VALUES[move.pieceMoved]
+    if move.isPawnPromotion:
+        onSquare = SEE_VALUES[move.promotionPiece]
+        gain += onSquare - SEE_VALUES["pawn"]
+    side = "black" if move.pieceMoved.startswith("white") else "white"
+    return resolveExchange(gs.board, move.endRow, move.endCol, [gain], onSquare, side, removed)
+
+
+# Koliko protivnik može dobiti uzimanjem figure koja je upravo došla na krajnje polje poteza (0 ako je polje sigurno)
+def exchangeThreat(gs, move):
+    removed = {(move.startRow, move.startCol)}
+    if move.isEnpassantMove:
+        removed.add((move.startRow, move.endCol))
+    target = SEE_VALUES[move.promotionPiece] if move.isPawnPromotion else PIECE_VALUES[move.pieceMoved]
+    side = "black" if move.pieceMoved.startswith("white") else "white"
+    attackers = getAttackers(gs.board, move.endRow, move.endCol, side, removed)
+    if not attackers:
+        return 0
+    value, ar, ac = min(attackers)
+    other = "black" if side == "white" else "white"
+    if value == SEE_VALUES["king"] and getAttackers(gs.board, move.endRow, move.endCol, other, removed | {(ar, ac)}):
+        return 0
+    removed.add((ar, ac))
+    return max(0, resolveExchange(gs.board, move.endRow, move.endCol, [target], value, other, removed))
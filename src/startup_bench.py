@@ -0,0 +1,86 @@
+"""
+Mjerenje vremena pokretanja: uvoz engine modula i klijenta u svježem interpreteru (medijan više
+pokretanja) i učitavanje sprite-ova figura iz PNG fajlova u odnosu na keširani atlas.
+
+Primjer:
+    python src/startup_bench.py --runs 10
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SRC_DIR)
+MODULES = ["ChessEngine", "chessAI", "monte_carlo_ai", "game_store", "engine_process", "ChessMain"]
+GUI_MODULES = ["pygame", "tkinter"]
+
+# Kod koji se izvršava u novom procesu: vrijeme uvoza i da li su usput učitani GUI moduli
+IMPORT_PROBE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start, ",".join(m for m in {gui!r} if m in sys.modules))
+"""
+
+ASSET_PROBE = """
+import os, sys, time
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+import pygame as p
+import ChessMain
+ChessMain.SPRITE_CACHE_DIR = sys.argv[1]
+p.init()
+ChessMain.p = p
+p.display.set_mode((ChessMain.WIDTH, ChessMain.HEIGHT))
+start = time.perf_counter()
+ChessMain.loadImages()
+print(time.perf_counter() - start)
+"""
+
+
+def runProbe(code, *args):
+    env = dict(os.environ, PYTHONPATH=SRC_DIR + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, "-c", code, *args], cwd=ROOT_DIR, env=env,
+                            capture_output=True, text=True, check=True).stdout.split()
+    return time.perf_counter() - start, output
+
+
+def benchImports(runs, report=print):
+    report(f"{'modul':<16} {'uvoz (ms)':>10} {'proces (ms)':>12}  GUI moduli")
+    for module in MODULES:
+        importTimes, processTimes, gui = [], [], ""
+        for _ in range(runs):
+            wall, output = runProbe(IMPORT_PROBE.format(module=module, gui=GUI_MODULES))
+            processTimes.append(wall)
+            importTimes.append(float(output[0]))
+            gui = output[1] if len(output) > 1 else "-"
+        report(f"{module:<16} {statistics.median(importTimes) * 1000:>10.1f} {statistics.median(processTimes) * 1000:>12.1f}  {gui}")
+
+
+def benchAssets(runs, report=print):
+    with tempfile.TemporaryDirectory() as cacheDir:
+        try:
+            cold = [float(runProbe(ASSET_PROBE, os.path.join(cacheDir, str(i)))[1][0]) for i in range(runs)]
+        except subprocess.CalledProcessError:
+            report("Sprite-ovi: pygame nije dostupan, mjerenje preskočeno")
+            return
+        warm = [float(runProbe(ASSET_PROBE, os.path.join(cacheDir, "0"))[1][0]) for _ in range(runs)]
+    report(f"Sprite-ovi iz PNG fajlova: {statistics.median(cold) * 1000:.1f} ms, "
+           f"iz atlasa: {statistics.median(warm) * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vrijeme uvoza modula i učitavanja sprite-ova")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    benchImports(args.runs)
+    benchAssets(args.runs)
+
+
+if __name__ == "__main__":
+    main()
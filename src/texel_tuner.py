@@ -0,0 +1,248 @@
+"""
+Texel tuner za vrijednosti figura i pozicione tabele (psqt.py), za sredinu partije i završnicu.
+
+Pozicije se uzimaju iz sačuvanih partija (baza partija ili stari log/gameN.txt fajlovi) i označavaju
+rezultatom partije (1 / 0.5 / 0 iz ugla bijelog). Preskaču se pozicije iz otvaranja, pozicije sa šahom
+i pozicije u kojima je odigrani potez uzimanje (nisu mirne). Svaka pozicija se pamti kao kompaktan
+niz figura (tip, polje u tabeli, predznak boje) u NumPy nizovima, pa se evaluacija svih pozicija i
+gradijent Texel greške
+    E = mean((rezultat - sigmoid(K * evaluacija))^2)
+računaju vektorski (gather po indeksima parametara i np.bincount za gradijent), bez Python petlji
+po pozicijama. K se prvo podesi na početnim težinama, zatim se težine optimizuju Adam koracima.
+Pješačka struktura (pawn_eval) ulazi u evaluaciju kao fiksan dio koji se ne podešava.
+
+Izdvajanje pozicija ide paralelno u pulu procesa, a rezultat se može sačuvati (--features) da se
+naredna podešavanja ne moraju ponovo odigravati partije. Nove tabele se ispisuju kao Python kod u
+formatu psqt.py (--out).
+
+Primjer:
+    python src/texel_tuner.py --store log/games --workers 8 --features pozicije.npz --epochs 500 --out psqt_tuned.py
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import ChessEngine
+import psqt
+from batch_analysis import readGames
+from game_store import resultOf
+from pawn_eval import pawnStructure
+
+PIECE_TYPES = ["pawn", "knight", "bishop", "rook", "queen", "king"]
+MAX_PIECES = 32
+SKIP_OPENING_PLIES = 8
+RESULT_SCORES = {"1-0": 1.0, "0-1": 0.0, "1/2-1/2": 0.5}
+
+# Raspored parametara: za svaku fazu (sredina, završnica) 6 vrijednosti figura pa 6 * 64 polja tabela
+PARAMS_PER_PHASE = len(PIECE_TYPES) + len(PIECE_TYPES) * 64
+NUM_PARAMS = 2 * PARAMS_PER_PHASE
+
+
+# Figure pozicije kao (tip, polje u tabeli iz ugla te boje, predznak), najviše MAX_PIECES
+def positionPieces(board):
+    types, squares, signs = [], [], []
+    for r in range(8):
+        for c in range(8):
+            piece = board[r][c]
+            if piece != "--":
+                color, pieceType = piece.split()
+                types.append(PIECE_TYPES.index(pieceType))
+                squares.append(r * 8 + c if color == "white" else (7 - r) * 8 + c)
+                signs.append(1 if color == "white" else -1)
+    return types[:MAX_PIECES], squares[:MAX_PIECES], signs[:MAX_PIECES]
+
+
+# Mirne pozicije jedne partije sa rezultatom; vraća nizove (tipovi, polja, predznaci, faza, pješaci, rezultat)
+def extractGame(record):
+    gs = ChessEngine.GameState()
+    if "FEN" in record.headers:
+        gs.loadFen(record.headers["FEN"])
+    positions = []
+    for ply, notation in enumerate(record.moves + [None]):
+        validMoves = gs.getValidMoves() or []
+        move = next((m for m in validMoves if m.getChessNotation() == (notation or "")[:4]), None)
+        if ply >= SKIP_OPENING_PLIES and validMoves and not gs.inCheck and (move is None or move.pieceCaptured == "--"):
+            positions.append((positionPieces(gs.board), min(gs.phase, psqt.PHASE_MAX), pawnStructure(gs.board)))
+        if move is None:
+            break
+        gs.makeMove(move)
+
+    result = record.result if record.result in RESULT_SCORES else resultOf(gs)
+    count = len(positions) if result in RESULT_SCORES else 0
+    types = np.zeros((count, MAX_PIECES), dtype=np.int16)
+    squares = np.zeros((count, MAX_PIECES), dtype=np.int16)
+    signs = np.zeros((count, MAX_PIECES), dtype=np.int8)
+    for i, ((t, s, g), _, _) in enumerate(positions[:count]):
+        types[i, :len(t)], squares[i, :len(s)], signs[i, :len(g)] = t, s, g
+    phases = np.array([p[1] for p in positions[:count]], dtype=np.int8)
+    pawns = np.array([p[2] for p in positions[:count]], dtype=np.float32)
+    results = np.full(count, RESULT_SCORES.get(result, 0.5), dtype=np.float32)
+    return types, squares, signs, phases, pawns, results
+
+
+def extractPositions(games, workers, report=print):
+    parts = []
+    start = time.time()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for i, part in enumerate(executor.map(extractGame, games, chunksize=16), 1):
+            if len(part[0]):
+                parts.append(part)
+            if i % 1000 == 0:
+                report(f"  {i} partija, {sum(len(p[0]) for p in parts)} pozicija ({time.time() - start:.0f} s)")
+    if not parts:
+        raise ValueError("nema završenih partija sa pozicijama za podešavanje")
+    return [np.concatenate(column) for column in zip(*parts)]
+
+
+def savePositions(path, data):
+    np.savez_compressed(path, types=data[0], squares=data[1], signs=data[2], phases=data[3], pawns=data[4], results=data[5])
+
+
+def loadPositions(path):
+    with np.load(path) as f:
+        return [f[name] for name in ("types", "squares", "signs", "phases", "pawns", "results")]
+
+
+# Početne težine iz psqt.py
+def initialWeights():
+    weights = np.zeros(NUM_PARAMS)
+    for phaseIndex, (values, tables) in enumerate(((psqt.PIECE_VALUE_MG, psqt.TABLES_MG), (psqt.PIECE_VALUE_EG, psqt.TABLES_EG))):
+        base = phaseIndex * PARAMS_PER_PHASE
+        for t, pieceType in enumerate(PIECE_TYPES):
+            weights[base + t] = values[pieceType]
+            weights[base + len(PIECE_TYPES) + t * 64:base + len(PIECE_TYPES) + (t + 1) * 64] = np.ravel(tables[pieceType])
+    return weights
+
+
+class TexelProblem:
+    def __init__(self, types, squares, signs, phases, pawns, results):
+        # float32/int32 nizovi (N x MAX_PIECES) da i milioni pozicija stanu u memoriju
+        self.signs = signs.astype(np.float32)
+        self.valueIndex = types.astype(np.int32)
+        self.tableIndex = len(PIECE_TYPES) + types.astype(np.int32) * 64 + squares.astype(np.int32)
+        self.mgFactor = phases.astype(np.float64) / psqt.PHASE_MAX
+        self.pawns = pawns.astype(np.float64)
+        self.results = results.astype(np.float64)
+        # Parametri koji se ne podešavaju: vrijednost kralja u obje faze
+        self.frozen = np.zeros(NUM_PARAMS, dtype=bool)
+        self.frozen[[PIECE_TYPES.index("king"), PARAMS_PER_PHASE + PIECE_TYPES.index("king")]] = True
+
+    def evaluate(self, weights):
+        mgWeights, egWeights = weights[:PARAMS_PER_PHASE], weights[PARAMS_PER_PHASE:]
+        mg = (self.signs * (mgWeights[self.valueIndex] + mgWeights[self.tableIndex])).sum(axis=1)
+        eg = (self.signs * (egWeights[self.valueIndex] + egWeights[self.tableIndex])).sum(axis=1)
+        return mg * self.mgFactor + eg * (1 - self.mgFactor) + self.pawns
+
+    def loss(self, weights, k):
+        predicted = 1 / (1 + np.exp(-k * self.evaluate(weights)))
+        return float(np.mean((self.results - predicted) ** 2))
+
+    def lossAndGradient(self, weights, k):
+        predicted = 1 / (1 + np.exp(-k * self.evaluate(weights)))
+        error = self.results - predicted
+        # dE/d(evaluacija) za svaku poziciju, pa raspodjela na parametre koje pozicija koristi
+        dEval = -2 * error * predicted * (1 - predicted) * k / len(error)
+        gradient = np.zeros(NUM_PARAMS)
+        for offset, factor in ((0, self.mgFactor), (PARAMS_PER_PHASE, 1 - self.mgFactor)):
+            pieceWeights = (self.signs * (dEval * factor)[:, None]).ravel()
+            for index in (self.valueIndex, self.tableIndex):
+                gradient[offset:offset + PARAMS_PER_PHASE] += np.bincount(index.ravel(), weights=pieceWeights,
+                                                                          minlength=PARAMS_PER_PHASE)
+        gradient[self.frozen] = 0
+        return float(np.mean(error ** 2)), gradient
+
+    # K za koji početne težine najbolje predviđaju rezultate (zlatni presjek po log K)
+    def fitScale(self, weights, low=1e-4, high=1.0, steps=40):
+        a, b = np.log(low), np.log(high)
+        ratio = (np.sqrt(5) - 1) / 2
+        for _ in range(steps):
+            c, d = b - ratio * (b - a), a + ratio * (b - a)
+            if self.loss(weights, np.exp(c)) < self.loss(weights, np.exp(d)):
+                b = d
+            else:
+                a = c
+        return float(np.exp((a + b) / 2))
+
+
+def tune(problem, weights, k, epochs, learningRate, validation=None, report=print):
+    # Adam: prvi i drugi momenti gradijenta
+    m = np.zeros_like(weights)
+    v = np.zeros_like(weights)
+    beta1, beta2, eps = 0.9, 0.999, 1e-8
+    start = time.time()
+    for epoch in range(1, epochs + 1):
+        loss, gradient = problem.lossAndGradient(weights, k)
+        m = beta1 * m + (1 - beta1) * gradient
+        v = beta2 * v + (1 - beta2) * gradient ** 2
+        weights = weights - learningRate * (m / (1 - beta1 ** epoch)) / (np.sqrt(v / (1 - beta2 ** epoch)) + eps)
+        if epoch % 50 == 0 or epoch == epochs:
+            line = f"  epoha {epoch}: greška {loss:.6f}"
+            if validation is not None:
+                line += f", validacija {validation.loss(weights, k):.6f}"
+            report(line + f" ({time.time() - start:.0f} s)")
+    return weights
+
+
+# Nove vrijednosti i tabele kao Python kod u formatu psqt.py
+def renderTables(weights):
+    lines = ["# Rezultat texel_tuner.py: vrijednosti i tabele za zamjenu u psqt.py", ""]
+    rounded = np.rint(weights).astype(int)
+    for phaseIndex, suffix in enumerate(("MG", "EG")):
+        base = phaseIndex * PARAMS_PER_PHASE
+        values = ", ".join(f'"{t}": {rounded[base + i]}' for i, t in enumerate(PIECE_TYPES))
+        lines.append(f"PIECE_VALUE_{suffix} = {{{values}}}")
+    for t, pieceType in enumerate(PIECE_TYPES):
+        for phaseIndex, suffix in enumerate(("mg", "eg")):
+            start = phaseIndex * PARAMS_PER_PHASE + len(PIECE_TYPES) + t * 64
+            table = rounded[start:start + 64].reshape(8, 8)
+            lines.append("")
+            lines.append(f"{pieceType}_{suffix} = [")
+            rows = ["    [" + ", ".join(f"{value:4d}" for value in row) + "]" for row in table]
+            lines.append(",\n".join(rows))
+            lines.append("]")
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Texel podešavanje vrijednosti figura i pozicionih tabela")
+    parser.add_argument("--store", default=None, help="baza partija (putanja bez ekstenzije), npr. log/games")
+    parser.add_argument("--log-dir", default=None, help="direktorij sa starim gameN.txt fajlovima")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--features", default=None, help=".npz sa izdvojenim pozicijama (koristi se ako postoji, inače se pravi)")
+    parser.add_argument("--epochs", type=int, default=500)
+    parser.add_argument("--learning-rate", type=float, default=1.0)
+    parser.add_argument("--validation", type=float, default=0.1, help="udio pozicija za provjeru (ne koriste se za učenje)")
+    parser.add_argument("--out", default="psqt_tuned.py")
+    args = parser.parse_args()
+
+    if args.features and os.path.exists(args.features):
+        data = loadPositions(args.features)
+    else:
+        if not args.store and not args.log_dir:
+            args.store = "log/games"
+        data = extractPositions(readGames(args.store, args.log_dir), args.workers)
+        if args.features:
+            savePositions(args.features, data)
+    count = len(data[0])
+    print(f"{count} pozicija")
+
+    order = np.random.default_rng(0).permutation(count)
+    split = int(count * (1 - args.validation))
+    train = TexelProblem(*(column[order[:split]] for column in data))
+    validation = TexelProblem(*(column[order[split:]] for column in data)) if split < count else None
+
+    weights = initialWeights()
+    k = train.fitScale(weights)
+    print(f"K = {k:.5f}, početna greška {train.loss(weights, k):.6f}")
+    weights = tune(train, weights, k, args.epochs, args.learning_rate, validation)
+    with open(args.out, "w") as f:
+        f.write(renderTables(weights))
+    print(f"Nove tabele upisane u {args.out}")
+
+
+if __name__ == "__main__":
+    main()